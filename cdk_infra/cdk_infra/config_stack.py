@@ -2,7 +2,9 @@
 
 import os
 
-from aws_cdk import Stack
+from aws_cdk import RemovalPolicy, Stack
+from aws_cdk import aws_dynamodb as dynamodb
+from aws_cdk import aws_iam as iam
 from aws_cdk import aws_ssm as ssm
 from constructs import Construct
 
@@ -22,3 +24,29 @@ class ConfigStack(Stack):
             string_value=model_id,
             description="Bedrock model ID for agent",
         )
+
+        # A2A booking tasks and their push notification webhooks (async task mode)
+        task_table = dynamodb.Table(
+            self,
+            "A2ATaskTable",
+            partition_key=dynamodb.Attribute(name="pk", type=dynamodb.AttributeType.STRING),
+            sort_key=dynamodb.Attribute(name="sk", type=dynamodb.AttributeType.STRING),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute="expires_at",
+            removal_policy=RemovalPolicy.DESTROY,
+        )
+        ssm.StringParameter(
+            self,
+            "A2ATaskTableParam",
+            parameter_name="/restaurant-booking/a2a-task-table",
+            string_value=task_table.table_name,
+            description="DynamoDB table for A2A booking tasks",
+        )
+
+        # The A2A booking agent's runtime reads and writes its tasks
+        # Note: Role is created by agentcore CLI, we just reference it
+        runtime_role_name = os.getenv(
+            "AGENTCORE_RUNTIME_ROLE_NAME", "AmazonBedrockAgentCoreSDKRuntime-us-east-1-b1731112de"
+        )
+        runtime_role = iam.Role.from_role_name(self, "AgentCoreRuntimeRole", runtime_role_name)
+        task_table.grant_read_write_data(runtime_role)
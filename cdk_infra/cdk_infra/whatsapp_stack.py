@@ -17,16 +17,40 @@
 
 """CDK Stack for WhatsApp integration."""
 
-from aws_cdk import CfnOutput, CustomResource, Duration, Stack
+from aws_cdk import (
+    AssetHashType,
+    CfnOutput,
+    CustomResource,
+    DockerVolume,
+    Duration,
+    RemovalPolicy,
+    Stack,
+)
+from aws_cdk import aws_dynamodb as dynamodb
 from aws_cdk import aws_iam as iam
 from aws_cdk import aws_lambda as lambda_
+from aws_cdk import aws_lambda_event_sources as event_sources
 from aws_cdk import aws_s3 as s3
 from aws_cdk import aws_secretsmanager as secretsmanager
 from aws_cdk import aws_sns as sns
 from aws_cdk import aws_sns_subscriptions as subscriptions
+from aws_cdk import aws_sqs as sqs
 from aws_cdk.custom_resources import Provider
 from constructs import Construct
 
+# Longest agent turn the worker waits for, and the worker's margin on top of it
+AGENT_TIMEOUT_SECONDS = 120
+WORKER_TIMEOUT = Duration.seconds(AGENT_TIMEOUT_SECONDS + 60)
+# Messages a user sends this close together are answered in one agent turn
+COALESCE_WINDOW_SECONDS = 3
+# How often the worker re-queues messages while AgentCore's circuit breaker is
+# open (BREAKER_RETRY_SECONDS in lambda/whatsapp_orchestrator.py)
+BREAKER_RETRY_SECONDS = 30
+# Longest AgentCore brownout queued messages wait out before being dead-lettered
+BROWNOUT_SECONDS = 5 * 60
+# Attempts at a turn that actually fails before it is dead-lettered
+FAILED_TURN_RECEIVES = 5
+
 
 class WhatsAppStack(Stack):
     """WhatsApp integration stack."""
@@ -65,10 +89,55 @@ class WhatsAppStack(Stack):
             secret_name="whatsapp-booking/credentials",  # noqa: S106
         )
 
+        # FIFO queue between SNS and the agent: one message group per phone number
+        # keeps each conversation in order while different users run in parallel
+        dead_letter_queue = sqs.Queue(
+            self,
+            "WhatsAppDeadLetterQueue",
+            queue_name="WhatsAppMessagesDLQ.fifo",
+            fifo=True,
+            retention_period=Duration.days(14),
+        )
+        # Receive budget before a message is dead-lettered. Every receive counts,
+        # including those that hand a message back without failing it:
+        # - 1 for the coalescing hold (first receive only, to gather the burst)
+        # - 1 per BREAKER_RETRY_SECONDS while the breaker is open, for a brownout
+        #   of up to BROWNOUT_SECONDS (10 receives for 5 minutes)
+        # - FAILED_TURN_RECEIVES for turns that really fail. A message queued
+        #   behind a failing turn is handed back with it, so it spends these too
+        # Total: 16, so a held burst or a short brownout never dead-letters a
+        # valid message
+        max_receive_count = 1 + BROWNOUT_SECONDS // BREAKER_RETRY_SECONDS + FAILED_TURN_RECEIVES
+        message_queue = sqs.Queue(
+            self,
+            "WhatsAppMessageQueue",
+            queue_name="WhatsAppMessages.fifo",
+            fifo=True,
+            # AWS guidance: at least six times the consuming function's timeout
+            visibility_timeout=Duration.seconds(WORKER_TIMEOUT.to_seconds() * 6),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=max_receive_count, queue=dead_letter_queue
+            ),
+        )
+
+        # WhatsApp message IDs already handled, so redelivered webhooks are skipped,
+        # and the per-user buffers of the direct (SNS) coalescing path
+        idempotency_table = dynamodb.Table(
+            self,
+            "WhatsAppIdempotencyTable",
+            partition_key=dynamodb.Attribute(name="message_id", type=dynamodb.AttributeType.STRING),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute="expires_at",
+            removal_policy=RemovalPolicy.DESTROY,
+        )
+
         # Lambda Orchestrator environment variables
         env_vars = {
             "AGENTCORE_RUNTIME_ARN": agentcore_runtime_arn,
             "WHATSAPP_SECRET_ARN": whatsapp_secret.secret_arn,
+            "AGENT_TIMEOUT_SECONDS": str(AGENT_TIMEOUT_SECONDS),
+            "IDEMPOTENCY_TABLE": idempotency_table.table_name,
+            "COALESCE_WINDOW_SECONDS": str(COALESCE_WINDOW_SECONDS),
             "LOG_LEVEL": "INFO",
         }
 
@@ -95,12 +164,26 @@ class WhatsAppStack(Stack):
                         "-c",
                         (
                             "pip install -r requirements.txt -t /asset-output && "
-                            "cp -au *.py /asset-output/"
+                            "cp -au *.py /asset-output/ && "
+                            # FAQ fast-path snapshot (faq.py reads restaurant/)
+                            "mkdir -p /asset-output/restaurant && "
+                            "cp /restaurant-data/hours.json /restaurant-data/menu.json "
+                            "/asset-output/restaurant/"
                         ),
                     ],
+                    "volumes": [
+                        DockerVolume(
+                            host_path=str(Path("../data/restaurant").resolve()),
+                            container_path="/restaurant-data",
+                        )
+                    ],
                 },
+                # Hash the bundle, so edits to the snapshot redeploy the function
+                asset_hash_type=AssetHashType.OUTPUT,
             )
 
+        # Ingest: SNS cannot deliver to a FIFO queue, so this function queues
+        # each message with its phone number as the message group
         orchestrator = lambda_.Function(
             self,
             "WhatsAppOrchestrator",
@@ -108,6 +191,20 @@ class WhatsAppStack(Stack):
             handler="whatsapp_orchestrator.handler",
             code=code,
             timeout=Duration.seconds(30),
+            memory_size=256,
+            architecture=lambda_.Architecture.ARM_64,
+            environment={**env_vars, "WHATSAPP_QUEUE_URL": message_queue.queue_url},
+            tracing=lambda_.Tracing.ACTIVE,
+        )
+
+        # Worker: runs agent turns from the queue with a timeout that fits them
+        worker = lambda_.Function(
+            self,
+            "WhatsAppWorker",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="whatsapp_orchestrator.handler",
+            code=code,
+            timeout=WORKER_TIMEOUT,
             memory_size=512,
             architecture=lambda_.Architecture.ARM_64,
             environment=env_vars,
@@ -125,12 +222,29 @@ class WhatsAppStack(Stack):
             version=version,
             description="Live alias for zero-downtime deployments",
         )
+        worker_alias = lambda_.Alias(
+            self,
+            "WhatsAppWorkerLive",
+            alias_name="live",
+            version=worker.current_version,
+            description="Live alias for zero-downtime deployments",
+        )
 
         # Subscribe alias (not function) to SNS for zero-downtime updates
         whatsapp_topic.add_subscription(subscriptions.LambdaSubscription(alias))
+        message_queue.grant_send_messages(orchestrator)
+
+        # Failed turns are retried alone (with the rest of their user's batch)
+        worker_alias.add_event_source(
+            event_sources.SqsEventSource(
+                message_queue,
+                batch_size=10,
+                report_batch_item_failures=True,
+            )
+        )
 
         # Permissions
-        orchestrator.add_to_role_policy(
+        worker.add_to_role_policy(
             iam.PolicyStatement(
                 actions=["bedrock-agentcore:InvokeAgentRuntime"],
                 resources=[
@@ -140,24 +254,26 @@ class WhatsAppStack(Stack):
             )
         )
 
-        orchestrator.add_to_role_policy(
+        worker.add_to_role_policy(
             iam.PolicyStatement(
                 actions=["social-messaging:SendWhatsAppMessage"],
                 resources=["*"],
             )
         )
 
-        orchestrator.add_to_role_policy(
-            iam.PolicyStatement(
-                actions=[
-                    "xray:PutTraceSegments",
-                    "xray:PutTelemetryRecords",
-                ],
-                resources=["*"],
+        for function in (orchestrator, worker):
+            function.add_to_role_policy(
+                iam.PolicyStatement(
+                    actions=[
+                        "xray:PutTraceSegments",
+                        "xray:PutTelemetryRecords",
+                    ],
+                    resources=["*"],
+                )
             )
-        )
 
-        whatsapp_secret.grant_read(orchestrator)
+        whatsapp_secret.grant_read(worker)
+        idempotency_table.grant_read_write_data(worker)
 
         # Custom Resource to configure WhatsApp event destination
         if whatsapp_business_account_id:
@@ -217,6 +333,10 @@ def handler(event, context):
         # Outputs
         CfnOutput(self, "SNSTopicArn", value=whatsapp_topic.topic_arn)
         CfnOutput(self, "OrchestratorName", value=orchestrator.function_name)
+        CfnOutput(self, "WorkerName", value=worker.function_name)
+        CfnOutput(self, "MessageQueueUrl", value=message_queue.queue_url)
+        CfnOutput(self, "DeadLetterQueueName", value=dead_letter_queue.queue_name)
+        CfnOutput(self, "IdempotencyTableName", value=idempotency_table.table_name)
         CfnOutput(
             self,
             "OrchestratorAliasArn",
@@ -4,84 +4,202 @@ Real-world A2A Orchestrator Demo
 Scenario: Travel Planning Assistant
 A travel orchestrator agent helps a user plan a trip to Mauritius,
 coordinating with our restaurant booking agent for dinner reservations.
+
+The trip plan is a dependency graph: availability, menu and hours are
+independent and run at the same time over one persistent A2A client; the
+booking waits for availability and hours. A timing waterfall shows when
+each step ran.
+
+Usage:
+  python examples/a2a_orchestrator_demo.py               # Parallel plan
+  python examples/a2a_orchestrator_demo.py --sequential  # One step at a time, to compare
+  python examples/a2a_orchestrator_demo.py --book        # Also book the table
 """
+
 import asyncio
 import logging
+import os
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from typing import NamedTuple
 from uuid import uuid4
+
 import httpx
-from a2a.client import A2ACardResolver, ClientConfig, ClientFactory
+from a2a.client import A2ACardResolver, Client, ClientConfig, ClientFactory
 from a2a.types import Message, Part, Role, TextPart
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Configuration
-RESTAURANT_AGENT_URL = "https://restaurant-booking-agent.teamwork-mu.net"
+RESTAURANT_AGENT_URL = os.getenv("A2A_TEST_URL", "https://restaurant-booking-agent.teamwork-mu.net")
 TIMEOUT = 60
+WATERFALL_WIDTH = 40
+
+
+class PlanStep(NamedTuple):
+    """One sub-request of the plan.
+
+    `query` is the message to send, or builds it from the results of the
+    steps it depends on (returning None skips the step).
+    """
+
+    name: str
+    query: str | Callable[[dict[str, str]], str | None]
+    depends_on: tuple[str, ...] = ()
+
+
+class StepTiming(NamedTuple):
+    """When a step ran, in seconds from the start of the plan."""
+
+    name: str
+    started: float
+    finished: float
+
+
+async def run_plan(
+    steps: list[PlanStep],
+    ask: Callable[[str], Awaitable[str]],
+    max_parallel: int | None = None,
+) -> tuple[dict[str, str], list[StepTiming]]:
+    """Run each step as soon as the steps it depends on have finished.
+
+    Args:
+        steps: Plan steps; dependencies must name earlier steps
+        ask: Sends a query to the agent and returns the reply
+        max_parallel: Most steps in flight at once (1 runs the plan sequentially)
+
+    Returns:
+        Reply per step (skipped steps are left out) and the step timings
+    """
+    results: dict[str, str] = {}
+    timings: list[StepTiming] = []
+    tasks: dict[str, asyncio.Task] = {}
+    limit = asyncio.Semaphore(max_parallel or len(steps) or 1)
+    plan_started = time.perf_counter()
+
+    async def run(step: PlanStep) -> None:
+        await asyncio.gather(*(tasks[name] for name in step.depends_on))
+        query = step.query(results) if callable(step.query) else step.query
+        if query is None:
+            logger.info(f"⏭️  {step.name}: skipped")
+            return
+        async with limit:
+            started = time.perf_counter() - plan_started
+            logger.info(f"📤 Orchestrator → Restaurant Agent [{step.name}]: '{query}'")
+            results[step.name] = await ask(query)
+            timings.append(StepTiming(step.name, started, time.perf_counter() - plan_started))
+            logger.info(f"📥 Restaurant Agent → Orchestrator [{step.name}]")
+
+    for step in steps:
+        missing = [name for name in step.depends_on if name not in tasks]
+        if missing:
+            raise ValueError(f"Step {step.name} depends on unknown or later steps: {missing}")
+        tasks[step.name] = asyncio.create_task(run(step))
+    await asyncio.gather(*tasks.values())
+    return results, timings
+
+
+def waterfall(timings: list[StepTiming], width: int = WATERFALL_WIDTH) -> str:
+    """Draw when each step ran, on a shared time axis."""
+    if not timings:
+        return "(no steps ran)"
+    total = max(timing.finished for timing in timings) or 1e-9
+    label = max(len(timing.name) for timing in timings)
+    lines = [f"{'step':<{label}}  0s{'':{width - 2}}{total:.2f}s"]
+    for timing in sorted(timings, key=lambda t: t.started):
+        start = round(timing.started / total * width)
+        end = max(start + 1, round(timing.finished / total * width))
+        bar = " " * start + "█" * (end - start)
+        duration = timing.finished - timing.started
+        lines.append(f"{timing.name:<{label}}  |{bar:<{width}}| {duration:.2f}s")
+    return "\n".join(lines)
+
+
+def reply_text(event: object) -> str:
+    """Text of a direct message, or of the artifacts of a finished task."""
+    if isinstance(event, Message):
+        parts = event.parts
+    else:
+        task, _ = event
+        parts = [part for artifact in task.artifacts or [] for part in artifact.parts]
+    return "".join(part.root.text for part in parts if isinstance(part.root, TextPart))
 
 
 class TravelOrchestrator:
     """Orchestrator agent that coordinates multiple specialized agents."""
-    
+
     def __init__(self):
-        self.restaurant_client = None
+        self.httpx_client: httpx.AsyncClient | None = None
+        self.restaurant_client: Client | None = None
         self.conversation_history = []
-    
+
     async def initialize(self):
-        """Discover and connect to restaurant agent."""
+        """Discover the restaurant agent once and keep one client for every request."""
         logger.info("🔍 Discovering restaurant booking agent...")
-        
-        async with httpx.AsyncClient(timeout=TIMEOUT) as httpx_client:
-            # Discover agent capabilities
-            resolver = A2ACardResolver(
-                httpx_client=httpx_client,
-                base_url=RESTAURANT_AGENT_URL
-            )
-            agent_card = await resolver.get_agent_card()
-            
-            logger.info(f"✅ Found: {agent_card.name}")
-            logger.info(f"   Skills: {', '.join([s.id for s in agent_card.skills])}")
-            
-            # Create client
-            config = ClientConfig(httpx_client=httpx_client, streaming=False)
-            factory = ClientFactory(config)
-            self.restaurant_client = factory.create(agent_card)
-    
+
+        # Kept-alive HTTP/2 connections, shared by the concurrent plan steps
+        self.httpx_client = httpx.AsyncClient(http2=True, timeout=TIMEOUT)
+        resolver = A2ACardResolver(httpx_client=self.httpx_client, base_url=RESTAURANT_AGENT_URL)
+        agent_card = await resolver.get_agent_card()
+
+        logger.info(f"✅ Found: {agent_card.name}")
+        logger.info(f"   Skills: {', '.join([s.id for s in agent_card.skills])}")
+
+        config = ClientConfig(httpx_client=self.httpx_client, streaming=False)
+        self.restaurant_client = ClientFactory(config).create(agent_card)
+
+    async def close(self):
+        """Close the pooled connections."""
+        if self.httpx_client is not None:
+            await self.httpx_client.aclose()
+            self.httpx_client = None
+            self.restaurant_client = None
+
     async def ask_restaurant_agent(self, question: str) -> str:
         """Send message to restaurant agent."""
+        if self.restaurant_client is None:
+            await self.initialize()
+
         msg = Message(
             kind="message",
             role=Role.user,
             parts=[Part(TextPart(kind="text", text=question))],
             message_id=uuid4().hex,
         )
-        
-        async with httpx.AsyncClient(timeout=TIMEOUT) as httpx_client:
-            resolver = A2ACardResolver(
-                httpx_client=httpx_client,
-                base_url=RESTAURANT_AGENT_URL
-            )
-            agent_card = await resolver.get_agent_card()
-            config = ClientConfig(httpx_client=httpx_client, streaming=False)
-            factory = ClientFactory(config)
-            client = factory.create(agent_card)
-            
-            async for event in client.send_message(msg):
-                if isinstance(event, Message):
-                    response_text = ""
-                    for part in event.parts:
-                        if hasattr(part, 'text'):
-                            response_text += part.text
-                    return response_text
-        
+        async for event in self.restaurant_client.send_message(msg):
+            response_text = reply_text(event)
+            self.conversation_history.append((question, response_text))
+            return response_text
+
         return "No response received"
-    
-    async def plan_mauritius_trip(self):
+
+    @staticmethod
+    def trip_plan(book: bool) -> list[PlanStep]:
+        """Availability, menu and hours run side by side; booking needs availability and hours."""
+
+        def booking(results: dict[str, str]) -> str | None:
+            if not book or "not available" in results["availability"].lower():
+                return None
+            return "Please book a table for 2 people next Friday at 7:30 PM for a romantic dinner."
+
+        return [
+            PlanStep(
+                "availability",
+                "Is there a table available for 2 people next Friday at 7:30 PM?",
+            ),
+            PlanStep("menu", "What's on your menu? Any vegetarian options?"),
+            PlanStep("hours", "What are your opening hours on Friday?"),
+            PlanStep("booking", booking, depends_on=("availability", "hours")),
+        ]
+
+    async def plan_mauritius_trip(self, sequential: bool = False, book: bool = False):
         """Execute travel planning scenario."""
-        logger.info("\n" + "="*60)
+        logger.info("\n" + "=" * 60)
         logger.info("🌴 SCENARIO: Planning a Trip to Mauritius")
-        logger.info("="*60)
-        
+        logger.info("=" * 60)
+
         # Step 1: User request
         user_request = """
         I'm planning a romantic trip to Mauritius next Friday.
@@ -89,47 +207,21 @@ class TravelOrchestrator:
         We're 2 people and prefer 7:30 PM.
         """
         logger.info(f"\n👤 User: {user_request.strip()}")
-        
+
         # Step 2: Orchestrator discovers restaurant agent
         await self.initialize()
-        
-        # Step 3: Check restaurant availability
-        logger.info("\n🤖 Orchestrator: Let me check restaurant availability...")
-        availability_query = "Is there a table available for 2 people next Friday at 7:30 PM?"
-        
-        logger.info(f"\n📤 Orchestrator → Restaurant Agent:")
-        logger.info(f"   '{availability_query}'")
-        
-        availability_response = await self.ask_restaurant_agent(availability_query)
-        logger.info(f"\n📥 Restaurant Agent → Orchestrator:")
-        logger.info(f"   {availability_response}")
-        
-        # Step 4: Get menu information
-        logger.info("\n🤖 Orchestrator: Let me get the menu details...")
-        menu_query = "What's on your menu? Any vegetarian options?"
-        
-        logger.info(f"\n📤 Orchestrator → Restaurant Agent:")
-        logger.info(f"   '{menu_query}'")
-        
-        menu_response = await self.ask_restaurant_agent(menu_query)
-        logger.info(f"\n📥 Restaurant Agent → Orchestrator:")
-        logger.info(f"   {menu_response}")
-        
-        # Step 5: Check opening hours
-        logger.info("\n🤖 Orchestrator: Confirming restaurant hours...")
-        hours_query = "What are your opening hours on Friday?"
-        
-        logger.info(f"\n📤 Orchestrator → Restaurant Agent:")
-        logger.info(f"   '{hours_query}'")
-        
-        hours_response = await self.ask_restaurant_agent(hours_query)
-        logger.info(f"\n📥 Restaurant Agent → Orchestrator:")
-        logger.info(f"   {hours_response}")
-        
-        # Step 6: Orchestrator summarizes for user
-        logger.info("\n" + "="*60)
+
+        # Step 3: Run the plan, independent requests at the same time
+        mode = "one step at a time" if sequential else "independent steps in parallel"
+        logger.info(f"\n🤖 Orchestrator: Running the trip plan ({mode})...")
+        results, timings = await run_plan(
+            self.trip_plan(book), self.ask_restaurant_agent, max_parallel=1 if sequential else None
+        )
+
+        # Step 4: Orchestrator summarizes for user
+        logger.info("\n" + "=" * 60)
         logger.info("📋 ORCHESTRATOR SUMMARY FOR USER")
-        logger.info("="*60)
+        logger.info("=" * 60)
         summary = f"""
 ✅ Restaurant Found: La Bella Vita (Italian)
 📍 Location: Mauritius
@@ -137,25 +229,39 @@ class TravelOrchestrator:
 📅 Date: Next Friday
 🕖 Time: 7:30 PM
 
-Availability: {availability_response[:100]}...
-
-Menu Highlights: {menu_response[:100]}...
+Availability: {results["availability"][:100]}...
 
-Opening Hours: {hours_response[:100]}...
+Menu Highlights: {results["menu"][:100]}...
 
-Would you like me to proceed with the booking?
-        """
+Opening Hours: {results["hours"][:100]}...
+"""
+        if "booking" in results:
+            summary += f"\nBooking: {results['booking'][:100]}...\n"
+        else:
+            summary += "\nWould you like me to proceed with the booking?\n"
         logger.info(summary)
-        
-        logger.info("\n" + "="*60)
+
+        logger.info("⏱️  Timing waterfall")
+        logger.info("\n" + waterfall(timings))
+        busy = sum(timing.finished - timing.started for timing in timings)
+        elapsed = max((timing.finished for timing in timings), default=0)
+        logger.info(f"\nAgent time {busy:.2f}s, wall time {elapsed:.2f}s")
+
+        logger.info("\n" + "=" * 60)
         logger.info("✨ Demo Complete!")
-        logger.info("="*60)
+        logger.info("=" * 60)
+        return timings
 
 
 async def main():
     """Run the orchestrator demo."""
     orchestrator = TravelOrchestrator()
-    await orchestrator.plan_mauritius_trip()
+    try:
+        await orchestrator.plan_mauritius_trip(
+            sequential="--sequential" in sys.argv, book="--book" in sys.argv
+        )
+    finally:
+        await orchestrator.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,162 @@
+# Copyright (C) 2025 Teamwork Mauritius
+#
+# This file is part of AWS AI Agent Global Hackathon 2025 submission.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""Candidate windows for calendar availability checks.
+
+Windows come from an explicit list or are expanded from a date range. A
+sweep over merged busy intervals then marks each window free or busy, so a
+week-long search costs one pass over the day's bookings.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Restaurant time zone (Indian/Mauritius, UTC+4, no DST)
+DEFAULT_TZ = timezone(timedelta(hours=4))
+
+DEFAULT_DURATION_MINUTES = 120
+DEFAULT_STEP_MINUTES = 30
+MAX_WINDOWS = 1000
+
+Interval = tuple[datetime, datetime]
+
+
+def parse_datetime(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp, assuming restaurant time when no offset is given."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=DEFAULT_TZ)
+    return parsed
+
+
+def parse_clock(value: str) -> time:
+    """Parse an HH:MM wall-clock time."""
+    return time.fromisoformat(value)
+
+
+def merge_intervals(intervals: list[Interval]) -> list[Interval]:
+    """Sort and merge overlapping or touching intervals."""
+    merged: list[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def sweep_availability(windows: list[Interval], busy: list[Interval]) -> list[list[Interval]]:
+    """Return the busy intervals overlapping each window, in window order.
+
+    Windows are visited by start time while a single pointer walks the merged
+    busy list. A busy interval that ends before the current window starts also
+    ends before every later window, so the pointer never moves backwards.
+
+    Args:
+        windows: Candidate (start, end) windows, in any order
+        busy: Busy (start, end) intervals, in any order
+
+    Returns:
+        One list of conflicting busy intervals per window (empty when free)
+    """
+    merged = merge_intervals(busy)
+    conflicts: list[list[Interval]] = [[] for _ in windows]
+    cursor = 0
+
+    for index in sorted(range(len(windows)), key=lambda i: windows[i][0]):
+        start, end = windows[index]
+        while cursor < len(merged) and merged[cursor][1] <= start:
+            cursor += 1
+
+        scan = cursor
+        while scan < len(merged) and merged[scan][0] < end:
+            conflicts[index].append(merged[scan])
+            scan += 1
+
+    return conflicts
+
+
+def expand_date_range(
+    time_min: datetime,
+    time_max: datetime,
+    *,
+    duration: timedelta,
+    step: timedelta,
+    daily_start: time | None = None,
+    daily_end: time | None = None,
+) -> list[Interval]:
+    """Generate candidate windows of `duration` every `step` inside a date range.
+
+    When `daily_start`/`daily_end` are given, each day only contributes windows
+    that start and end within that wall-clock range (e.g. "any evening").
+    """
+    if duration <= timedelta(0) or step <= timedelta(0):
+        raise ValueError("Duration and step must be positive")
+
+    tz = time_min.tzinfo
+    windows: list[Interval] = []
+    day: date = time_min.date()
+
+    while day <= time_max.date():
+        day_open = time_min
+        day_close = time_max
+        if daily_start is not None:
+            day_open = max(day_open, datetime.combine(day, daily_start, tzinfo=tz))
+        if daily_end is not None:
+            day_close = min(day_close, datetime.combine(day, daily_end, tzinfo=tz))
+        day_open = max(day_open, datetime.combine(day, time.min, tzinfo=tz))
+        day_close = min(day_close, datetime.combine(day + timedelta(days=1), time.min, tzinfo=tz))
+
+        start = day_open
+        while start + duration <= day_close:
+            windows.append((start, start + duration))
+            if len(windows) > MAX_WINDOWS:
+                raise ValueError(f"Date range expands to more than {MAX_WINDOWS} windows")
+            start += step
+        day += timedelta(days=1)
+
+    return windows
+
+
+def parse_windows(params: dict[str, Any]) -> list[Interval]:
+    """Build candidate windows from an explicit list or a date range."""
+    if params.get("windows"):
+        windows = [
+            (parse_datetime(window["start"]), parse_datetime(window["end"]))
+            for window in params["windows"]
+        ]
+        if len(windows) > MAX_WINDOWS:
+            raise ValueError(f"At most {MAX_WINDOWS} windows per request")
+    elif params.get("timeMin") and params.get("timeMax"):
+        windows = expand_date_range(
+            parse_datetime(params["timeMin"]),
+            parse_datetime(params["timeMax"]),
+            duration=timedelta(minutes=int(params.get("duration", DEFAULT_DURATION_MINUTES))),
+            step=timedelta(minutes=int(params.get("step", DEFAULT_STEP_MINUTES))),
+            daily_start=parse_clock(params["dailyStart"]) if params.get("dailyStart") else None,
+            daily_end=parse_clock(params["dailyEnd"]) if params.get("dailyEnd") else None,
+        )
+    else:
+        raise ValueError("Provide either 'windows' or 'timeMin' and 'timeMax'")
+
+    for start, end in windows:
+        if end <= start:
+            raise ValueError(f"Window end must be after start: {start.isoformat()}")
+    return windows
@@ -0,0 +1,438 @@
+# Copyright (C) 2025 Teamwork Mauritius
+#
+# This file is part of AWS AI Agent Global Hackathon 2025 submission.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""Table-inventory capacity engine for the calendar service.
+
+Every booking event carries a party size. A best-fit pass seats the
+bookings in start order, each at the smallest free table with enough seats.
+Each table's occupied intervals are then swept against all candidate
+windows at once, giving the number of parties of a given size that can
+still be seated in every slot of the day.
+"""
+
+import json
+import logging
+import os
+import re
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from availability import (
+    DEFAULT_TZ,
+    Interval,
+    expand_date_range,
+    parse_clock,
+    parse_datetime,
+    parse_windows,
+    sweep_availability,
+)
+
+logger = logging.getLogger(__name__)
+
+TABLES_PATH = Path(os.getenv("TABLES_PATH", str(Path(__file__).parent / "tables.json")))
+# hours.json is bundled next to this module in Lambda, and lives in data/ in the repo
+HOURS_PATHS = [
+    Path(__file__).parent / "hours.json",
+    Path(__file__).parent.parent.parent / "data" / "restaurant" / "hours.json",
+]
+DEFAULT_OPEN, DEFAULT_CLOSE = "11:00", "22:00"
+DEFAULT_PARTY_SIZE = 2
+DEFAULT_SLOT_HOURS = 2
+DEFAULT_MAX_SLOTS = 5
+SLOT_STEP_MINUTES = 30
+PAGE_SIZE = 250
+
+PARTY_PATTERN = re.compile(r"(\d+)\s*(?:guests?|people|persons|pax)\b", re.IGNORECASE)
+
+
+class Booking(NamedTuple):
+    """A party occupying a table from start to end."""
+
+    start: datetime
+    end: datetime
+    party_size: int
+
+
+def load_tables(path: Path = TABLES_PATH) -> list[dict[str, Any]]:
+    """Read the table inventory, smallest tables first."""
+    tables = json.loads(path.read_text())["tables"]
+    return sorted(tables, key=lambda table: (table["seats"], table["id"]))
+
+
+_tables: list[dict[str, Any]] | None = None
+
+
+def get_tables() -> list[dict[str, Any]]:
+    """Return the table inventory loaded once per container."""
+    global _tables  # noqa: PLW0603
+    if _tables is None:
+        _tables = load_tables()
+    return _tables
+
+
+def load_opening_hours() -> dict[str, tuple[str, str] | None]:
+    """Read opening hours per weekday; None marks a closed day."""
+    for path in HOURS_PATHS:
+        if path.exists():
+            hours = json.loads(path.read_text())["opening_hours"]
+            return {
+                day: None if info.get("closed") else (info["open"], info["close"])
+                for day, info in hours.items()
+            }
+    return {}
+
+
+def party_size(event: dict[str, Any]) -> int:
+    """Read the party size from reserveSlot's property or "(N guests)" in the text."""
+    private = event.get("extendedProperties", {}).get("private", {})
+    if str(private.get("partySize", "")).isdigit():
+        return int(private["partySize"])
+
+    for text in (event.get("summary"), event.get("description")):
+        match = PARTY_PATTERN.search(text or "")
+        if match:
+            return int(match.group(1))
+    return DEFAULT_PARTY_SIZE
+
+
+def event_booking(event: dict[str, Any]) -> Booking | None:
+    """Convert a calendar event to a booking; None for events that hold no table."""
+    if event.get("status") == "cancelled" or event.get("transparency") == "transparent":
+        return None
+    start, end = event.get("start", {}), event.get("end", {})
+    if "dateTime" not in start or "dateTime" not in end:
+        # All-day events are notes, not tables
+        return None
+    return Booking(
+        parse_datetime(start["dateTime"]), parse_datetime(end["dateTime"]), party_size(event)
+    )
+
+
+def day_bounds(moment: datetime) -> Interval:
+    """Return restaurant-time midnight to midnight around a moment."""
+    day = moment.astimezone(DEFAULT_TZ).date()
+    start = datetime.combine(day, time.min, tzinfo=DEFAULT_TZ)
+    return start, start + timedelta(days=1)
+
+
+def fetch_events(service: Any, calendar_id: str, time_min: datetime, time_max: datetime) -> list:
+    """List every event overlapping a range, following pages."""
+    events: list[dict] = []
+    page_token = None
+    while True:
+        params: dict[str, Any] = {
+            "calendarId": calendar_id,
+            "timeMin": time_min.isoformat(),
+            "timeMax": time_max.isoformat(),
+            "singleEvents": True,
+            "maxResults": PAGE_SIZE,
+        }
+        if page_token:
+            params["pageToken"] = page_token
+        response = service.events().list(**params).execute()
+        events.extend(response.get("items", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return events
+
+
+def fetch_bookings(
+    service: Any, calendar_id: str, time_min: datetime, time_max: datetime
+) -> list[Booking]:
+    """List the bookings holding tables in a range (widened to whole days)."""
+    # Bookings outside the window still decide which tables are left for it
+    start, _ = day_bounds(time_min)
+    _, end = day_bounds(time_max - timedelta(microseconds=1))
+    return [
+        booking
+        for booking in map(event_booking, fetch_events(service, calendar_id, start, end))
+        if booking is not None
+    ]
+
+
+def seat(
+    tables: list[dict[str, Any]], bookings: list[Booking]
+) -> tuple[dict[str, list[Booking]], list[Booking]]:
+    """Seat bookings in start order, each at the smallest free table that fits.
+
+    Starts are visited in order, so a table is free exactly when its last
+    party has left; one `free_at` time per table is all the state needed.
+
+    Returns:
+        The bookings seated at each table id (in start order), and the
+        bookings that found no table
+    """
+    seated: dict[str, list[Booking]] = {table["id"]: [] for table in tables}
+    free_at: dict[str, datetime | None] = dict.fromkeys(seated)
+    unplaced: list[Booking] = []
+
+    for booking in sorted(bookings):
+        for table in tables:
+            table_free = free_at[table["id"]]
+            if table["seats"] >= booking.party_size and (
+                table_free is None or table_free <= booking.start
+            ):
+                seated[table["id"]].append(booking)
+                free_at[table["id"]] = booking.end
+                break
+        else:
+            unplaced.append(booking)
+
+    return seated, unplaced
+
+
+def allocate(
+    tables: list[dict[str, Any]], bookings: list[Booking]
+) -> tuple[dict[str, list[Interval]], list[Booking]]:
+    """Seat the bookings (see `seat`).
+
+    Returns:
+        Occupied intervals per table id, and the bookings that found no table
+    """
+    seated, unplaced = seat(tables, bookings)
+    return occupied_intervals(seated), unplaced
+
+
+def occupied_intervals(seated: dict[str, list[Booking]]) -> dict[str, list[Interval]]:
+    """The (start, end) intervals each table is occupied."""
+    return {
+        table_id: [(booking.start, booking.end) for booking in placed]
+        for table_id, placed in seated.items()
+    }
+
+
+def fits(tables: list[dict[str, Any]], bookings: list[Booking], candidate: Booking) -> bool:
+    """Check whether a new booking can be seated without unseating anyone."""
+    before = len(allocate(tables, bookings)[1])
+    return len(allocate(tables, [*bookings, candidate])[1]) <= before
+
+
+def free_tables(
+    tables: list[dict[str, Any]],
+    occupied: dict[str, list[Interval]],
+    windows: list[Interval],
+    size: int,
+) -> list[int]:
+    """Count the tables with enough seats and no occupied interval in each window."""
+    counts = [0] * len(windows)
+    for table in tables:
+        if table["seats"] < size:
+            continue
+        for index, conflicts in enumerate(sweep_availability(windows, occupied[table["id"]])):
+            if not conflicts:
+                counts[index] += 1
+    return counts
+
+
+def slot_capacity(
+    tables: list[dict[str, Any]],
+    bookings: list[Booking],
+    windows: list[Interval],
+    size: int,
+) -> list[int]:
+    """Count the tables free for a party of `size` during each window.
+
+    One allocation pass seats the day's bookings, then each table's occupied
+    intervals are swept against every window together.
+    """
+    occupied, unplaced = allocate(tables, bookings)
+    if unplaced:
+        logger.warning(f"{len(unplaced)} bookings exceed table inventory")
+    return free_tables(tables, occupied, windows, size)
+
+
+def seats_undisturbed(
+    tables: list[dict[str, Any]], seated: dict[str, list[Booking]], candidate: Booking
+) -> bool:
+    """Check, from the current seating, that `seat` would add the candidate without moving anyone.
+
+    Re-seating with the candidate places every earlier booking as before, so
+    the candidate gets the first table with enough seats whose earlier party
+    has left by its start. If that table's next party arrives after the
+    candidate has gone, every later booking keeps its table too, so `fits`
+    holds.
+    """
+    for table in tables:
+        if table["seats"] < candidate.party_size:
+            continue
+        placed = seated[table["id"]]
+        before = bisect_right(placed, candidate)
+        if before and placed[before - 1].end > candidate.start:
+            continue
+        return before == len(placed) or placed[before].start >= candidate.end
+    return False
+
+
+def window_capacity(
+    tables: list[dict[str, Any]],
+    bookings: list[Booking],
+    windows: list[Interval],
+    size: int,
+) -> list[int]:
+    """Free tables per window, 0 for every window `fits` (and so reserveSlot) might refuse.
+
+    One allocation pass seats the bookings of the whole range. The count is
+    the tables free in that seating; a window is only offered when the
+    party would be seated there without moving anyone, so a window reported
+    free can always be reserved. Windows that only fit by re-seating other
+    parties are reported as 0.
+    """
+    seated, unplaced = seat(tables, bookings)
+    if unplaced:
+        logger.warning(f"{len(unplaced)} bookings exceed table inventory")
+    counts = free_tables(tables, occupied_intervals(seated), windows, size)
+    return [
+        count if seats_undisturbed(tables, seated, Booking(start, end, size)) else 0
+        for (start, end), count in zip(windows, counts, strict=True)
+    ]
+
+
+def parse_party_size(params: dict[str, Any]) -> int:
+    """Read and validate the requested party size."""
+    size = int(params.get("partySize") or DEFAULT_PARTY_SIZE)
+    if size <= 0:
+        raise ValueError("Party size must be positive")
+    return size
+
+
+def check_availability(service: Any, calendar_id: str, params: dict[str, Any]) -> dict:
+    """Handle the checkAvailability action against the table inventory.
+
+    Args:
+        service: Google Calendar API service
+        calendar_id: Calendar to check
+        params: `start`, `end` and optional `partySize` (default 2)
+
+    Returns:
+        Response body with `available` and the remaining `capacity` (tables
+        free for a party of that size)
+    """
+    try:
+        start = parse_datetime(params["start"])
+        end = parse_datetime(params["end"])
+        size = parse_party_size(params)
+    except (KeyError, TypeError, ValueError) as e:
+        return {"success": False, "error": f"Invalid availability request: {e}"}
+    if end <= start:
+        return {"success": False, "error": "End must be after start"}
+
+    tables = get_tables()
+    bookings = fetch_bookings(service, calendar_id, start, end)
+    free = window_capacity(tables, bookings, [(start, end)], size)[0]
+    return {"success": True, "available": free > 0, "capacity": free, "partySize": size}
+
+
+def check_availability_batch(service: Any, calendar_id: str, params: dict[str, Any]) -> dict:
+    """Handle the checkAvailabilityBatch action.
+
+    Args:
+        service: Google Calendar API service
+        calendar_id: Calendar to check
+        params: Either `windows` ([{start, end}, ...]) or a date range with
+            `timeMin`, `timeMax` and optional `duration`/`step` (minutes) and
+            `dailyStart`/`dailyEnd` (HH:MM), plus optional `partySize`
+
+    Returns:
+        Response body with per-window availability and capacity
+    """
+    try:
+        windows = parse_windows(params)
+        size = parse_party_size(params)
+    except (KeyError, TypeError, ValueError) as e:
+        return {"success": False, "error": f"Invalid availability request: {e}"}
+
+    if not windows:
+        return {"success": True, "windows": [], "availableCount": 0}
+
+    time_min = min(start for start, _ in windows)
+    time_max = max(end for _, end in windows)
+    # One events query covers the whole range
+    bookings = fetch_bookings(service, calendar_id, time_min, time_max)
+    capacity = window_capacity(get_tables(), bookings, windows, size)
+
+    results = [
+        {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "available": free > 0,
+            "capacity": free,
+        }
+        for (start, end), free in zip(windows, capacity, strict=True)
+    ]
+    available_count = sum(1 for result in results if result["available"])
+    logger.info(f"Batch availability: {available_count}/{len(results)} windows free")
+
+    return {
+        "success": True,
+        "windows": results,
+        "availableCount": available_count,
+        "partySize": size,
+    }
+
+
+def get_available_slots(service: Any, calendar_id: str, params: dict[str, Any]) -> dict:
+    """Handle the getAvailableSlots action within opening hours.
+
+    Args:
+        service: Google Calendar API service
+        calendar_id: Calendar to check
+        params: `date` (YYYY-MM-DD) and optional `duration` (hours, default 2),
+            `maxResults` (default 5) and `partySize` (default 2)
+
+    Returns:
+        Response body with the first free slots and their capacity
+    """
+    try:
+        day = date.fromisoformat(params["date"])
+        duration = timedelta(hours=float(params.get("duration") or DEFAULT_SLOT_HOURS))
+        max_results = int(params.get("maxResults") or DEFAULT_MAX_SLOTS)
+        size = parse_party_size(params)
+    except (KeyError, TypeError, ValueError) as e:
+        return {"success": False, "error": f"Invalid slots request: {e}"}
+
+    hours = load_opening_hours().get(day.strftime("%A").lower(), (DEFAULT_OPEN, DEFAULT_CLOSE))
+    if hours is None:
+        return {"success": True, "availableSlots": [], "message": "Restaurant closed"}
+
+    try:
+        windows = expand_date_range(
+            datetime.combine(day, parse_clock(hours[0]), tzinfo=DEFAULT_TZ),
+            datetime.combine(day, parse_clock(hours[1]), tzinfo=DEFAULT_TZ),
+            duration=duration,
+            step=timedelta(minutes=SLOT_STEP_MINUTES),
+        )
+    except ValueError as e:
+        return {"success": False, "error": f"Invalid slots request: {e}"}
+    if not windows:
+        return {"success": True, "availableSlots": []}
+
+    bookings = fetch_bookings(service, calendar_id, windows[0][0], windows[-1][1])
+    capacity = window_capacity(get_tables(), bookings, windows, size)
+    slots = [
+        {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "startTime": start.strftime("%H:%M"),
+            "endTime": end.strftime("%H:%M"),
+            "capacity": free,
+        }
+        for (start, end), free in zip(windows, capacity, strict=True)
+        if free > 0
+    ]
+    return {"success": True, "availableSlots": slots[:max_results], "partySize": size}
@@ -0,0 +1,291 @@
+# Copyright (C) 2025 Teamwork Mauritius
+#
+# This file is part of AWS AI Agent Global Hackathon 2025 submission.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""Local stand-in for the calendar service.
+
+`LocalCalendarBackend` implements the parts of the Google Calendar v3 client
+that the calendar operations call (events list/get/insert/delete and
+freebusy) over SQLite, with configurable latency and error injection.
+`LocalCalendarService` exposes every operation in
+`config/google_calendar_openapi.json` on top of it, so the booking path can
+run offline and be load-tested without Google or the Gateway.
+"""
+
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import UTC, datetime
+from typing import Any
+
+from availability import parse_datetime
+from operations import run_operation
+from sync import BookingStore, query_events, sync_calendar
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    calendar_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    status TEXT NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (calendar_id, event_id)
+);
+CREATE INDEX IF NOT EXISTS events_by_time ON events (calendar_id, start, end);
+CREATE INDEX IF NOT EXISTS events_by_seq ON events (calendar_id, seq);
+"""
+
+
+class LocalCalendarError(Exception):
+    """Injected failure, shaped like googleapiclient's HttpError."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _Request:
+    """Deferred call mirroring googleapiclient's `request.execute()`."""
+
+    def __init__(self, backend: "LocalCalendarBackend", call: Any):
+        self.backend = backend
+        self.call = call
+
+    def execute(self) -> Any:
+        self.backend.inject_faults()
+        return self.call()
+
+
+class _Resource:
+    """Collection of deferred calls, like `service.events()`."""
+
+    def __init__(self, backend: "LocalCalendarBackend", methods: dict[str, Any]):
+        for name, method in methods.items():
+            setattr(self, name, lambda *a, _m=method, **kw: _Request(backend, lambda: _m(*a, **kw)))
+
+
+class LocalCalendarBackend:
+    """SQLite implementation of the Google Calendar client surface.
+
+    Args:
+        path: SQLite database path (default in-memory)
+        latency_ms: Delay added to every request
+        error_rate: Probability (0-1) that a request fails with HTTP 503
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        latency_ms: float | None = None,
+        error_rate: float | None = None,
+    ):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.latency_ms = (
+            float(os.getenv("LOCAL_CALENDAR_LATENCY_MS", "0")) if latency_ms is None else latency_ms
+        )
+        self.error_rate = (
+            float(os.getenv("LOCAL_CALENDAR_ERROR_RATE", "0")) if error_rate is None else error_rate
+        )
+
+    def inject_faults(self) -> None:
+        """Apply configured latency and random failures to a request."""
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        if self.error_rate and random.random() < self.error_rate:  # noqa: S311
+            raise LocalCalendarError(503, "Injected calendar backend error")
+
+    def events(self) -> _Resource:
+        return _Resource(
+            self,
+            {
+                "list": self._list_events,
+                "get": self._get_event,
+                "insert": self._insert_event,
+                "delete": self._delete_event,
+            },
+        )
+
+    def freebusy(self) -> _Resource:
+        return _Resource(self, {"query": self._freebusy})
+
+    def _next_seq(self) -> int:
+        self.seq += 1
+        return self.seq
+
+    def _insert_event(self, calendarId: str, body: dict) -> dict:  # noqa: N803
+        start = parse_datetime(body["start"]["dateTime"])
+        end = parse_datetime(body["end"]["dateTime"])
+        with self.lock, self.connection:
+            seq = self._next_seq()
+            # Ids increase with insertion order, so reserveSlot's (created, id) tie-break holds
+            event = {
+                **body,
+                "id": f"local{seq:08d}",
+                "status": "confirmed",
+                "created": datetime.now(UTC).isoformat(),
+                "htmlLink": f"http://localhost/calendar/event?eid=local{seq:08d}",
+            }
+            self.connection.execute(
+                "INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    calendarId,
+                    event["id"],
+                    seq,
+                    start.astimezone(UTC).isoformat(),
+                    end.astimezone(UTC).isoformat(),
+                    "confirmed",
+                    json.dumps(event),
+                ),
+            )
+        return event
+
+    def _get_event(self, calendarId: str, eventId: str) -> dict:  # noqa: N803
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT body FROM events WHERE calendar_id = ? AND event_id = ?",
+                (calendarId, eventId),
+            ).fetchone()
+        if row is None:
+            raise LocalCalendarError(404, f"Event not found: {eventId}")
+        return json.loads(row[0])
+
+    def _delete_event(self, calendarId: str, eventId: str) -> str:  # noqa: N803
+        event = self._get_event(calendarId, eventId)
+        if event["status"] == "cancelled":
+            raise LocalCalendarError(410, f"Event already deleted: {eventId}")
+        event["status"] = "cancelled"
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE events SET status = ?, seq = ?, body = ? "
+                "WHERE calendar_id = ? AND event_id = ?",
+                ("cancelled", self._next_seq(), json.dumps(event), calendarId, eventId),
+            )
+        return ""
+
+    def _list_events(self, calendarId: str, **params: Any) -> dict:  # noqa: N803
+        clauses = ["calendar_id = ?"]
+        values: list[Any] = [calendarId]
+        sync_token = params.get("syncToken")
+
+        if sync_token:
+            # Incremental sync: everything changed since the token, deletions included
+            clauses.append("seq > ?")
+            values.append(int(sync_token))
+        else:
+            if not params.get("showDeleted"):
+                clauses.append("status != 'cancelled'")
+            if params.get("timeMin"):
+                clauses.append("end > ?")
+                values.append(parse_datetime(params["timeMin"]).astimezone(UTC).isoformat())
+            if params.get("timeMax"):
+                clauses.append("start < ?")
+                values.append(parse_datetime(params["timeMax"]).astimezone(UTC).isoformat())
+
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT body FROM events WHERE {' AND '.join(clauses)} ORDER BY start",  # noqa: S608
+                values,
+            ).fetchall()
+            next_sync_token = str(self.seq)
+
+        items = [json.loads(row[0]) for row in rows]
+        if params.get("privateExtendedProperty"):
+            key, value = params["privateExtendedProperty"].split("=", 1)
+            items = [
+                item
+                for item in items
+                if item.get("extendedProperties", {}).get("private", {}).get(key) == value
+            ]
+        if params.get("maxResults") and not sync_token:
+            items = items[: int(params["maxResults"])]
+        return {"items": items, "nextSyncToken": next_sync_token}
+
+    def _freebusy(self, body: dict) -> dict:
+        time_min = parse_datetime(body["timeMin"]).astimezone(UTC).isoformat()
+        time_max = parse_datetime(body["timeMax"]).astimezone(UTC).isoformat()
+        calendars = {}
+        for item in body.get("items", []):
+            with self.lock:
+                rows = self.connection.execute(
+                    "SELECT start, end FROM events WHERE calendar_id = ? "
+                    "AND status != 'cancelled' AND end > ? AND start < ? ORDER BY start",
+                    (item["id"], time_min, time_max),
+                ).fetchall()
+            calendars[item["id"]] = {"busy": [{"start": s, "end": e} for s, e in rows]}
+        return {"calendars": calendars}
+
+
+class LocalCalendarService:
+    """In-process implementation of every calendar service operation."""
+
+    def __init__(self, backend: LocalCalendarBackend | None = None):
+        self.backend = backend or LocalCalendarBackend()
+        self.store = BookingStore(":memory:")
+
+    def invoke(self, operation: str, arguments: dict[str, Any]) -> dict[str, Any]:
+        """Run an OpenAPI operation by operationId with Gateway-style arguments."""
+        params = dict(arguments)
+        calendar_id = params.pop("calendarId", "primary")
+        handlers = {
+            "createEvent": self._create_event,
+            "deleteEvent": self._delete_event,
+            "listEvents": self._list_events,
+        }
+        try:
+            handler = handlers.get(operation)
+            if handler is None:
+                return run_operation(self.backend, calendar_id, operation, params)
+            return handler(calendar_id, params)
+        except LocalCalendarError as e:
+            return {"success": False, "error": str(e), "statusCode": e.status_code}
+
+    def _create_event(self, calendar_id: str, params: dict) -> dict:
+        body = {
+            "summary": params["summary"],
+            "description": params.get("description", ""),
+            "start": _as_event_time(params["start"]),
+            "end": _as_event_time(params["end"]),
+        }
+        event = self.backend.events().insert(calendarId=calendar_id, body=body).execute()
+        return {"success": True, "eventId": event["id"], "htmlLink": event["htmlLink"]}
+
+    def _delete_event(self, calendar_id: str, params: dict) -> dict:
+        self.backend.events().delete(calendarId=calendar_id, eventId=params["eventId"]).execute()
+        return {"success": True, "eventId": params["eventId"]}
+
+    def _list_events(self, calendar_id: str, params: dict) -> dict:
+        # Same path as production: incremental sync, then indexed local reads
+        sync_calendar(self.backend, self.store, calendar_id)
+        events = query_events(self.store, calendar_id, params)
+        return {"success": True, "events": events, "count": len(events)}
+
+
+def _as_event_time(value: str | dict) -> dict:
+    """Accept Gateway-style ISO strings as well as Google's {dateTime} objects."""
+    if isinstance(value, dict):
+        return value
+    return {"dateTime": parse_datetime(value).isoformat()}
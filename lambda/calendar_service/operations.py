@@ -0,0 +1,50 @@
+# Copyright (C) 2025 Teamwork Mauritius
+#
+# This file is part of AWS AI Agent Global Hackathon 2025 submission.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""Calendar service operations keyed by Gateway tool name.
+
+`handler.lambda_handler` looks up `event["action"]` here before falling back
+to its built-in actions. Each operation takes the Google Calendar service,
+the calendar ID and the tool arguments, and returns the response body.
+Registered operations take precedence, so the capacity-aware
+`checkAvailability` and `getAvailableSlots` replace the built-in versions.
+"""
+
+from collections.abc import Callable
+from typing import Any
+
+from capacity import check_availability, check_availability_batch, get_available_slots
+from reservation import reserve_slot
+from sync import list_events
+
+Operation = Callable[[Any, str, dict[str, Any]], dict[str, Any]]
+
+OPERATIONS: dict[str, Operation] = {
+    "checkAvailability": check_availability,
+    "checkAvailabilityBatch": check_availability_batch,
+    "getAvailableSlots": get_available_slots,
+    "reserveSlot": reserve_slot,
+    "listEvents": list_events,
+}
+
+
+def run_operation(service: Any, calendar_id: str, action: str, params: dict[str, Any]) -> dict:
+    """Run a registered operation, returning an error body for unknown actions."""
+    operation = OPERATIONS.get(action)
+    if operation is None:
+        return {"success": False, "error": f"Unknown action: {action}"}
+    return operation(service, calendar_id, params)
@@ -0,0 +1,200 @@
+# Copyright (C) 2025 Teamwork Mauritius
+#
+# This file is part of AWS AI Agent Global Hackathon 2025 submission.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""Atomic slot reservation for the calendar service.
+
+Google Calendar has no conditional insert, so `reserveSlot` uses optimistic
+concurrency: check table capacity, insert the event, then re-read the day.
+A booking stands only if it still fits alongside every booking created
+before it; otherwise it deletes itself. Both racers apply the same rule, so
+the dining room is never overbooked.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any
+from uuid import uuid4
+
+from availability import Interval, parse_datetime, sweep_availability
+from capacity import (
+    Booking,
+    day_bounds,
+    event_booking,
+    fetch_events,
+    fits,
+    get_tables,
+    parse_party_size,
+    window_capacity,
+)
+
+logger = logging.getLogger(__name__)
+
+ALTERNATIVE_SEARCH_HOURS = 3
+ALTERNATIVE_STEP_MINUTES = 30
+MAX_ALTERNATIVES = 3
+
+
+def suggest_alternatives(tables: list[dict], bookings: list[Booking], candidate: Booking) -> list:
+    """Suggest same-length windows with a free table, closest to the requested start."""
+    start, end = candidate.start, candidate.end
+    duration = end - start
+    step = timedelta(minutes=ALTERNATIVE_STEP_MINUTES)
+    search = timedelta(hours=ALTERNATIVE_SEARCH_HOURS)
+
+    windows: list[Interval] = []
+    window_start = start - search
+    while window_start <= start + search:
+        if window_start != start and window_start.date() == start.date():
+            windows.append((window_start, window_start + duration))
+        window_start += step
+    windows.sort(key=lambda window: abs(window[0] - start))
+
+    capacity = window_capacity(tables, bookings, windows, candidate.party_size)
+    free = [window for window, count in zip(windows, capacity, strict=True) if count > 0]
+    return [{"start": s.isoformat(), "end": e.isoformat()} for s, e in free[:MAX_ALTERNATIVES]]
+
+
+def find_reservation(service: Any, calendar_id: str, reservation_key: str) -> dict | None:
+    """Return the event already created for a reservation key, if any."""
+    response = (
+        service.events()
+        .list(
+            calendarId=calendar_id,
+            privateExtendedProperty=f"reservationKey={reservation_key}",
+            singleEvents=True,
+        )
+        .execute()
+    )
+    items = response.get("items", [])
+    return items[0] if items else None
+
+
+def day_events(service: Any, calendar_id: str, start: datetime) -> list[dict]:
+    """List the events on the restaurant day of `start`."""
+    return fetch_events(service, calendar_id, *day_bounds(start))
+
+
+def to_bookings(events: list[dict]) -> list[Booking]:
+    """Keep the events that hold a table."""
+    return [booking for booking in map(event_booking, events) if booking is not None]
+
+
+def won_race(tables: list[dict], event: dict, candidate: Booking, events: list[dict]) -> bool:
+    """Check whether `event` fits alongside every booking created before it."""
+    ours = (event.get("created", ""), event["id"])
+    earlier = [
+        rival
+        for rival in events
+        if rival["id"] != event["id"] and (rival.get("created", ""), rival["id"]) < ours
+    ]
+    return fits(tables, to_bookings(earlier), candidate)
+
+
+def conflict_response(tables: list[dict], bookings: list[Booking], candidate: Booking) -> dict:
+    """Build the response for a window that cannot be reserved."""
+    busy = [(booking.start, booking.end) for booking in bookings]
+    conflicts = sweep_availability([(candidate.start, candidate.end)], busy)[0]
+    return {
+        "success": True,
+        "reserved": False,
+        "conflicts": [{"start": s.isoformat(), "end": e.isoformat()} for s, e in conflicts],
+        "alternatives": suggest_alternatives(tables, bookings, candidate),
+    }
+
+
+def reserve_slot(service: Any, calendar_id: str, params: dict[str, Any]) -> dict:
+    """Handle the reserveSlot action: check table capacity and create in one step.
+
+    Args:
+        service: Google Calendar API service
+        calendar_id: Calendar to book
+        params: `start`, `end`, `summary` and optional `description`,
+            `customerPhone`, `partySize` (default 2) and `reservationKey`.
+            Retrying with the same `reservationKey` returns the original booking.
+
+    Returns:
+        Response body with `reserved` and either `eventId` or the busy
+        windows plus suggested alternatives
+    """
+    try:
+        start = parse_datetime(params["start"])
+        end = parse_datetime(params["end"])
+        summary = params["summary"]
+        size = parse_party_size(params)
+    except (KeyError, TypeError, ValueError) as e:
+        return {"success": False, "error": f"Invalid reservation request: {e}"}
+    if end <= start:
+        return {"success": False, "error": "Reservation end must be after start"}
+
+    reservation_key = params.get("reservationKey") or uuid4().hex
+    existing = find_reservation(service, calendar_id, reservation_key)
+    if existing:
+        logger.info(f"Reservation {reservation_key} already booked: {existing['id']}")
+        return {
+            "success": True,
+            "reserved": True,
+            "eventId": existing["id"],
+            "reservationKey": reservation_key,
+        }
+
+    # One events query covers the slot and the alternatives around it
+    tables = get_tables()
+    candidate = Booking(start, end, size)
+    bookings = to_bookings(day_events(service, calendar_id, start))
+    if not fits(tables, bookings, candidate):
+        return conflict_response(tables, bookings, candidate)
+
+    private = {"reservationKey": reservation_key, "partySize": str(size)}
+    if params.get("customerPhone"):
+        private["customerPhone"] = str(params["customerPhone"])
+
+    event = (
+        service.events()
+        .insert(
+            calendarId=calendar_id,
+            body={
+                "summary": summary,
+                "description": params.get("description", ""),
+                "start": {"dateTime": start.isoformat()},
+                "end": {"dateTime": end.isoformat()},
+                "extendedProperties": {"private": private},
+            },
+        )
+        .execute()
+    )
+
+    try:
+        events = day_events(service, calendar_id, start)
+    except Exception:
+        # An unverified event could be taking a table a rival already holds
+        logger.warning(f"Reservation {reservation_key} not verified, rolling back {event['id']}")
+        service.events().delete(calendarId=calendar_id, eventId=event["id"]).execute()
+        raise
+    if not won_race(tables, event, candidate, events):
+        logger.warning(f"Reservation {reservation_key} lost race, rolling back {event['id']}")
+        service.events().delete(calendarId=calendar_id, eventId=event["id"]).execute()
+        rivals = to_bookings([rival for rival in events if rival["id"] != event["id"]])
+        return conflict_response(tables, rivals, candidate)
+
+    logger.info(f"Reserved {start.isoformat()} for {size} as {event['id']}")
+    return {
+        "success": True,
+        "reserved": True,
+        "eventId": event["id"],
+        "htmlLink": event.get("htmlLink"),
+        "reservationKey": reservation_key,
+    }
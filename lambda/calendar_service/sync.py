@@ -0,0 +1,271 @@
+# Copyright (C) 2025 Teamwork Mauritius
+#
+# This file is part of AWS AI Agent Global Hackathon 2025 submission.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""Incremental calendar sync into a local booking store.
+
+The first sync downloads every event and keeps Google's `nextSyncToken`.
+Later syncs send the token and only receive changed or cancelled events.
+When Google expires the token (HTTP 410) the store is cleared and rebuilt
+with a full sync. `listEvents` then reads from SQLite indexes on customer
+phone and date instead of re-downloading the calendar.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any
+
+from availability import DEFAULT_TZ, parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# /tmp survives between invocations of a warm Lambda container
+STORE_PATH = os.getenv("BOOKING_STORE_PATH", "/tmp/calendar-bookings.db")  # noqa: S108
+PAGE_SIZE = 250
+DEFAULT_MAX_RESULTS = 10
+
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{6,}\d")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    calendar_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    start TEXT NOT NULL,
+    day TEXT NOT NULL,
+    customer_phone TEXT,
+    body TEXT NOT NULL,
+    PRIMARY KEY (calendar_id, event_id)
+);
+CREATE INDEX IF NOT EXISTS events_by_phone ON events (calendar_id, customer_phone, start);
+CREATE INDEX IF NOT EXISTS events_by_day ON events (calendar_id, day, start);
+CREATE INDEX IF NOT EXISTS events_by_start ON events (calendar_id, start);
+CREATE TABLE IF NOT EXISTS sync_state (
+    calendar_id TEXT PRIMARY KEY,
+    sync_token TEXT NOT NULL
+);
+"""
+
+
+def normalize_phone(value: str) -> str:
+    """Reduce a phone number to `+` and digits."""
+    digits = re.sub(r"\D", "", value)
+    return f"+{digits}" if digits else ""
+
+
+def extract_phone(event: dict[str, Any]) -> str | None:
+    """Find the customer phone stored on a booking event."""
+    private = event.get("extendedProperties", {}).get("private", {})
+    if private.get("customerPhone"):
+        return normalize_phone(private["customerPhone"])
+
+    match = PHONE_PATTERN.search(event.get("description") or "")
+    return normalize_phone(match.group()) if match else None
+
+
+def event_start(event: dict[str, Any]) -> str:
+    """Return the event start in restaurant time as a sortable ISO string."""
+    start = event.get("start", {})
+    if "dateTime" in start:
+        return parse_datetime(start["dateTime"]).astimezone(DEFAULT_TZ).isoformat()
+    # All-day events only carry a date
+    return f"{start.get('date', '')}T00:00:00+04:00"
+
+
+def is_sync_token_expired(error: Exception) -> bool:
+    """Check for Google's 410 Gone response to an expired sync token."""
+    status = getattr(error, "status_code", None) or getattr(
+        getattr(error, "resp", None), "status", None
+    )
+    return str(status) == "410"
+
+
+class BookingStore:
+    """SQLite copy of calendar events indexed by customer phone and date."""
+
+    def __init__(self, path: str = STORE_PATH):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def get_sync_token(self, calendar_id: str) -> str | None:
+        """Return the saved sync token, or None before the first full sync."""
+        row = self.connection.execute(
+            "SELECT sync_token FROM sync_state WHERE calendar_id = ?", (calendar_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def apply(self, calendar_id: str, events: list[dict], sync_token: str | None) -> None:
+        """Upsert changed events, drop cancelled ones and save the sync token."""
+        with self.lock, self.connection:
+            for event in events:
+                if event.get("status") == "cancelled":
+                    self.connection.execute(
+                        "DELETE FROM events WHERE calendar_id = ? AND event_id = ?",
+                        (calendar_id, event["id"]),
+                    )
+                    continue
+                start = event_start(event)
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        calendar_id,
+                        event["id"],
+                        start,
+                        start[:10],
+                        extract_phone(event),
+                        json.dumps(event),
+                    ),
+                )
+            if sync_token:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (calendar_id, sync_token)
+                )
+
+    def reset(self, calendar_id: str) -> None:
+        """Forget every event and the sync token for a calendar."""
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM events WHERE calendar_id = ?", (calendar_id,))
+            self.connection.execute("DELETE FROM sync_state WHERE calendar_id = ?", (calendar_id,))
+
+    def query(
+        self,
+        calendar_id: str,
+        *,
+        customer_phone: str | None = None,
+        day: str | None = None,
+        time_min: str | None = None,
+        time_max: str | None = None,
+        limit: int = DEFAULT_MAX_RESULTS,
+    ) -> list[dict]:
+        """Return stored events matching the filters, ordered by start time."""
+        clauses = ["calendar_id = ?"]
+        values: list[Any] = [calendar_id]
+        if customer_phone:
+            clauses.append("customer_phone = ?")
+            values.append(normalize_phone(customer_phone))
+        if day:
+            clauses.append("day = ?")
+            values.append(day)
+        if time_min:
+            clauses.append("start >= ?")
+            values.append(parse_datetime(time_min).astimezone(DEFAULT_TZ).isoformat())
+        if time_max:
+            clauses.append("start < ?")
+            values.append(parse_datetime(time_max).astimezone(DEFAULT_TZ).isoformat())
+        values.append(limit)
+
+        rows = self.connection.execute(
+            f"SELECT body FROM events WHERE {' AND '.join(clauses)} ORDER BY start LIMIT ?",  # noqa: S608
+            values,
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+def fetch_changes(service: Any, calendar_id: str, sync_token: str | None) -> tuple[list, str]:
+    """Page through events().list, incrementally when a sync token is given."""
+    events: list[dict] = []
+    page_token = None
+    while True:
+        params: dict[str, Any] = {
+            "calendarId": calendar_id,
+            "singleEvents": True,
+            "maxResults": PAGE_SIZE,
+        }
+        if sync_token:
+            params["syncToken"] = sync_token
+        if page_token:
+            params["pageToken"] = page_token
+
+        response = service.events().list(**params).execute()
+        events.extend(response.get("items", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return events, response.get("nextSyncToken", "")
+
+
+def sync_calendar(service: Any, store: BookingStore, calendar_id: str) -> dict[str, Any]:
+    """Bring the local store up to date with the calendar."""
+    sync_token = store.get_sync_token(calendar_id)
+    full = sync_token is None
+
+    try:
+        events, next_token = fetch_changes(service, calendar_id, sync_token)
+    except Exception as e:
+        if full or not is_sync_token_expired(e):
+            raise
+        logger.warning(f"Sync token expired for {calendar_id}, running full resync")
+        full = True
+        events, next_token = fetch_changes(service, calendar_id, None)
+
+    if full:
+        store.reset(calendar_id)
+    store.apply(calendar_id, events, next_token)
+    logger.info(f"{'Full' if full else 'Incremental'} sync of {calendar_id}: {len(events)} changes")
+    return {"full": full, "changes": len(events)}
+
+
+_store: BookingStore | None = None
+
+
+def get_store() -> BookingStore:
+    """Return the booking store shared by invocations in this container."""
+    global _store  # noqa: PLW0603
+    if _store is None:
+        _store = BookingStore()
+    return _store
+
+
+def query_events(store: BookingStore, calendar_id: str, params: dict[str, Any]) -> list[dict]:
+    """Filter the store by listEvents parameters; without `timeMin` or `date`, upcoming only."""
+    time_min = params.get("timeMin")
+    if not time_min and not params.get("date"):
+        time_min = datetime.now(DEFAULT_TZ).isoformat()
+    return store.query(
+        calendar_id,
+        customer_phone=params.get("customerPhone"),
+        day=params.get("date"),
+        time_min=time_min,
+        time_max=params.get("timeMax"),
+        limit=int(params.get("maxResults") or DEFAULT_MAX_RESULTS),
+    )
+
+
+def list_events(service: Any, calendar_id: str, params: dict[str, Any]) -> dict:
+    """Handle the listEvents action from the synced local store.
+
+    Args:
+        service: Google Calendar API service
+        calendar_id: Calendar to list
+        params: Optional `customerPhone`, `date` (YYYY-MM-DD), `timeMin`
+            (default: now, unless `date` is given), `timeMax` and `maxResults`
+
+    Returns:
+        Response body with matching events ordered by start time
+    """
+    store = get_store()
+    sync_calendar(service, store, calendar_id)
+
+    try:
+        events = query_events(store, calendar_id, params)
+    except (TypeError, ValueError) as e:
+        return {"success": False, "error": f"Invalid listEvents request: {e}"}
+
+    return {"success": True, "events": events, "count": len(events)}
@@ -0,0 +1,114 @@
+# Copyright (C) 2025 Teamwork Mauritius
+#
+# This file is part of AWS AI Agent Global Hackathon 2025 submission.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""Split a streamed agent reply into WhatsApp-sized messages.
+
+Text deltas are fed in as they arrive. The first message is released at a
+sentence end once it is long enough to be worth sending on its own; after
+that text is only released when it nears WhatsApp's text body limit, so a
+multi-paragraph reply arrives as one message rather than a burst of small
+ones. <think>/<thinking> blocks are removed even when their tags span several
+deltas.
+"""
+
+import re
+
+from thinking import split_thinking, tidy
+
+# WhatsApp Cloud API limit for a text message body
+MAX_MESSAGE_CHARS = 4096
+# The first message goes out at a sentence end once it is this long
+FIRST_MESSAGE_MIN_CHARS = 160
+
+SENTENCE_END = re.compile(r"[.!?](?=\s)")
+
+
+def split_point(text: str, limit: int) -> int:
+    """Find where to cut text so the head fits the limit.
+
+    Prefers a paragraph break, then a sentence end, then a space.
+    """
+    head = text[:limit]
+    paragraph = head.rfind("\n\n")
+    if paragraph > 0:
+        return paragraph
+    sentences = [match.end() for match in SENTENCE_END.finditer(head)]
+    if sentences:
+        return sentences[-1]
+    space = head.rfind(" ")
+    return space if space > 0 else limit
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_CHARS) -> list[str]:
+    """Split a complete reply into messages of at most `limit` characters."""
+    messages = []
+    text = tidy(text)
+    while len(text) > limit:
+        cut = split_point(text, limit)
+        messages.append(text[:cut].strip())
+        text = text[cut:].strip()
+    if text:
+        messages.append(text)
+    return [message for message in messages if message]
+
+
+class ReplyChunker:
+    """Turn streamed text deltas into WhatsApp messages as they become ready."""
+
+    def __init__(self, limit: int = MAX_MESSAGE_CHARS) -> None:
+        """Initialize an empty chunker.
+
+        Args:
+            limit: Maximum characters per message
+        """
+        self.limit = limit
+        self.sent = 0
+        self._raw = ""
+        self._text = ""
+
+    def _strip_thinking(self) -> None:
+        """Move text that is surely outside think blocks from `_raw` to `_text`."""
+        visible, self._raw = split_thinking(self._raw)
+        self._text += visible
+
+    def _release(self, end: int) -> list[str]:
+        """Release `_text[:end]` as messages."""
+        messages = split_message(self._text[:end], self.limit)
+        self._text = self._text[end:]
+        self.sent += len(messages)
+        return messages
+
+    def feed(self, delta: str) -> list[str]:
+        """Add a text delta and return the messages now ready to send."""
+        self._raw += delta
+        self._strip_thinking()
+
+        messages = []
+        if len(self._text) > self.limit:
+            messages += self._release(split_point(self._text, self.limit))
+        elif not self.sent and len(self._text) >= FIRST_MESSAGE_MIN_CHARS:
+            sentences = [match.end() for match in SENTENCE_END.finditer(self._text)]
+            if sentences and sentences[-1] >= FIRST_MESSAGE_MIN_CHARS:
+                messages += self._release(sentences[-1])
+        return messages
+
+    def flush(self) -> list[str]:
+        """Return the remaining messages once the stream has ended."""
+        # An unclosed think block never reaches the user
+        self._text += split_thinking(self._raw, final=True)[0]
+        self._raw = ""
+        return self._release(len(self._text))
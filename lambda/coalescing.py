@@ -0,0 +1,265 @@
+# Copyright (C) 2025 Teamwork Mauritius
+#
+# This file is part of AWS AI Agent Global Hackathon 2025 submission.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""Per-user coalescing of rapid-fire WhatsApp messages.
+
+Users often split one request over several messages ("hi" / "table for 4" /
+"tomorrow 8pm"). Messages from the same phone number that arrive within the
+debounce window are merged into a single agent turn.
+
+- Queue path: the worker hands a user's records back to the queue until
+  the window since the newest one has passed, once, so the rest of the
+  burst is delivered with them; `split_runs` cuts each user's records into
+  runs of messages sent close together.
+- Direct (SNS) path: every invocation appends its messages to a per-user
+  buffer in the shared store. The invocation that opened the buffer is the
+  leader: it waits out the window, drains the buffer and runs the turn.
+  The others are followers and return straight away. A turn that could
+  not run is put back for the leader's retry (or the user's next message)
+  to pick up: a buffer left behind is taken over with its messages.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+import boto3
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+# 0 disables coalescing
+COALESCE_WINDOW_SECONDS = float(os.environ.get("COALESCE_WINDOW_SECONDS", "3"))
+# Shares the idempotency table; buffer keys cannot collide with message IDs
+BUFFER_TABLE = os.environ.get("IDEMPOTENCY_TABLE")
+BUFFER_PREFIX = "coalesce#"
+# A buffer whose leader died is taken over after this long
+BUFFER_TTL_SECONDS = 60
+
+
+def merge_messages(messages: list[dict]) -> dict:
+    """Merge one user's messages into a single turn.
+
+    Redelivered copies are dropped. The merged message keeps the latest
+    message's metadata (its ID gets the read receipt) and lists every
+    original ID in `message_ids` for the idempotency cache.
+    """
+    unique: dict[str, dict] = {}
+    for message in sorted(messages, key=lambda message: message["timestamp"]):
+        unique.setdefault(message["message_id"] or str(len(unique)), message)
+    ordered = list(unique.values())
+    if len(ordered) == 1:
+        return ordered[0]
+
+    return {
+        **ordered[-1],
+        "text": "\n".join(message["text"] for message in ordered),
+        "message_ids": [message["message_id"] for message in ordered if message["message_id"]],
+    }
+
+
+def split_runs(messages: list[dict], window: float = COALESCE_WINDOW_SECONDS) -> list[list[int]]:
+    """Split one user's ordered messages into runs sent within the window of each other.
+
+    Returns:
+        Indexes of the messages in each run
+    """
+    runs: list[list[int]] = []
+    for index, message in enumerate(messages):
+        if (
+            runs
+            and window > 0
+            and message["timestamp"] - messages[runs[-1][-1]]["timestamp"] <= window
+        ):
+            runs[-1].append(index)
+        else:
+            runs.append([index])
+    return runs
+
+
+class MemoryBuffer:
+    """In-process per-user buffer, the local stand-in for the DynamoDB table."""
+
+    def __init__(self) -> None:
+        """Initialize an empty buffer."""
+        self._buffers: dict[str, tuple[list[dict], float]] = {}
+        self._lock = threading.Lock()
+
+    def append(self, key: str, messages: list[dict]) -> bool:
+        """Add messages to a user's buffer.
+
+        Returns:
+            True if this call opened the buffer (the caller leads the turn)
+        """
+        now = time.time()
+        with self._lock:
+            buffered = self._buffers.get(key)
+            if buffered and buffered[1] > now:
+                buffered[0].extend(messages)
+                return False
+            left = buffered[0] if buffered else []
+            self._buffers[key] = ([*left, *messages], now + BUFFER_TTL_SECONDS)
+            return True
+
+    def restore(self, key: str, messages: list[dict]) -> None:
+        """Put drained messages back, for the next append to take over."""
+        with self._lock:
+            buffered = self._buffers.get(key)
+            if buffered:
+                buffered[0][:0] = messages
+            else:
+                self._buffers[key] = (list(messages), time.time())
+
+    def drain(self, key: str) -> list[dict]:
+        """Remove and return a user's buffered messages."""
+        with self._lock:
+            buffered = self._buffers.pop(key, None)
+        return buffered[0] if buffered else []
+
+
+class DynamoDBBuffer:
+    """Per-user buffer stored as a message list on the idempotency table."""
+
+    def __init__(
+        self, table_name: str, client=None, client_factory: Callable[[], Any] | None = None
+    ) -> None:
+        """Initialize the buffer.
+
+        Args:
+            table_name: DynamoDB table name (partition key `message_id`)
+            client: DynamoDB client
+            client_factory: Creates the client on first use when none is given
+                (default: a new boto3 client)
+        """
+        self.table_name = table_name
+        self._client = client
+        self._client_factory = client_factory or partial(boto3.client, "dynamodb")
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        """DynamoDB client, created on first use to keep it off the cold start."""
+        with self._client_lock:
+            if self._client is None:
+                self._client = self._client_factory()
+            return self._client
+
+    def _key(self, key: str) -> dict:
+        return {"message_id": {"S": BUFFER_PREFIX + key}}
+
+    def append(self, key: str, messages: list[dict]) -> bool:
+        """Add messages to a user's buffer.
+
+        Returns:
+            True if this call opened the buffer (the caller leads the turn)
+        """
+        items = {":items": {"L": [{"S": json.dumps(message)} for message in messages]}}
+        while True:
+            now = int(time.time())
+            try:
+                # Open a new buffer, or take over one left behind with its messages
+                self.client.update_item(
+                    TableName=self.table_name,
+                    Key=self._key(key),
+                    UpdateExpression=(
+                        "SET messages = list_append(if_not_exists(messages, :empty), :items), "
+                        "expires_at = :expires"
+                    ),
+                    ConditionExpression="attribute_not_exists(messages) OR expires_at <= :now",
+                    ExpressionAttributeValues={
+                        **items,
+                        ":empty": {"L": []},
+                        ":now": {"N": str(now)},
+                        ":expires": {"N": str(now + BUFFER_TTL_SECONDS)},
+                    },
+                )
+                return True
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+            try:
+                self.client.update_item(
+                    TableName=self.table_name,
+                    Key=self._key(key),
+                    UpdateExpression="SET messages = list_append(messages, :items)",
+                    ConditionExpression="attribute_exists(messages)",
+                    ExpressionAttributeValues=items,
+                )
+                return False
+            except ClientError as e:
+                # The leader drained the buffer in between: open a new one
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+
+    def restore(self, key: str, messages: list[dict]) -> None:
+        """Put drained messages back, for the next append to take over.
+
+        A new buffer is created already expired, so whichever invocation
+        appends next leads; an open buffer keeps its leader and expiry.
+        """
+        self.client.update_item(
+            TableName=self.table_name,
+            Key=self._key(key),
+            UpdateExpression=(
+                "SET messages = list_append(:items, if_not_exists(messages, :empty)), "
+                "expires_at = if_not_exists(expires_at, :now)"
+            ),
+            ExpressionAttributeValues={
+                ":items": {"L": [{"S": json.dumps(message)} for message in messages]},
+                ":empty": {"L": []},
+                ":now": {"N": str(int(time.time()))},
+            },
+        )
+
+    def drain(self, key: str) -> list[dict]:
+        """Remove and return a user's buffered messages."""
+        response = self.client.delete_item(
+            TableName=self.table_name, Key=self._key(key), ReturnValues="ALL_OLD"
+        )
+        items = response.get("Attributes", {}).get("messages", {}).get("L", [])
+        return [json.loads(item["S"]) for item in items]
+
+
+def create_buffer(
+    client_factory: Callable[[], Any] | None = None,
+) -> MemoryBuffer | DynamoDBBuffer:
+    """Create the buffer on the shared table, or in memory when none is configured."""
+    if BUFFER_TABLE:
+        return DynamoDBBuffer(BUFFER_TABLE, client_factory=client_factory)
+    return MemoryBuffer()
+
+
+def coalesce(buffer, user_phone: str, messages: list[dict], window: float) -> list[dict] | None:
+    """Buffer a user's messages and, as leader, return the burst after the window.
+
+    Returns:
+        The buffered messages to merge into one turn, or None if another
+        invocation leads
+    """
+    if not buffer.append(user_phone, messages):
+        logger.info(f"Buffered {len(messages)} messages for {user_phone}")
+        return None
+
+    time.sleep(window)
+    buffered = buffer.drain(user_phone) or messages
+    logger.info(f"Coalesced {len(buffered)} messages for {user_phone}")
+    return buffered
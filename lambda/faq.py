@@ -0,0 +1,200 @@
+# Copyright (C) 2025 Teamwork Mauritius
+#
+# This file is part of AWS AI Agent Global Hackathon 2025 submission.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""FAQ fast path: answer simple questions without invoking AgentCore.
+
+Opening hours, location and menu-category questions are answered from a
+snapshot of data/restaurant/hours.json and menu.json bundled with the
+Lambda. Only short questions that match exactly one intent and mention
+nothing the agent must handle (bookings, dietary needs, allergens,
+complaints) are answered here; everything else returns None and goes to
+the agent.
+"""
+
+import json
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from functools import cache
+from pathlib import Path
+from typing import Any, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# The snapshot is bundled into restaurant/ next to this module; the repo copy is
+# used when running from source
+SNAPSHOT_DIRS = [
+    Path(__file__).parent / "restaurant",
+    Path(__file__).parent.parent / "data" / "restaurant",
+]
+RESTAURANT_TZ = timezone(timedelta(hours=4))
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+# Longer messages usually carry more than one question
+MAX_WORDS = 12
+
+HOURS = re.compile(r"\b(open|opening|close|closing|closed|hours)\b")
+LOCATION = re.compile(r"\b(where|address|location|located|directions)\b")
+MENU = re.compile(r"\b(menu|dishes)\b")
+# Statements ("the pizza was cold") are not FAQs, even when they name a topic
+QUESTION = re.compile(r"\?|^(what|when|where|which|how|do|does|is|are|can|could|show|send|menu)\b")
+# Anything here needs the agent's tools or judgement; dates and times (any
+# digit) are left to the agent too, since holidays change the hours
+NEEDS_AGENT = re.compile(
+    r"\d|\b(book\w*|reserv\w*|table|cancel\w*|change|modify|party|guests?|people|"
+    r"vegan|vegetarian|gluten\w*|allerg\w*|dairy|nuts?|halal|spicy|price|cost|"
+    r"deliver\w*|takeaway|event|holiday|christmas|january|february|march|april|"
+    r"june|july|august|september|october|november|december|week|weekend|next|"
+    r"cold|bad|awful|terrible|disappoint\w*|complain\w*|rude|sick|wrong|waited|refund)\b"
+)
+
+
+class FaqAnswer(NamedTuple):
+    """A fast-path answer and the intent that produced it."""
+
+    intent: str
+    text: str
+
+
+@cache
+def load_snapshot() -> dict[str, Any] | None:
+    """Read the bundled hours and menu once per container; None if not bundled."""
+    for directory in SNAPSHOT_DIRS:
+        hours, menu = directory / "hours.json", directory / "menu.json"
+        if hours.exists() and menu.exists():
+            return {"hours": json.loads(hours.read_text()), "menu": json.loads(menu.read_text())}
+    logger.warning("FAQ snapshot not bundled, fast path disabled")
+    return None
+
+
+def mentioned_days(text: str, now: datetime) -> list[str]:
+    """Return the weekdays a question is about, in the order of the week."""
+    days = {day for day in DAYS if re.search(rf"\b{day}s?\b", text)}
+    today = now.astimezone(RESTAURANT_TZ)
+    if re.search(r"\b(today|tonight)\b", text):
+        days.add(DAYS[today.weekday()])
+    if re.search(r"\btomorrow\b", text):
+        days.add(DAYS[(today.weekday() + 1) % 7])
+    return [day for day in DAYS if day in days]
+
+
+def format_hours(opening_hours: dict[str, dict], days: list[str]) -> list[str]:
+    """Format hours per day, merging consecutive days with the same hours."""
+    lines: list[tuple[str, str, str]] = []
+    for day in days:
+        info = opening_hours.get(day, {})
+        hours = "Closed" if info.get("closed") else f"{info['open']} - {info['close']}"
+        if lines and lines[-1][2] == hours and DAYS.index(day) == DAYS.index(lines[-1][1]) + 1:
+            lines[-1] = (lines[-1][0], day, hours)
+        else:
+            lines.append((day, day, hours))
+    return [
+        f"{first.title()}{'' if first == last else ' - ' + last.title()}: {hours}"
+        for first, last, hours in lines
+    ]
+
+
+def answer_hours(snapshot: dict[str, Any], text: str, now: datetime) -> str:
+    """Answer an opening-hours question for the days asked about, or the week."""
+    hours = snapshot["hours"]
+    days = mentioned_days(text, now) or DAYS
+    lines = format_hours(hours["opening_hours"], days)
+    notes = hours.get("notes", [])[:1]
+    return "\n".join(["Our opening hours:", *lines, *notes])
+
+
+def answer_location(snapshot: dict[str, Any]) -> str | None:
+    """Answer a location question from the menu description."""
+    description = snapshot["menu"].get("description", "")
+    match = re.search(r"located in (.+)$", description)
+    if not match:
+        return None
+    return f"{snapshot['menu'].get('restaurant', 'We')} is located in {match.group(1)}."
+
+
+def menu_categories(snapshot: dict[str, Any]) -> list[str]:
+    """List the categories of available dishes, in menu order."""
+    categories: dict[str, None] = {}
+    for item in snapshot["menu"]["menu"]:
+        if item.get("available", True):
+            categories.setdefault(item["category"])
+    return list(categories)
+
+
+def mentioned_categories(categories: list[str], text: str) -> list[str]:
+    """Return the menu categories named in a question (singular or plural)."""
+    return [
+        category
+        for category in categories
+        if re.search(rf"\b{re.escape(category.lower().rstrip('s'))}s?\b", text)
+    ]
+
+
+def answer_menu(snapshot: dict[str, Any], categories: list[str]) -> str:
+    """List one category's dishes, or the categories when none was named."""
+    if not categories:
+        return f"Our menu has: {', '.join(menu_categories(snapshot))}.\nAsk me about any of them!"
+    dishes = [
+        f"- {item['name']} ({item['price']:.2f})"
+        for item in snapshot["menu"]["menu"]
+        if item["category"] == categories[0] and item.get("available", True)
+    ]
+    return "\n".join([f"{categories[0]}:", *dishes])
+
+
+def answer(text: str, now: datetime | None = None) -> FaqAnswer | None:
+    """Answer a message directly if it is an unambiguous FAQ.
+
+    Args:
+        text: Customer message
+        now: Current time (defaults to now), for "today" and "tomorrow"
+
+    Returns:
+        The answer, or None if the message should go to the agent
+    """
+    question = text.lower().strip()
+    if (
+        len(question.split()) > MAX_WORDS
+        or NEEDS_AGENT.search(question)
+        or not QUESTION.search(question)
+    ):
+        return None
+
+    snapshot = load_snapshot()
+    if snapshot is None:
+        return None
+
+    categories = mentioned_categories(menu_categories(snapshot), question)
+    intents = {
+        "hours": bool(HOURS.search(question)),
+        "location": bool(LOCATION.search(question)),
+        "menu": bool(MENU.search(question) or categories),
+    }
+    matched = [intent for intent, found in intents.items() if found]
+    if len(matched) != 1:
+        # No intent, or several questions at once
+        return None
+
+    intent = matched[0]
+    if intent == "hours":
+        reply = answer_hours(snapshot, question, now or datetime.now(RESTAURANT_TZ))
+    elif intent == "location":
+        reply = answer_location(snapshot)
+    elif len(categories) > 1:
+        return None
+    else:
+        reply = answer_menu(snapshot, categories)
+    return FaqAnswer(intent, reply) if reply else None
@@ -0,0 +1,217 @@
+# Copyright (C) 2025 Teamwork Mauritius
+#
+# This file is part of AWS AI Agent Global Hackathon 2025 submission.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""Idempotency cache for WhatsApp webhook redeliveries.
+
+SNS and Meta both redeliver webhooks. Before an agent turn runs, its
+WhatsApp message ID is claimed in a shared TTL store; a redelivery finds
+the claim (in progress or completed) and is skipped. Completed IDs are also
+kept in a per-container LRU so warm containers skip repeats without a
+store round trip. A failed turn releases its claim so the retry can run.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+import boto3
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TABLE = os.environ.get("IDEMPOTENCY_TABLE")
+# A claim outlives the longest agent turn; a crashed worker's claim then expires
+IN_PROGRESS_TTL_SECONDS = int(os.environ.get("AGENT_TIMEOUT_SECONDS", "120")) + 60
+# Meta retries failed webhooks for up to a day
+COMPLETED_TTL_SECONDS = 24 * 60 * 60
+LRU_SIZE = 1024
+
+IN_PROGRESS = "IN_PROGRESS"
+COMPLETED = "COMPLETED"
+
+
+class MemoryStore:
+    """In-process TTL store, the local stand-in for the DynamoDB table."""
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self._items: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key: str, ttl: int) -> bool:
+        """Mark a key in progress unless it holds an unexpired record."""
+        now = time.time()
+        with self._lock:
+            record = self._items.get(key)
+            if record and record[1] > now:
+                return False
+            self._items[key] = (IN_PROGRESS, now + ttl)
+            return True
+
+    def complete(self, key: str, ttl: int) -> None:
+        """Mark a key completed."""
+        with self._lock:
+            self._items[key] = (COMPLETED, time.time() + ttl)
+
+    def release(self, key: str) -> None:
+        """Drop a key so it can be claimed again."""
+        with self._lock:
+            self._items.pop(key, None)
+
+
+class DynamoDBStore:
+    """TTL store on a DynamoDB table keyed by `message_id`.
+
+    Claims are conditional writes, so concurrent redeliveries across
+    containers see exactly one winner. `expires_at` is the table's TTL
+    attribute; items DynamoDB has not yet removed are treated as absent.
+    """
+
+    def __init__(
+        self, table_name: str, client=None, client_factory: Callable[[], Any] | None = None
+    ) -> None:
+        """Initialize the store.
+
+        Args:
+            table_name: DynamoDB table name
+            client: DynamoDB client
+            client_factory: Creates the client on first use when none is given
+                (default: a new boto3 client)
+        """
+        self.table_name = table_name
+        self._client = client
+        self._client_factory = client_factory or partial(boto3.client, "dynamodb")
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        """DynamoDB client, created on first use to keep it off the cold start."""
+        with self._client_lock:
+            if self._client is None:
+                self._client = self._client_factory()
+            return self._client
+
+    def claim(self, key: str, ttl: int) -> bool:
+        """Mark a key in progress unless it holds an unexpired record."""
+        now = int(time.time())
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={
+                    "message_id": {"S": key},
+                    "status": {"S": IN_PROGRESS},
+                    "expires_at": {"N": str(now + ttl)},
+                },
+                ConditionExpression="attribute_not_exists(message_id) OR expires_at < :now",
+                ExpressionAttributeValues={":now": {"N": str(now)}},
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False
+            raise
+        return True
+
+    def complete(self, key: str, ttl: int) -> None:
+        """Mark a key completed."""
+        self.client.put_item(
+            TableName=self.table_name,
+            Item={
+                "message_id": {"S": key},
+                "status": {"S": COMPLETED},
+                "expires_at": {"N": str(int(time.time()) + ttl)},
+            },
+        )
+
+    def release(self, key: str) -> None:
+        """Drop a key so it can be claimed again."""
+        self.client.delete_item(TableName=self.table_name, Key={"message_id": {"S": key}})
+
+
+class IdempotencyCache:
+    """Claim/complete/release message IDs with an LRU in front of the store."""
+
+    def __init__(self, store, lru_size: int = LRU_SIZE) -> None:
+        """Initialize the cache.
+
+        Args:
+            store: Shared TTL store (DynamoDBStore or MemoryStore)
+            lru_size: Completed IDs remembered by this container
+        """
+        self.store = store
+        self.lru_size = lru_size
+        self._completed: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _seen(self, key: str) -> bool:
+        """Check the LRU for an unexpired completed key."""
+        with self._lock:
+            expires_at = self._completed.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.time():
+                del self._completed[key]
+                return False
+            self._completed.move_to_end(key)
+            return True
+
+    def claim(self, key: str) -> bool:
+        """Claim a message ID before its agent turn.
+
+        Returns:
+            False if the message was already completed or is in progress
+        """
+        if self._seen(key):
+            return False
+        try:
+            return bool(self.store.claim(key, IN_PROGRESS_TTL_SECONDS))
+        except Exception as e:
+            # Dedup is best effort: a store outage must not drop messages
+            logger.error(f"Idempotency claim failed for {key}: {e}", exc_info=True)
+            return True
+
+    def complete(self, key: str) -> None:
+        """Record a finished agent turn."""
+        with self._lock:
+            self._completed[key] = time.time() + COMPLETED_TTL_SECONDS
+            self._completed.move_to_end(key)
+            while len(self._completed) > self.lru_size:
+                self._completed.popitem(last=False)
+        try:
+            self.store.complete(key, COMPLETED_TTL_SECONDS)
+        except Exception as e:
+            logger.error(f"Idempotency complete failed for {key}: {e}", exc_info=True)
+
+    def release(self, key: str) -> None:
+        """Give up a claim after a failed turn so a retry can run it."""
+        try:
+            self.store.release(key)
+        except Exception as e:
+            # The claim expires after IN_PROGRESS_TTL_SECONDS anyway
+            logger.error(f"Idempotency release failed for {key}: {e}", exc_info=True)
+
+
+def create_cache(client_factory: Callable[[], Any] | None = None) -> IdempotencyCache:
+    """Create the cache on the DynamoDB table, or in memory when none is configured."""
+    if IDEMPOTENCY_TABLE:
+        return IdempotencyCache(DynamoDBStore(IDEMPOTENCY_TABLE, client_factory=client_factory))
+    logger.info("IDEMPOTENCY_TABLE not set, using in-memory idempotency store")
+    return IdempotencyCache(MemoryStore())
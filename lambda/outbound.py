@@ -0,0 +1,207 @@
+# Copyright (C) 2025 Teamwork Mauritius
+#
+# This file is part of AWS AI Agent Global Hackathon 2025 submission.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""Outbound WhatsApp send scheduling.
+
+Every send (reply, read receipt, typing indicator) takes a token from its
+origination phone number's token bucket before it goes out. When sends
+have to wait for a token, replies go first, then read receipts, then
+typing indicators. A receipt or typing indicator still waiting when a
+newer one for the same user arrives is merged into it: only the latest
+is sent and both callers get its result.
+
+Sends run on the caller's thread; the scheduler only decides when. The
+buckets are per container, so OUTBOUND_RATE_PER_SECOND should leave
+headroom for the other containers sending from the same number.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from enum import IntEnum
+from typing import Any
+
+# Meta's default Cloud API throughput is 80 messages per second per number
+OUTBOUND_RATE_PER_SECOND = float(os.environ.get("OUTBOUND_RATE_PER_SECOND", "80"))
+# Window the reported send rate is averaged over
+RATE_WINDOW_SECONDS = 60.0
+
+
+class Priority(IntEnum):
+    """Send priority when sends wait for a token (lower goes first)."""
+
+    REPLY = 0
+    RECEIPT = 1
+    TYPING = 2
+
+
+class TokenBucket:
+    """Token bucket for one phone number (callers hold the scheduler's lock)."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Most tokens the bucket holds (the allowed burst)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token if one is available.
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _Send:
+    """A send waiting for its token."""
+
+    def __init__(self, priority: int, sequence: int, payload: dict, key: str | None) -> None:
+        self.priority = priority
+        self.sequence = sequence
+        self.payload = payload
+        self.key = key
+        self.future: Future = Future()
+
+    def __lt__(self, other: "_Send") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+class OutboundScheduler:
+    """Rate-limit and prioritize sends per origination phone number."""
+
+    def __init__(
+        self,
+        send: Callable[[str, dict], Any],
+        rate: float = OUTBOUND_RATE_PER_SECOND,
+        burst: float | None = None,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            send: Sends one payload from a phone number and returns the response
+            rate: Sends per second per phone number
+            burst: Sends allowed at once before the rate applies (default: rate)
+        """
+        self._send = send
+        self.rate = rate
+        self.burst = burst or rate
+        self._buckets: dict[str, TokenBucket] = {}
+        self._waiting: dict[str, list[_Send]] = {}
+        self._by_key: dict[tuple[str, str], _Send] = {}
+        self._sequence = itertools.count()
+        self._sent: deque[float] = deque()
+        self._coalesced = 0
+        self._condition = threading.Condition()
+
+    def send(
+        self,
+        phone_number_id: str,
+        payload: dict,
+        priority: Priority = Priority.REPLY,
+        key: str | None = None,
+    ) -> Any:
+        """Send a payload once its phone number has a token.
+
+        Args:
+            phone_number_id: Origination phone number
+            payload: WhatsApp Cloud API message
+            priority: Order among sends waiting for a token
+            key: Merges this send with a waiting one with the same key (the
+                payload sent is the latest); only for non-urgent sends
+
+        Returns:
+            The send response
+
+        Raises:
+            Exception: Whatever the send raised
+        """
+        with self._condition:
+            entry = self._by_key.get((phone_number_id, key)) if key else None
+            leader = entry is None
+            if entry is not None:
+                entry.payload = payload
+                self._coalesced += 1
+            else:
+                entry = _Send(priority, next(self._sequence), payload, key)
+                if key:
+                    self._by_key[(phone_number_id, key)] = entry
+                heapq.heappush(self._waiting.setdefault(phone_number_id, []), entry)
+                self._wait_for_token(phone_number_id, entry)
+
+        if leader:
+            try:
+                entry.future.set_result(self._send(phone_number_id, entry.payload))
+            except Exception as e:
+                entry.future.set_exception(e)
+        return entry.future.result()
+
+    def _wait_for_token(self, phone_number_id: str, entry: _Send) -> None:
+        """Block (holding the condition) until `entry` is first in line and gets a token."""
+        bucket = self._buckets.setdefault(phone_number_id, TokenBucket(self.rate, self.burst))
+        queue = self._waiting[phone_number_id]
+        while True:
+            if queue[0] is entry:
+                delay = bucket.take()
+                if not delay:
+                    break
+                self._condition.wait(timeout=delay)
+            else:
+                self._condition.wait()
+
+        heapq.heappop(queue)
+        if entry.key:
+            del self._by_key[(phone_number_id, entry.key)]
+        now = time.monotonic()
+        self._sent.append(now)
+        while self._sent[0] < now - RATE_WINDOW_SECONDS:
+            self._sent.popleft()
+        # The next send in line may take the following token
+        self._condition.notify_all()
+
+    def stats(self) -> dict[str, Any]:
+        """Report the current send rate, queue depth and merged sends."""
+        with self._condition:
+            now = time.monotonic()
+            recent = sum(1 for sent in self._sent if sent >= now - RATE_WINDOW_SECONDS)
+            waiting = [entry for queue in self._waiting.values() for entry in queue]
+            return {
+                "send_rate": round(recent / RATE_WINDOW_SECONDS, 2),
+                "queue_depth": len(waiting),
+                "queue_depth_by_priority": {
+                    priority.name.lower(): sum(1 for e in waiting if e.priority == priority)
+                    for priority in Priority
+                },
+                "coalesced": self._coalesced,
+            }
@@ -0,0 +1,188 @@
+# Copyright (C) 2025 Teamwork Mauritius
+#
+# This file is part of AWS AI Agent Global Hackathon 2025 submission.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""Retry with backoff and circuit breaking for AgentCore and WhatsApp calls.
+
+Throttles, 5xx responses and connection failures are retried with jittered
+exponential backoff. Each dependency has a per-container circuit breaker:
+after repeated failures it opens and calls fail fast with CircuitOpenError
+instead of waiting out timeouts; after a cool-down one probe call is let
+through, and its outcome closes or reopens the breaker.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MAX_ATTEMPTS = 3
+BASE_DELAY_SECONDS = 0.5
+MAX_DELAY_SECONDS = 4.0
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT_SECONDS = 30.0
+
+RETRYABLE_CODES = {
+    "InternalFailure",
+    "InternalServerException",
+    "RequestTimeout",
+    "RequestTimeoutException",
+    "ServiceUnavailable",
+    "ServiceUnavailableException",
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException",
+}
+# Read timeouts are not retried, since the call may still be running (and
+# booking), but they do count towards opening the breaker
+RETRYABLE_ERRORS = (ConnectionClosedError, ConnectTimeoutError, EndpointConnectionError)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Check whether an error is transient (throttle, 5xx or connection failure)."""
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return code in RETRYABLE_CODES or status == 429 or status >= 500
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Return a full-jitter delay before retry number `attempt` (1-based)."""
+    ceiling = min(MAX_DELAY_SECONDS, BASE_DELAY_SECONDS * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)  # noqa: S311
+
+
+class CircuitBreaker:
+    """Per-container circuit breaker for one dependency."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT_SECONDS,
+    ) -> None:
+        """Initialize a closed breaker.
+
+        Args:
+            name: Dependency name, for logs
+            failure_threshold: Consecutive failures that open the breaker
+            reset_timeout: Seconds the breaker stays open before a probe call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being short-circuited."""
+        with self._lock:
+            return self._opened_at is not None
+
+    def before_call(self) -> None:
+        """Let a call through, or raise CircuitOpenError.
+
+        Raises:
+            CircuitOpenError: While open, and while a probe call is running
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"{self.name} circuit breaker is open")
+            self._probing = True
+        logger.info(f"{self.name} circuit breaker half-open, probing")
+
+    def record_success(self) -> None:
+        """Close the breaker after a call that reached a healthy dependency."""
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"{self.name} circuit breaker closed")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        """Count a transient failure, opening the breaker at the threshold."""
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if not self._probing:
+                    logger.error(
+                        f"{self.name} circuit breaker opened after {self._failures} failures"
+                    )
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+def call_with_retry(
+    breaker: CircuitBreaker,
+    func: Callable[..., T],
+    *args: Any,
+    attempts: int = MAX_ATTEMPTS,
+    **kwargs: Any,
+) -> T:
+    """Call a dependency, retrying transient errors with jittered backoff.
+
+    Raises:
+        CircuitOpenError: If the breaker is (or becomes) open
+        Exception: The last error once retries are exhausted, or any
+            non-retryable error straight away
+    """
+    attempt = 1
+    while True:
+        breaker.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_retryable(e) or isinstance(e, ReadTimeoutError):
+                breaker.record_failure()
+            else:
+                # The dependency answered; the request itself was bad
+                breaker.record_success()
+            if not is_retryable(e) or attempt >= attempts:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(
+                f"{breaker.name} call failed ({e}), retry {attempt}/{attempts - 1} in {delay:.2f}s"
+            )
+            time.sleep(delay)
+            attempt += 1
+        else:
+            breaker.record_success()
+            return result
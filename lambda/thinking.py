@@ -0,0 +1,65 @@
+# Copyright (C) 2025 Teamwork Mauritius
+#
+# This file is part of AWS AI Agent Global Hackathon 2025 submission.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""Remove <think>/<thinking> blocks from agent replies, including streamed ones.
+
+Shared by the WhatsApp chunker and the AgentCore agent, so both hide the same
+reasoning the same way.
+"""
+
+import re
+
+THINK_BLOCK = re.compile(r"<think(?:ing)?>.*?</think(?:ing)?>", re.DOTALL | re.IGNORECASE)
+THINK_OPEN = re.compile(r"<think(?:ing)?>", re.IGNORECASE)
+EXTRA_BLANK_LINES = re.compile(r"\n\s*\n\s*\n")
+
+
+def tidy(text: str) -> str:
+    """Collapse the blank lines removed think blocks leave behind."""
+    return EXTRA_BLANK_LINES.sub("\n\n", text).strip()
+
+
+def split_thinking(raw: str, final: bool = False) -> tuple[str, str]:
+    """Split streamed text into the part surely outside think blocks and the rest.
+
+    An unclosed block, or a trailing "<thi" that may become one, is held back
+    until more text arrives; once the stream has ended it is dropped.
+
+    Args:
+        raw: Text received so far that has not been split yet
+        final: Whether the stream has ended
+
+    Returns:
+        The visible text and the text to hold back
+    """
+    text = THINK_BLOCK.sub("", raw)
+    hold = len(text)
+    opening = THINK_OPEN.search(text)
+    if opening:
+        # Hold an unclosed block until its closing tag arrives
+        hold = opening.start()
+    elif not final:
+        # Hold a trailing "<thi" that may become an opening tag
+        tag_start = text.rfind("<", max(0, len(text) - len("<thinking>")))
+        if tag_start >= 0 and "<thinking>".startswith(text[tag_start:].lower()):
+            hold = tag_start
+    return text[:hold], "" if final else text[hold:]
+
+
+def strip_thinking(text: str) -> str:
+    """Remove think blocks, and any unclosed one, from a complete reply."""
+    return tidy(split_thinking(text, final=True)[0])
@@ -17,27 +17,124 @@
 
 """Lambda orchestrator for WhatsApp messages."""
 
+import hashlib
 import json
 import logging
+import math
 import os
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import UTC, datetime
+from functools import partial
+from typing import Any
 
 import boto3
-from aws_xray_sdk.core import patch_all, xray_recorder
-
-# Patch AWS SDK for X-Ray tracing
-patch_all()
+import faq
+from aws_xray_sdk.core import patch, xray_recorder
+from botocore.config import Config
+from chunking import ReplyChunker
+from coalescing import (
+    COALESCE_WINDOW_SECONDS,
+    coalesce,
+    create_buffer,
+    merge_messages,
+    split_runs,
+)
+from idempotency import create_cache
+from outbound import OutboundScheduler, Priority
+from resilience import CircuitBreaker, CircuitOpenError, call_with_retry
+
+# Patch only the AWS SDK for X-Ray tracing (patch_all also imports the patchers
+# of every other supported library, which dominated init time)
+patch(["botocore"])
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
 
-agentcore = boto3.client("bedrock-agentcore")
-socialmessaging = boto3.client("socialmessaging")
+# Conversations processed in parallel per invocation (one worker per user)
+MAX_WORKERS = int(os.environ.get("MAX_CONCURRENT_CONVERSATIONS", "8"))
+
+# Longest AgentCore turn the worker waits for (multi-tool booking turns run long)
+AGENT_TIMEOUT_SECONDS = int(os.environ.get("AGENT_TIMEOUT_SECONDS", "120"))
+# Set on the ingest function: SNS messages are queued instead of processed
+QUEUE_URL = os.environ.get("WHATSAPP_QUEUE_URL")
+SQS_BATCH_SIZE = 10
+# Answer unambiguous hours/location/menu questions without AgentCore
+FAQ_FAST_PATH = os.environ.get("FAQ_FAST_PATH", "true").lower() == "true"
+# Sent once per message while AgentCore's circuit breaker is open
+BUSY_MESSAGE = "We're a little busy right now - we'll get back to you shortly."
+BUSY_KEY_PREFIX = "busy#"
+# Queued messages are retried this soon while a breaker is open
+BREAKER_RETRY_SECONDS = 30
+
+# Size connection pools so every worker can hold a connection
+client_config = Config(max_pool_connections=MAX_WORKERS * 2)
+# Retries for these services are done by call_with_retry, not also by botocore
+no_sdk_retries = Config(retries={"mode": "standard", "total_max_attempts": 1})
+CLIENT_CONFIGS = {
+    "bedrock-agentcore": client_config.merge(no_sdk_retries).merge(
+        Config(read_timeout=AGENT_TIMEOUT_SECONDS)
+    ),
+    "socialmessaging": client_config.merge(no_sdk_retries),
+}
+# Clients are created on first use: the ingest function only ever needs SQS,
+# the worker never does
+_clients: dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(service_name: str) -> Any:
+    """Return the shared boto3 client for a service, creating it on first use."""
+    # boto3's default session is not thread-safe, so creation is serialized
+    with _clients_lock:
+        if service_name not in _clients:
+            _clients[service_name] = boto3.client(
+                service_name, config=CLIENT_CONFIGS.get(service_name, client_config)
+            )
+        return _clients[service_name]
+
+
+# Redelivered webhooks are skipped by WhatsApp message ID
+idempotency = create_cache(partial(get_client, "dynamodb"))
+# Rapid-fire messages from one user are merged into one agent turn
+coalescing_buffer = create_buffer(partial(get_client, "dynamodb"))
+# While a dependency keeps failing, calls to it fail fast instead of timing out
+agentcore_breaker = CircuitBreaker("agentcore")
+whatsapp_breaker = CircuitBreaker("whatsapp")
+
+
+def post_whatsapp_message(phone_number_id: str, payload: dict) -> dict:
+    """Send one Cloud API payload from a phone number, retrying transient errors."""
+    return call_with_retry(
+        whatsapp_breaker,
+        get_client("socialmessaging").send_whatsapp_message,
+        originationPhoneNumberId=phone_number_id,
+        message=json.dumps(payload).encode("utf-8"),
+        metaApiVersion="v19.0",
+    )
+
+
+# Every WhatsApp send is paced per phone number, replies first
+outbound = OutboundScheduler(post_whatsapp_message)
+
+# Read receipts and typing indicators run beside the AgentCore call, not before it
+SIDE_CHANNEL_TIMEOUT = 5.0
+side_channel = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="side-channel")
+_pending: list[Future] = []
+_pending_lock = threading.Lock()
 
 
 @xray_recorder.capture("mark_message_as_read")
-def mark_message_as_read(phone_number_id: str, message_id: str) -> None:
-    """Mark WhatsApp message as read."""
+def mark_message_as_read(phone_number_id: str, message_id: str, user_phone: str = "") -> None:
+    """Mark WhatsApp message as read.
+
+    A receipt still waiting to be sent is replaced by a newer one for the
+    same user (reading a message also marks the earlier ones read).
+    """
     try:
         message_payload = {
             "messaging_product": "whatsapp",
@@ -45,10 +142,11 @@ def mark_message_as_read(phone_number_id: str, message_id: str) -> None:
             "status": "read",
         }
 
-        socialmessaging.send_whatsapp_message(
-            originationPhoneNumberId=phone_number_id,
-            message=json.dumps(message_payload).encode("utf-8"),
-            metaApiVersion="v19.0",
+        outbound.send(
+            phone_number_id,
+            message_payload,
+            Priority.RECEIPT,
+            key=f"read:{user_phone}" if user_phone else None,
         )
         logger.info(f"Marked message as read: {message_id}")
     except Exception as e:
@@ -82,11 +180,7 @@ def send_typing_indicator(phone_number_id: str, user_phone: str, typing: bool =
                 "typing": "on",
             }
 
-        socialmessaging.send_whatsapp_message(
-            originationPhoneNumberId=phone_number_id,
-            message=json.dumps(message_payload).encode("utf-8"),
-            metaApiVersion="v19.0",
-        )
+        outbound.send(phone_number_id, message_payload, Priority.TYPING, key=f"typing:{user_phone}")
         logger.info(f"Sent typing indicator ({'on' if typing else 'off'}) to {user_phone}")
     except Exception as e:
         logger.error(f"Error sending typing indicator: {e}", exc_info=True)
@@ -103,40 +197,59 @@ def send_whatsapp_reply(phone_number_id: str, user_phone: str, message: str) ->
         "text": {"body": message},
     }
 
-    logger.debug(f"Sending to phone: {user_phone}")
-    logger.debug(f"Message payload: {json.dumps(message_payload)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Sending to phone: {user_phone}")
+        logger.debug(f"Message payload: {json.dumps(message_payload)}")
 
-    response = socialmessaging.send_whatsapp_message(
-        originationPhoneNumberId=phone_number_id,
-        message=json.dumps(message_payload).encode("utf-8"),
-        metaApiVersion="v19.0",
-    )
+    response = outbound.send(phone_number_id, message_payload)
 
     message_id = response.get("messageId", "")
     logger.info(f"WhatsApp reply sent: {message_id}")
     return str(message_id)
 
 
+def send_in_background(func, *args, **kwargs) -> Future:
+    """Run a side-channel WhatsApp call on the background executor."""
+    future = side_channel.submit(func, *args, **kwargs)
+    with _pending_lock:
+        _pending.append(future)
+    return future
+
+
+def drain_background(timeout: float = SIDE_CHANNEL_TIMEOUT) -> None:
+    """Wait for queued side-channel calls before the invocation is frozen."""
+    with _pending_lock:
+        pending = list(_pending)
+        _pending.clear()
+    _, not_done = wait(pending, timeout=timeout)
+    if not_done:
+        logger.warning(f"{len(not_done)} side-channel calls still running after {timeout}s")
+    logger.info(f"Outbound WhatsApp sends: {json.dumps(outbound.stats())}")
+
+
 def generate_session_id(phone_number: str) -> str:
     """Generate session ID for conversation continuity.
 
     Uses phone number + date for daily session continuity.
     Session ID must be 33-256 characters and match [a-zA-Z0-9][a-zA-Z0-9-_]*
     """
-    import hashlib
-    from datetime import datetime
-
     # Remove + prefix for validation compliance
     clean_phone = phone_number.lstrip("+")
-    date = datetime.utcnow().strftime("%Y%m%d")
+    date = datetime.now(UTC).strftime("%Y%m%d")
     base = f"whatsapp-{clean_phone}-{date}"
     hash_suffix = hashlib.sha256(base.encode()).hexdigest()[:10]
     return f"{base}-{hash_suffix}"
 
 
-@xray_recorder.capture("invoke_agentcore")
-def invoke_agentcore(runtime_arn: str, session_id: str, prompt: str, actor_id: str) -> str:
-    """Invoke AgentCore with user prompt and memory support."""
+def invoke_agentcore(
+    runtime_arn: str, session_id: str, prompt: str, actor_id: str
+) -> Iterator[str]:
+    """Invoke AgentCore with user prompt and memory support, streaming the reply.
+
+    Yields:
+        Reply text deltas as the agent generates them (the whole reply at once
+        from runtimes that do not stream)
+    """
     params = {
         "agentRuntimeArn": runtime_arn,
         "runtimeSessionId": session_id,
@@ -145,121 +258,457 @@ def invoke_agentcore(runtime_arn: str, session_id: str, prompt: str, actor_id: s
                 "prompt": prompt,
                 "session_id": session_id,
                 "actor_id": actor_id,
+                "stream": True,
             }
         ),
     }
 
     logger.info(f"Actor: {actor_id}, Session: {session_id}")
 
-    response = agentcore.invoke_agent_runtime(**params)
-    result = json.loads(response["response"].read())
-    return str(result.get("result", "Sorry, I couldn't process that."))
+    # A generator outlives a capture decorator, so the subsegment spans the stream
+    with xray_recorder.in_subsegment("invoke_agentcore"):
+        # Only the request is retried: once the reply streams, parts may be sent
+        response = call_with_retry(
+            agentcore_breaker, get_client("bedrock-agentcore").invoke_agent_runtime, **params
+        )
+        if "text/event-stream" not in response.get("contentType", ""):
+            result = json.loads(response["response"].read())
+            yield str(result.get("result", "Sorry, I couldn't process that."))
+            return
+
+        for line in response["response"].iter_lines():
+            if not line.startswith(b"data: "):
+                continue
+            data = json.loads(line[len(b"data: ") :])
+            if isinstance(data, dict) and "error" in data:
+                raise RuntimeError(f"AgentCore stream failed: {data['error']}")
+            if isinstance(data, str):
+                yield data
 
 
-def handler(event, context):  # noqa: PLR0912, PLR0915
-    """Handle WhatsApp messages from SNS.
+def parse_webhook_entry(sns_message: dict, phone_number_id: str | None) -> list[dict]:
+    """Extract every text message from every change in a webhook entry.
 
     Args:
-        event: SNS event with WhatsApp message
-        context: Lambda context
+        sns_message: Parsed SNS message with `whatsAppWebhookEntry`
+        phone_number_id: Configured phone number ID, if any
 
     Returns:
-        Success response
+        Messages with sender, text and the phone number ID to reply from
     """
-    runtime_arn = os.environ["AGENTCORE_RUNTIME_ARN"]
-    phone_number_id = os.environ.get("WHATSAPP_PHONE_NUMBER_ID")
-
-    logger.debug(f"Full event: {json.dumps(event)}")
+    whatsapp_data = json.loads(sns_message["whatsAppWebhookEntry"])
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"WhatsApp data: {json.dumps(whatsapp_data)}")
 
-    for record in event["Records"]:
-        # Parse SNS message
-        sns_message = json.loads(record["Sns"]["Message"])
-        logger.debug(f"SNS Message: {json.dumps(sns_message)}")
+    # Extract phone number ARN from context
+    if not phone_number_id:
+        phone_numbers = sns_message.get("context", {}).get("MetaPhoneNumberIds", [])
+        if phone_numbers:
+            phone_number_id = phone_numbers[0].get("arn")
+            logger.info(f"Using phone number ARN: {phone_number_id}")
+
+    messages = []
+    for change in whatsapp_data.get("changes", []):
+        value = change.get("value", {})
+        if "statuses" in value:
+            logger.debug("Status update received, skipping")
+
+        names = {
+            contact.get("wa_id"): contact.get("profile", {}).get("name", "Unknown")
+            for contact in value.get("contacts", [])
+        }
+        for message in value.get("messages", []):
+            sender = message.get("from", "unknown")
+            text = message.get("text", {}).get("body", "")
+            if not text:
+                logger.warning(f"Empty message body in {message.get('id', '')}")
+                continue
 
-        # Parse WhatsApp webhook entry
-        if "whatsAppWebhookEntry" not in sns_message:
-            logger.warning("No whatsAppWebhookEntry in SNS message")
-            continue
+            messages.append(
+                {
+                    "phone_number_id": phone_number_id,
+                    # Add + prefix if not present
+                    "user_phone": sender if sender.startswith("+") else f"+{sender}",
+                    "sender_name": names.get(sender, "Unknown"),
+                    "message_id": message.get("id", ""),
+                    "timestamp": int(message.get("timestamp") or 0),
+                    "text": text,
+                }
+            )
+    return messages
 
-        whatsapp_data = json.loads(sns_message["whatsAppWebhookEntry"])
-        logger.debug(f"WhatsApp data: {json.dumps(whatsapp_data)}")
 
-        # Extract phone number ARN from context
-        if not phone_number_id:
-            phone_numbers = sns_message.get("context", {}).get("MetaPhoneNumberIds", [])
-            if phone_numbers:
-                phone_number_id = phone_numbers[0].get("arn")
-                logger.info(f"Using phone number ARN: {phone_number_id}")
+def extract_messages(event: dict) -> list[dict]:
+    """Extract every message from every record in an SNS batch."""
+    phone_number_id = os.environ.get("WHATSAPP_PHONE_NUMBER_ID")
+    messages = []
 
-        # Extract message from webhook structure
+    for record in event["Records"]:
         try:
-            changes = whatsapp_data.get("changes", [])
-            if not changes:
-                logger.debug("No changes in webhook")
+            # Parse SNS message
+            sns_message = json.loads(record["Sns"]["Message"])
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"SNS Message: {json.dumps(sns_message)}")
+
+            if "whatsAppWebhookEntry" not in sns_message:
+                logger.warning("No whatsAppWebhookEntry in SNS message")
                 continue
 
-            value = changes[0].get("value", {})
+            messages.extend(parse_webhook_entry(sns_message, phone_number_id))
+        except Exception as e:
+            # A malformed record must not drop the rest of the batch
+            logger.error(f"Error parsing WhatsApp webhook: {e}", exc_info=True)
+
+    return messages
 
-            # Check if this is a status update (not a message)
-            if "statuses" in value:
-                logger.debug("Status update received, skipping")
-                continue
 
-            messages = value.get("messages", [])
-            if not messages:
-                logger.debug("No messages found")
-                continue
+def group_by_user(messages: list[dict]) -> dict[str, list[dict]]:
+    """Group messages per user, oldest first, keeping arrival order on ties."""
+    conversations: dict[str, list[dict]] = defaultdict(list)
+    for message in messages:
+        conversations[message["user_phone"]].append(message)
+    for user_messages in conversations.values():
+        user_messages.sort(key=lambda message: message["timestamp"])
+    return conversations
 
-            message = messages[0]
-            user_phone = message.get("from", "unknown")
-            # Add + prefix if not present
-            if not user_phone.startswith("+"):
-                user_phone = f"+{user_phone}"
 
-            user_message = message.get("text", {}).get("body", "")
-            message_id = message.get("id", "")
+def answer_faq(
+    message: dict, message_ids: list[str], claimed: list[str], side_calls: list[Future]
+) -> bool:
+    """Reply from the FAQ snapshot if the message is a simple FAQ.
 
-            # Get sender name
-            contacts = value.get("contacts", [])
-            sender_name = (
-                contacts[0].get("profile", {}).get("name", "Unknown") if contacts else "Unknown"
+    Returns:
+        True if the message was answered (the agent is then not invoked)
+    """
+    fast_answer = faq.answer(message["text"])
+    if not fast_answer:
+        return False
+
+    # Audit trail of every question the agent never saw
+    audit = {
+        "intent": fast_answer.intent,
+        "message_ids": message_ids,
+        "user_phone": message["user_phone"],
+        "question": message["text"],
+        "answer": fast_answer.text,
+    }
+    logger.info(f"FAQ fast path: {json.dumps(audit)}")
+    deliver_reply(message, fast_answer.text, side_calls)
+    for key in claimed:
+        idempotency.complete(key)
+    return True
+
+
+def process_message(runtime_arn: str, message: dict) -> None:
+    """Run one message through AgentCore and stream the reply back in parts."""
+    phone_number_id = message["phone_number_id"]
+    user_phone = message["user_phone"]
+    message_id = message["message_id"]
+
+    # Coalesced turns carry every merged message ID
+    message_ids = message.get("message_ids") or ([message_id] if message_id else [])
+    claimed = [key for key in message_ids if idempotency.claim(key)]
+    if message_ids and not claimed:
+        logger.info(f"Skipping redelivered message {message_id}")
+        return
+
+    logger.info(f"WhatsApp from {message['sender_name']} ({user_phone}): {message['text']}")
+
+    # Mark as read and show typing while AgentCore works (failures are only logged)
+    side_calls = []
+    if phone_number_id and message_id:
+        side_calls.append(
+            send_in_background(
+                mark_message_as_read, phone_number_id, message_id, user_phone=user_phone
             )
+        )
+    if phone_number_id:
+        side_calls.append(
+            send_in_background(send_typing_indicator, phone_number_id, user_phone, typing=True)
+        )
 
-            logger.info(f"WhatsApp from {sender_name} ({user_phone}): {user_message}")
+    if FAQ_FAST_PATH and answer_faq(message, message_ids, claimed, side_calls):
+        return
 
-            if not user_message:
-                logger.warning("Empty message body")
-                continue
+    # Invoke AgentCore with actor_id and session_id
+    # Sanitize actor_id: remove + prefix for memory API compliance
+    actor_id = user_phone.lstrip("+")  # Remove + prefix
+    session_id = generate_session_id(user_phone)
 
-            # Mark message as read immediately
-            if phone_number_id and message_id:
-                mark_message_as_read(phone_number_id, message_id)
+    # Send each part of the reply as soon as it is complete
+    chunker = ReplyChunker()
+    try:
+        for delta in invoke_agentcore(runtime_arn, session_id, message["text"], actor_id):
+            for reply in chunker.feed(delta):
+                deliver_reply(message, reply, side_calls)
+        for reply in chunker.flush():
+            deliver_reply(message, reply, side_calls)
+    except Exception as e:
+        if not chunker.sent:
+            # Let the retry run the turn again
+            for key in claimed:
+                idempotency.release(key)
+            if isinstance(e, CircuitOpenError):
+                # AgentCore was never called: tell the user the reply is coming
+                notify_busy(message, side_calls)
+            raise
+        # The user already has part of the reply; a retry would repeat it
+        logger.error(f"AgentCore stream broke after {chunker.sent} messages: {e}", exc_info=True)
+    # The turn is done (a booking may exist), so a failed reply is not retried
+    for key in claimed:
+        idempotency.complete(key)
+
+
+def deliver_reply(message: dict, reply: str, side_calls: list[Future]) -> None:
+    """Send one part of the AI reply via WhatsApp (typing stops when it is sent)."""
+    logger.info(f"AI reply: {reply}")
+    if not message["phone_number_id"]:
+        logger.error("No phone number ID configured")
+        return
+
+    # Never let a late typing indicator land after the reply
+    wait(side_calls, timeout=SIDE_CHANNEL_TIMEOUT)
+    try:
+        send_whatsapp_reply(message["phone_number_id"], message["user_phone"], reply)
+    except Exception as e:
+        logger.error(f"Error sending WhatsApp reply: {e}", exc_info=True)
 
-            # Show typing indicator while processing
-            if phone_number_id:
-                send_typing_indicator(phone_number_id, user_phone, typing=True)
 
-            # Invoke AgentCore with actor_id and session_id
-            # Sanitize actor_id: remove + prefix for memory API compliance
-            actor_id = user_phone.lstrip("+")  # Remove + prefix
-            session_id = generate_session_id(user_phone)
-            logger.info(f"Actor: {actor_id}, Session: {session_id}")
+def notify_busy(message: dict, side_calls: list[Future]) -> None:
+    """Send the busy reply, once per message however often it is retried."""
+    key = BUSY_KEY_PREFIX + message["message_id"]
+    if message["message_id"] and idempotency.claim(key):
+        deliver_reply(message, BUSY_MESSAGE, side_calls)
+        idempotency.complete(key)
 
-            ai_reply = invoke_agentcore(runtime_arn, session_id, user_message, actor_id)
-            logger.info(f"AI reply: {ai_reply}")
 
-            # Send reply via WhatsApp (typing indicator stops automatically when message sent)
-            if phone_number_id:
-                try:
-                    send_whatsapp_reply(phone_number_id, user_phone, ai_reply)
-                except Exception as e:
-                    logger.error(f"Error sending WhatsApp reply: {e}", exc_info=True)
-            else:
-                logger.error("No phone number ID configured")
+def process_conversation(runtime_arn: str, messages: list[dict]) -> None:
+    """Process one user's messages in order, so each turn sees the previous reply.
 
+    Raises:
+        CircuitOpenError: While AgentCore's breaker is open, so the invocation
+            fails and Lambda retries it (completed turns are then skipped)
+    """
+    for message in messages:
+        try:
+            process_message(runtime_arn, message)
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error processing WhatsApp message: {e}", exc_info=True)
 
+
+def process_direct(runtime_arn: str, messages: list[dict]) -> bool:
+    """Process one user's messages from SNS, coalescing bursts across invocations.
+
+    Returns:
+        True if AgentCore's breaker was open and the invocation must be retried
+    """
+    if COALESCE_WINDOW_SECONDS <= 0:
+        try:
+            process_conversation(runtime_arn, messages)
+        except CircuitOpenError:
+            return True
+        return False
+
+    user_phone = messages[0]["user_phone"]
+    burst = coalesce(coalescing_buffer, user_phone, messages, COALESCE_WINDOW_SECONDS)
+    if not burst:
+        return False
+    try:
+        process_conversation(runtime_arn, [merge_messages(burst)])
+    except CircuitOpenError as e:
+        # The retry carries this invocation's messages only: put the whole burst
+        # back for it (or the user's next message) to take over
+        logger.warning(f"Returning {len(burst)} messages to the buffer: {e}")
+        coalescing_buffer.restore(user_phone, burst)
+        return True
+    return False
+
+
+def run_conversations(worker, conversations: list[list]) -> list:
+    """Run each user's work on the bounded pool and return the results in order."""
+    if not conversations:
+        return []
+    try:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(conversations))) as pool:
+            return list(pool.map(worker, conversations))
+    finally:
+        drain_background()
+
+
+def deduplication_id(message: dict) -> str:
+    """Derive the FIFO deduplication ID (at most 128 characters) from the message ID."""
+    key = (
+        message["message_id"] or f"{message['user_phone']}:{message['timestamp']}:{message['text']}"
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def enqueue_messages(queue_url: str, messages: list[dict]) -> None:
+    """Queue messages on the FIFO queue, one message group per user.
+
+    Raises:
+        RuntimeError: If any message could not be queued (SNS then retries;
+            the deduplication ID drops the copies that did get through)
+    """
+    for start in range(0, len(messages), SQS_BATCH_SIZE):
+        batch = messages[start : start + SQS_BATCH_SIZE]
+        response = get_client("sqs").send_message_batch(
+            QueueUrl=queue_url,
+            Entries=[
+                {
+                    "Id": str(index),
+                    "MessageBody": json.dumps(message),
+                    "MessageGroupId": message["user_phone"].lstrip("+"),
+                    "MessageDeduplicationId": deduplication_id(message),
+                }
+                for index, message in enumerate(batch)
+            ],
+        )
+        if response.get("Failed"):
+            raise RuntimeError(f"Failed to queue WhatsApp messages: {response['Failed']}")
+    logger.info(f"Queued {len(messages)} messages")
+
+
+def queue_url_from_arn(queue_arn: str) -> str:
+    """Build an SQS queue URL from the queue ARN of an event record."""
+    _, _, _, region, account, name = queue_arn.split(":")
+    return f"https://sqs.{region}.amazonaws.com/{account}/{name}"
+
+
+def retry_sooner(records: list[dict], timeout: int = BREAKER_RETRY_SECONDS) -> bool:
+    """Shorten the visibility timeout of records to retry, instead of the worker's long one.
+
+    Returns:
+        True if every record got the shorter timeout
+    """
+    shortened = True
+    queue_url = queue_url_from_arn(records[0]["eventSourceARN"])
+    for start in range(0, len(records), SQS_BATCH_SIZE):
+        batch = records[start : start + SQS_BATCH_SIZE]
+        try:
+            response = get_client("sqs").change_message_visibility_batch(
+                QueueUrl=queue_url,
+                Entries=[
+                    {
+                        "Id": str(index),
+                        "ReceiptHandle": record["receiptHandle"],
+                        "VisibilityTimeout": timeout,
+                    }
+                    for index, record in enumerate(batch)
+                ],
+            )
+            if response.get("Failed"):
+                logger.error(f"Failed to shorten visibility: {response['Failed']}")
+                shortened = False
+        except Exception as e:
+            # The records are retried after the full visibility timeout instead
+            logger.error(f"Error shortening visibility: {e}", exc_info=True)
+            shortened = False
+    return shortened
+
+
+def burst_hold_seconds(records: list[dict]) -> int:
+    """Seconds to hand a user's records back so the rest of their burst joins them (0: run now).
+
+    A group is held once (on its first receive) until the window since the
+    newest record has passed; FIFO then redelivers it with the messages
+    queued behind it in the same group.
+    """
+    attributes = records[0].get("attributes", {})
+    if COALESCE_WINDOW_SECONDS <= 0 or attributes.get("ApproximateReceiveCount", "1") != "1":
+        return 0
+    newest = int(records[-1].get("attributes", {}).get("SentTimestamp", 0)) / 1000
+    remaining = COALESCE_WINDOW_SECONDS - (time.time() - newest)
+    return math.ceil(remaining) if remaining > 0 else 0
+
+
+def process_queue_group(runtime_arn: str, records: list[dict]) -> list[str]:
+    """Process one user's queued records in order, one turn per burst of messages.
+
+    Returns:
+        SQS message IDs to retry: the first failed turn and everything after
+        it, so a retried turn never overtakes a later one
+    """
+    hold = burst_hold_seconds(records)
+    if hold and retry_sooner(records, hold):
+        logger.info(f"Holding {len(records)} messages {hold}s for the rest of the burst")
+        return [record["messageId"] for record in records]
+
+    messages = [json.loads(record["body"]) for record in records]
+    for run in split_runs(messages, COALESCE_WINDOW_SECONDS):
+        try:
+            process_message(runtime_arn, merge_messages([messages[index] for index in run]))
+        except CircuitOpenError as e:
+            logger.warning(f"Re-queueing {len(records) - run[0]} messages: {e}")
+            retry_sooner(records[run[0] :])
+            return [later["messageId"] for later in records[run[0] :]]
+        except Exception as e:
+            logger.error(f"Error processing queued WhatsApp message: {e}", exc_info=True)
+            return [later["messageId"] for later in records[run[0] :]]
+    return []
+
+
+def handle_queue_batch(records: list[dict]) -> dict:
+    """Process an SQS FIFO batch, reporting failed messages for retry."""
+    runtime_arn = os.environ["AGENTCORE_RUNTIME_ARN"]
+
+    groups: dict[str, list[dict]] = defaultdict(list)
+    for record in records:
+        groups[record.get("attributes", {}).get("MessageGroupId", "")].append(record)
+
+    logger.info(f"Processing {len(records)} queued messages from {len(groups)} users")
+    failed = run_conversations(
+        lambda group: process_queue_group(runtime_arn, group), list(groups.values())
+    )
+    return {
+        "batchItemFailures": [
+            {"itemIdentifier": message_id} for group in failed for message_id in group
+        ]
+    }
+
+
+def handler(event, context):
+    """Handle WhatsApp messages from SNS or from the FIFO queue.
+
+    SNS events are queued when WHATSAPP_QUEUE_URL is set (ingest function) and
+    processed directly otherwise. SQS events come from the queue (worker
+    function). Either way, different users run in parallel on a bounded pool
+    and each user's messages run in order.
+
+    Args:
+        event: SNS event with WhatsApp messages, or SQS batch of queued messages
+        context: Lambda context
+
+    Returns:
+        Success response, or the SQS batch item failures
+    """
+    # Serializing the whole event is only worth it when it will be logged
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Full event: {json.dumps(event)}")
+
+    records = event.get("Records", [])
+    if records and records[0].get("eventSource") == "aws:sqs":
+        return handle_queue_batch(records)
+
+    messages = extract_messages(event)
+    if not messages:
+        logger.debug("No messages found")
+    elif QUEUE_URL:
+        enqueue_messages(QUEUE_URL, messages)
+    else:
+        runtime_arn = os.environ["AGENTCORE_RUNTIME_ARN"]
+        conversations = group_by_user(messages)
+        logger.info(f"Processing {len(conversations)} conversations")
+        retry = run_conversations(
+            lambda user_messages: process_direct(runtime_arn, user_messages),
+            list(conversations.values()),
+        )
+        if any(retry):
+            # Every other conversation has finished; the retry skips their completed turns
+            raise CircuitOpenError("AgentCore unavailable, retrying the invocation")
+
     return {"statusCode": 200, "body": json.dumps("Processed")}
 
 
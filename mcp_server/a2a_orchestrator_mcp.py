@@ -7,14 +7,39 @@ No Agent wrapper = No response fabrication.
 """
 
 import asyncio
+import logging
 import os
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Callable
 from datetime import UTC, datetime, timedelta
+from functools import cache
+from typing import NamedTuple
 from uuid import uuid4
 
 import boto3
 import httpx
-from a2a.client import A2ACardResolver, ClientConfig, ClientFactory
-from a2a.types import Message, Part, Role, TextPart
+from a2a.client import Client, ClientCallContext, ClientConfig, ClientFactory
+from a2a.types import (
+    Message,
+    Part,
+    Role,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskIdParams,
+    TaskState,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+from agent_registry import (
+    AgentCardCache,
+    AgentEndpoint,
+    AgentListing,
+    AgentRegistry,
+    format_listings,
+    load_endpoints,
+)
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import TextContent, Tool
@@ -24,24 +49,54 @@ BOOKING_AGENT_URL = os.getenv(
     "https://bedrock-agentcore.us-east-1.amazonaws.com/runtimes/arn%3Aaws%3Abedrock-agentcore%3Aus-east-1%3A<YOUR_AWS_ACCOUNT_ID>%3Aruntime%2F<YOUR_AGENTCORE_RUNTIME_ID>/invocations/",
 )
 DEFAULT_TIMEOUT = 300  # 5 minutes
+# Kept-alive HTTP/2 connections to AgentCore, reused across tool calls
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=300)
+# AgentCore keeps an idle runtime session warm for 15 minutes
+SESSION_TTL_SECONDS = int(os.getenv("A2A_SESSION_TTL_SECONDS", "900"))
+MAX_SESSIONS = 1024
+# Longest progress message forwarded to the MCP client
+PROGRESS_MESSAGE_CHARS = 200
+# How long a cancelled tool call waits for the agent to cancel its task
+CANCEL_TIMEOUT_SECONDS = 5
+FINISHED_STATES = {TaskState.completed, TaskState.failed, TaskState.canceled, TaskState.rejected}
+# Booking IDs in the agent's payment request ("Booking ID: evt_abc123")
+BOOKING_ID_PATTERN = re.compile(r"Booking ID:\s*\**\s*([\w-]+)|booking_id='([\w-]+)'")
+
+# find_table asks this many matching restaurants at once
+FANOUT_CANDIDATES = 8
+# A restaurant that has not answered by then is left out
+FANOUT_DEADLINE_SECONDS = float(os.getenv("A2A_FANOUT_DEADLINE_SECONDS", "30"))
+# Stragglers are cancelled once this many restaurants have a table
+FANOUT_OPTIONS = 3
+AVAILABILITY_PROMPT = (
+    "Only check availability, do not book yet: {request}\n"
+    "Start your reply with AVAILABLE or UNAVAILABLE."
+)
+AVAILABILITY_PATTERN = re.compile(r"^\W*(AVAILABLE|UNAVAILABLE)\b\W*", re.IGNORECASE)
+
+# A token is not used this close to its expiry
+TOKEN_EXPIRY_BUFFER = timedelta(minutes=5)
+# Tokens are refreshed in the background from this close to their expiry
+TOKEN_REFRESH_AHEAD = timedelta(minutes=10)
+
+logger = logging.getLogger(__name__)
 
 # Token cache
 _token_cache: dict[str, str | datetime | None] = {"token": None, "expires_at": None}
 
 
-def get_cognito_token() -> str:
-    """Get Cognito token with automatic refresh using refresh token."""
+@cache
+def cognito_client(region: str):
+    """Shared cognito-idp client (boto3 clients are thread-safe once created)."""
+    return boto3.client("cognito-idp", region_name=region)
 
-    now = datetime.now(UTC)
 
-    # Return cached token if still valid (with 5-minute buffer)
-    if (
-        _token_cache["token"]
-        and _token_cache["expires_at"]
-        and now < _token_cache["expires_at"] - timedelta(minutes=5)  # type: ignore[operator]
-    ):
-        return str(_token_cache["token"])
+def fetch_cognito_token() -> tuple[str, datetime]:
+    """Exchange the refresh token for a new Cognito ID token (blocking).
 
+    Returns:
+        The ID token and when it expires
+    """
     # Get credentials from environment
     refresh_token = os.getenv("COGNITO_REFRESH_TOKEN")
     client_id = os.getenv("COGNITO_CLIENT_ID")
@@ -53,8 +108,8 @@ def get_cognito_token() -> str:
         raise ValueError("COGNITO_REFRESH_TOKEN not set in environment")
 
     # Get new token using refresh token (no AWS credentials needed)
-    cognito = boto3.client("cognito-idp", region_name=region)
-    response = cognito.initiate_auth(
+    now = datetime.now(UTC)
+    response = cognito_client(region).initiate_auth(
         ClientId=client_id,
         AuthFlow="REFRESH_TOKEN_AUTH",
         AuthParameters={"REFRESH_TOKEN": refresh_token},
@@ -62,28 +117,487 @@ def get_cognito_token() -> str:
 
     token = str(response["AuthenticationResult"]["IdToken"])
     expires_in = int(response["AuthenticationResult"]["ExpiresIn"])
+    return token, now + timedelta(seconds=expires_in)
+
+
+def get_cognito_token() -> str:
+    """Get Cognito token with automatic refresh using refresh token (blocking, for scripts)."""
+
+    now = datetime.now(UTC)
+
+    # Return cached token if still valid (with 5-minute buffer)
+    if (
+        _token_cache["token"]
+        and _token_cache["expires_at"]
+        and now < _token_cache["expires_at"] - TOKEN_EXPIRY_BUFFER  # type: ignore[operator]
+    ):
+        return str(_token_cache["token"])
+
+    token, expires_at = fetch_cognito_token()
 
     # Cache token
     _token_cache["token"] = token
-    _token_cache["expires_at"] = now + timedelta(seconds=expires_in)
+    _token_cache["expires_at"] = expires_at
 
     return token
 
 
-# Mock restaurant database - DEMO ONLY: La Bella Vita
-MOCK_RESTAURANTS = """Found 1 Italian restaurant in Mauritius with vegetarian options:
+class TokenManager:
+    """Cognito token for async callers, refreshed off the event loop.
+
+    Concurrent callers share one refresh, which runs in a worker thread.
+    A refresh starts in the background TOKEN_REFRESH_AHEAD before expiry,
+    while the current token is still handed out, so callers only wait on
+    Cognito for the very first token (or after a failed refresh).
+    """
+
+    def __init__(self, fetch: Callable[[], tuple[str, datetime]] = fetch_cognito_token):
+        self._fetch = fetch
+        self.token: str | None = None
+        self.expires_at: datetime | None = None
+        self._refresh: asyncio.Task | None = None
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def get(self) -> str:
+        """Return a valid token, waiting only if there is none."""
+        now = datetime.now(UTC)
+        if self.token and self.expires_at and now < self.expires_at - TOKEN_EXPIRY_BUFFER:
+            if now >= self.expires_at - TOKEN_REFRESH_AHEAD:
+                # Missed the scheduled refresh (e.g. it failed): retry in the background
+                self._start_refresh()
+            return self.token
+        # A cancelled caller must not cancel the refresh the others wait on
+        return await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self) -> asyncio.Task:
+        """Start a refresh unless one is already running."""
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._refresh_token())
+            self._refresh.add_done_callback(self._log_failure)
+        return self._refresh
+
+    async def _refresh_token(self) -> str:
+        token, expires_at = await asyncio.to_thread(self._fetch)
+        self.token, self.expires_at = token, expires_at
+
+        delay = (expires_at - TOKEN_REFRESH_AHEAD - datetime.now(UTC)).total_seconds()
+        if self._timer:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(max(delay, 0), self._start_refresh)
+        return token
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
+            logger.error(f"Cognito token refresh failed: {task.exception()}")
+
+    def close(self) -> None:
+        """Stop scheduled refreshes."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+
+tokens = TokenManager()
+
+
+class BookingAgentConnection:
+    """Long-lived HTTP/2 pool and A2A client for a booking agent.
+
+    The A2A client is rebuilt only when the bearer token rotates or the
+    agent card changes.
+    """
+
+    def __init__(self, base_url: str, cards: AgentCardCache | None = None, auth: bool = True):
+        """Initialize the connection.
+
+        Args:
+            base_url: Agent URL
+            cards: Agent card cache to share (e.g. the registry's)
+            auth: Send the orchestrator's bearer token (only to our own agents)
+        """
+        self.base_url = base_url
+        self.cards = cards or AgentCardCache(base_url)
+        self.auth = auth
+        self._http_client: httpx.AsyncClient | None = None
+        self._client: Client | None = None
+        self._client_key: tuple[str, int] | None = None
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Pooled HTTP/2 client, created on first use inside the running event loop."""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                http2=True, timeout=DEFAULT_TIMEOUT, limits=HTTP_LIMITS
+            )
+        return self._http_client
+
+    async def client(self, bearer_token: str | None, headers: dict[str, str]) -> Client:
+        """Return the A2A client for the current token and agent card."""
+        http_client = self.http_client
+        if self.auth:
+            http_client.headers["Authorization"] = f"Bearer {bearer_token}"
+        agent_card = await self.cards.get(http_client, headers)
+
+        key = (bearer_token if self.auth else "", id(agent_card))
+        if self._client is None or self._client_key != key:
+            # Streams when the agent card says the agent can, else a single response
+            config = ClientConfig(httpx_client=http_client, streaming=True)
+            self._client = ClientFactory(config).create(agent_card)
+            self._client_key = key
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+            self._client = None
+            self._client_key = None
+
+
+booking_agent = BookingAgentConnection(BOOKING_AGENT_URL)
+
+
+class SessionMap:
+    """AgentCore runtime session IDs by conversation ID and booking ID, with TTL.
+
+    Follow-up calls (e.g. approve_payment after book_restaurant) reuse the
+    warm runtime session and its conversation state.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL_SECONDS, max_size: int = MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._sessions: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    def get(self, keys: list[str]) -> str:
+        """Return the live session of the first known key (or a new one), linked to every key."""
+        now = time.monotonic()
+        for key, (_, expires_at) in list(self._sessions.items()):
+            if expires_at <= now:
+                del self._sessions[key]
+
+        session_id = next(
+            (self._sessions[key][0] for key in keys if key in self._sessions),
+            # Runtime session IDs must be at least 33 characters
+            str(uuid4()),
+        )
+        for key in keys:
+            self.link(key, session_id)
+        return session_id
+
+    def find(self, key: str) -> str | None:
+        """Return the live value linked to a key, if any."""
+        session_id, expires_at = self._sessions.get(key, (None, 0.0))
+        return session_id if expires_at > time.monotonic() else None
+
+    def link(self, key: str, session_id: str) -> None:
+        """Map a key to a session, refreshing its TTL."""
+        self._sessions[key] = (session_id, time.monotonic() + self.ttl)
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_size:
+            self._sessions.popitem(last=False)
+
+
+sessions = SessionMap()
+# URL of the agent that made each booking, for approve_payment
+booking_agents = SessionMap()
+
+
+def parts_text(parts: list[Part]) -> str:
+    """Concatenate the text parts (Part wraps TextPart in .root)."""
+    return "".join(part.root.text for part in parts if isinstance(part.root, TextPart))
+
+
+async def report_progress(progress: int, message: str) -> None:
+    """Forward progress to the MCP client, if it asked for progress notifications."""
+    try:
+        context = app.request_context
+    except LookupError:
+        return
+    progress_token = context.meta.progressToken if context.meta else None
+    if progress_token is None:
+        return
+    await context.session.send_progress_notification(
+        progress_token,
+        progress,
+        message=message[:PROGRESS_MESSAGE_CHARS],
+        related_request_id=str(context.request_id),
+    )
+
+
+async def stream_reply(
+    client: Client, msg: Message, context: ClientCallContext, forward_progress: bool = True
+) -> str:
+    """Send a message to the agent, reporting its progress as it streams.
+
+    Status updates and artifact chunks are forwarded as MCP progress
+    notifications while the reply text is assembled. If the tool call is
+    cancelled, the agent's task is cancelled too.
+
+    Args:
+        client: A2A client
+        msg: Message to send
+        context: Call context carrying the request headers
+        forward_progress: Report the agent's progress to the MCP client
+            (off when several agents are asked at once)
+
+    Returns:
+        The reply text (the task's artifacts, or the agent's direct message)
+    """
+    task: Task | None = None
+    response_text = ""
+    progress = 0
+    try:
+        async for event in client.send_message(msg, context=context):
+            if isinstance(event, Message):
+                return parts_text(event.parts)
+
+            # The client folds every update into the task it yields
+            task, update = event
+            response_text = "".join(parts_text(a.parts) for a in task.artifacts or [])
+            if not forward_progress:
+                continue
+            if isinstance(update, TaskArtifactUpdateEvent):
+                progress += 1
+                await report_progress(progress, parts_text(update.artifact.parts))
+            elif isinstance(update, TaskStatusUpdateEvent):
+                status = update.status
+                note = parts_text(status.message.parts) if status.message else ""
+                progress += 1
+                await report_progress(progress, note or status.state.value)
+    except asyncio.CancelledError:
+        if task and task.status.state not in FINISHED_STATES:
+            try:
+                await asyncio.wait_for(
+                    client.cancel_task(TaskIdParams(id=task.id), context=context),
+                    CANCEL_TIMEOUT_SECONDS,
+                )
+            except Exception as e:
+                logger.warning(f"Could not cancel A2A task {task.id}: {e}")
+        raise
+    return response_text
+
+
+async def ask_agent(
+    connection: BookingAgentConnection,
+    text: str,
+    session_id: str,
+    bearer_token: str | None,
+    forward_progress: bool = True,
+) -> str:
+    """Send one message to an agent in a runtime session and return its reply.
+
+    Booking IDs in the reply are linked to the session and the agent, so
+    approve_payment goes back to both.
+    """
+    # The session ID follows the conversation; the Bearer token is on the pooled client
+    headers = {"X-Amzn-Bedrock-AgentCore-Runtime-Session-Id": session_id}
+    client = await connection.client(bearer_token, headers)
+    context = ClientCallContext(state={"http_kwargs": {"headers": headers}})
+
+    msg = Message(
+        kind="message",
+        role=Role.user,
+        parts=[Part(TextPart(kind="text", text=text))],
+        message_id=uuid4().hex,
+    )
+
+    response_text = await stream_reply(client, msg, context, forward_progress)
+
+    # Approving a booking later goes back to the session that created it
+    for match in BOOKING_ID_PATTERN.finditer(response_text):
+        booking_id = match.group(1) or match.group(2)
+        sessions.link(f"booking:{booking_id}", session_id)
+        booking_agents.link(booking_id, connection.base_url)
+    return response_text
+
 
-**La Bella Vita** ($$$)
-- Cuisine: Italian
-- Location: Grand Baie, Mauritius
-- Features: window seating, ocean view, romantic ambiance
-- Vegetarian options: Yes
-- Perfect for: Romantic dinners for 2 people
+async def registry_auth_headers() -> dict[str, str]:
+    """Credentials for fetching the cards of our own AgentCore agents."""
+    return {
+        "Authorization": f"Bearer {await tokens.get()}",
+        "X-Amzn-Bedrock-AgentCore-Runtime-Session-Id": str(uuid4()),
+    }
+
+
+# Restaurants discoverable through their A2A agent cards (see agents.json)
+registry = AgentRegistry(
+    load_endpoints(variables={"A2A_AGENT_URL": BOOKING_AGENT_URL}),
+    auth_headers=registry_auth_headers,
+)
+# Connections to the other registered agents, by URL
+connections: dict[str, BookingAgentConnection] = {}
+
+
+def agent_connection(endpoint: AgentEndpoint) -> BookingAgentConnection:
+    """Pooled connection to a registered agent, sharing the registry's card cache."""
+    if endpoint.url == booking_agent.base_url:
+        return booking_agent
+    if endpoint.url not in connections:
+        connections[endpoint.url] = BookingAgentConnection(
+            endpoint.url, registry.card_cache(endpoint.url), auth=endpoint.auth
+        )
+    return connections[endpoint.url]
+
+
+class TableOption(NamedTuple):
+    """One restaurant's answer to an availability check."""
+
+    listing: AgentListing
+    # None when the reply did not say either way
+    available: bool | None
+    reply: str
+    seconds: float
+    session_id: str
+
+
+async def check_availability(listing: AgentListing, request_text: str) -> TableOption:
+    """Ask one restaurant whether it has a table, without booking."""
+    started = time.perf_counter()
+    session_id = str(uuid4())
+    connection = agent_connection(listing.endpoint)
+    bearer_token = await tokens.get() if connection.auth else None
+    reply = await ask_agent(
+        connection,
+        AVAILABILITY_PROMPT.format(request=request_text),
+        session_id,
+        bearer_token,
+        forward_progress=False,
+    )
+    match = AVAILABILITY_PATTERN.match(reply)
+    available = match.group(1).upper() == "AVAILABLE" if match else None
+    return TableOption(
+        listing,
+        available,
+        reply[match.end() :] if match else reply,
+        time.perf_counter() - started,
+        session_id,
+    )
+
+
+# Cancelled availability checks still cancelling their agent's task
+_cancelling: set[asyncio.Task] = set()
+
+
+async def table_candidates(request_text: str) -> list[AgentListing]:
+    """Restaurants to ask for a table: the search matches, else every agent with a card.
+
+    Requests such as "a table somewhere at 8pm" match no index term, but
+    any restaurant may have the table.
+    """
+    listings = [
+        listing
+        for listing in await registry.search(request_text, FANOUT_CANDIDATES)
+        if listing.card
+    ]
+    if listings:
+        return listings
+    everyone = await registry.search("", len(registry.endpoints))
+    return [listing for listing in everyone if listing.card][:FANOUT_CANDIDATES]
+
+
+async def fan_out(
+    request_text: str,
+    wanted: int = FANOUT_OPTIONS,
+    listings: list[AgentListing] | None = None,
+) -> list[TableOption]:
+    """Ask the candidate restaurants at once and rank their answers.
+
+    Each restaurant has FANOUT_DEADLINE_SECONDS to answer. Once `wanted`
+    restaurants have a table, the rest are cancelled, so the call takes
+    as long as the fastest answers rather than the slowest.
+
+    Args:
+        request_text: What to look for
+        wanted: Available tables after which the rest are cancelled
+        listings: Restaurants to ask (default: `table_candidates`)
+
+    Returns:
+        Restaurants with a table first, then unclear answers, then those
+        without; ties in candidate order
+    """
+    if listings is None:
+        listings = await table_candidates(request_text)
+    checks = {
+        asyncio.create_task(
+            asyncio.wait_for(check_availability(listing, request_text), FANOUT_DEADLINE_SECONDS)
+        ): listing
+        for listing in listings
+    }
+    options: list[TableOption] = []
+    pending = set(checks)
+    try:
+        while pending and sum(option.available is True for option in options) < wanted:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for check in done:
+                name = checks[check].name
+                try:
+                    options.append(check.result())
+                except Exception as e:
+                    logger.warning(f"No availability from {name}: {e!r}")
+                await report_progress(len(checks) - len(pending), f"{name} answered")
+    finally:
+        # Stragglers cancel their agent's task in the background
+        for check in pending:
+            check.cancel()
+            _cancelling.add(check)
+            check.add_done_callback(_cancelling.discard)
+
+    order = {id(listing): rank for rank, listing in enumerate(listings)}
+    preference = {True: 0, None: 1, False: 2}
+    return sorted(
+        options,
+        key=lambda option: (preference[option.available], order[id(option.listing)]),
+    )
+
+
+def format_options(request_text: str, options: list[TableOption]) -> str:
+    """Describe the availability answers for the MCP client."""
+    if not options:
+        return f"No restaurant answered in time for: {request_text}"
+
+    lines = [f"Availability for: {request_text}"]
+    for number, option in enumerate(options, 1):
+        status = {True: "Available", None: "Unclear", False: "Unavailable"}[option.available]
+        lines += [
+            "",
+            f"{number}. **{option.listing.name}** - {status} ({option.seconds:.1f}s)",
+            option.reply.strip(),
+        ]
+    return "\n".join(lines)
+
+
+async def find_table(request_text: str, book: bool) -> str:
+    """Fan an availability check out to matching restaurants, booking the best if asked."""
+    listings = await table_candidates(request_text)
+    if not listings:
+        return f"No restaurant agents are available to ask for: {request_text}"
+    options = await fan_out(request_text, listings=listings)
+    text = format_options(request_text, options)
+    best = options[0] if options and options[0].available else None
+    if not book or best is None:
+        return text
+
+    # Book in the session that checked availability, so the agent has the context
+    connection = agent_connection(best.listing.endpoint)
+    bearer_token = await tokens.get() if connection.auth else None
+    reply = await ask_agent(
+        connection, f"Please book it: {request_text}", best.session_id, bearer_token
+    )
+    return f"{text}\n\nBooking at {best.listing.name}:\n{reply}"
 
-This is the only restaurant available for booking via this system."""
 
 app = Server("a2a-orchestrator")
 
+CONVERSATION_ID_SCHEMA = {
+    "type": "string",
+    "description": (
+        "Conversation ID from an earlier reply, to continue that conversation with the agent"
+    ),
+}
+
 
 @app.list_tools()
 async def list_tools() -> list[Tool]:
@@ -118,7 +632,33 @@ async def list_tools() -> list[Tool]:
                         "description": (
                             "Booking request with restaurant name, date, time, party size"
                         ),
-                    }
+                    },
+                    "conversation_id": CONVERSATION_ID_SCHEMA,
+                },
+                "required": ["request"],
+            },
+        ),
+        Tool(
+            name="find_table",
+            description=(
+                "Ask several matching restaurants at once for a free table and list "
+                "the first ones available, optionally booking the best one"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "request": {
+                        "type": "string",
+                        "description": (
+                            "What to look for (e.g., 'Italian in Grand Baie, 4 people, "
+                            "tomorrow 8pm')"
+                        ),
+                    },
+                    "book": {
+                        "type": "boolean",
+                        "description": "Book a table at the best available restaurant",
+                        "default": False,
+                    },
                 },
                 "required": ["request"],
             },
@@ -132,7 +672,8 @@ async def list_tools() -> list[Tool]:
                     "booking_id": {
                         "type": "string",
                         "description": "Booking ID from payment request",
-                    }
+                    },
+                    "conversation_id": CONVERSATION_ID_SCHEMA,
                 },
                 "required": ["booking_id"],
             },
@@ -141,62 +682,47 @@ async def list_tools() -> list[Tool]:
 
 
 @app.call_tool()
-async def handle_tool(name: str, arguments: dict) -> list[TextContent]:  # noqa: PLR0912
+async def handle_tool(name: str, arguments: dict) -> list[TextContent]:  # noqa: PLR0911
     """Handle tool calls using direct A2A client with Bearer token."""
     request_text = arguments.get("request", "")
 
     if name == "discover_restaurants":
-        return [TextContent(type="text", text=MOCK_RESTAURANTS)]
-
+        listings = await registry.search(request_text)
+        return [TextContent(type="text", text=format_listings(request_text, listings))]
+
+    if name == "find_table":
+        try:
+            text = await find_table(request_text, bool(arguments.get("book", False)))
+        except Exception as e:
+            return [TextContent(type="text", text=f"Error: {str(e)}", isError=True)]
+        return [TextContent(type="text", text=text)]
+
+    # Bookings start a new conversation unless the client passes one back
+    conversation_id = arguments.get("conversation_id")
+    if not conversation_id and name == "book_restaurant":
+        conversation_id = uuid4().hex
+    session_keys = [f"conversation:{conversation_id}"] if conversation_id else []
+    connection = booking_agent
     if name == "approve_payment":
         booking_id = arguments.get("booking_id")
         if not booking_id:
             return [TextContent(type="text", text="Error: booking_id required")]
         request_text = f"Approve payment for booking {booking_id}"
+        # A booking's own session wins over the conversation's
+        session_keys.insert(0, f"booking:{booking_id}")
+        # Bookings made through find_table may be at another agent
+        connection = connections.get(booking_agents.find(booking_id) or "", booking_agent)
 
     try:
         # Get fresh token (auto-refreshes if expired)
-        bearer_token = get_cognito_token()
-        session_id = str(uuid4())
-
-        # Use OAuth Bearer token authentication
-        headers = {
-            "Authorization": f"Bearer {bearer_token}",
-            "X-Amzn-Bedrock-AgentCore-Runtime-Session-Id": session_id,
-        }
-
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, headers=headers) as httpx_client:
-            # Get agent card from AgentCore Runtime (like AWS example)
-            resolver = A2ACardResolver(httpx_client=httpx_client, base_url=BOOKING_AGENT_URL)
-            agent_card = await resolver.get_agent_card()
-
-            config = ClientConfig(httpx_client=httpx_client, streaming=False)
-            factory = ClientFactory(config)
-            client = factory.create(agent_card)
-
-            msg = Message(
-                kind="message",
-                role=Role.user,
-                parts=[Part(TextPart(kind="text", text=request_text))],
-                message_id=uuid4().hex,
-            )
+        bearer_token = await tokens.get() if connection.auth else None
+        session_id = sessions.get(session_keys)
+        response_text = await ask_agent(connection, request_text, session_id, bearer_token)
 
-            response_text = ""
-            async for event in client.send_message(msg):
-                if isinstance(event, tuple) and len(event) >= 1:
-                    task = event[0]
-                    # Extract from task artifacts
-                    if hasattr(task, "artifacts"):
-                        for artifact in task.artifacts:
-                            if hasattr(artifact, "parts"):
-                                for part in artifact.parts:
-                                    # Part wraps TextPart in .root
-                                    if hasattr(part, "root") and hasattr(part.root, "text"):
-                                        response_text += part.root.text
-
-        if response_text:
-            return [TextContent(type="text", text=response_text)]
-        return [TextContent(type="text", text="No response received from agent")]
+        reply = [TextContent(type="text", text=response_text or "No response received from agent")]
+        if conversation_id:
+            reply.append(TextContent(type="text", text=f"Conversation ID: {conversation_id}"))
+        return reply
 
     except Exception as e:
         return [TextContent(type="text", text=f"Error: {str(e)}", isError=True)]
@@ -204,8 +730,15 @@ async def handle_tool(name: str, arguments: dict) -> list[TextContent]:  # noqa:
 
 async def main():
     """Run MCP server."""
-    async with stdio_server() as (read_stream, write_stream):
-        await app.run(read_stream, write_stream, app.create_initialization_options())
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await app.run(read_stream, write_stream, app.create_initialization_options())
+    finally:
+        tokens.close()
+        await registry.aclose()
+        await booking_agent.aclose()
+        for connection in connections.values():
+            await connection.aclose()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,297 @@
+"""
+Registry of A2A restaurant agents with indexed discovery
+
+Crawls the configured A2A endpoints, caches their agent cards and keeps an
+in-memory inverted index over card names, skills, cuisine and location
+tags, so discovery queries are answered from memory. Stale cards are
+refreshed in the background while the current index keeps answering.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from string import Template
+from typing import NamedTuple
+
+import httpx
+from a2a.types import AgentCard
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
+
+logger = logging.getLogger(__name__)
+
+# Agent card is revalidated (If-None-Match) after this long
+CARD_TTL_SECONDS = int(os.getenv("A2A_CARD_TTL_SECONDS", "300"))
+# Endpoints to crawl: a JSON list of {url, name, cuisine, location, tags, auth}
+REGISTRY_FILE = Path(os.getenv("A2A_REGISTRY_FILE", Path(__file__).parent / "agents.json"))
+CRAWL_CONCURRENCY = 20
+CRAWL_TIMEOUT_SECONDS = 10
+# An agent whose card fetch failed is tried again after this long
+CARD_RETRY_SECONDS = 60
+HTTP_LIMITS = httpx.Limits(max_connections=CRAWL_CONCURRENCY, keepalive_expiry=300)
+MAX_RESULTS = 5
+
+# Matches in a name, cuisine or location count for more than in a description
+FIELD_WEIGHTS = {"name": 3.0, "cuisine": 3.0, "location": 3.0, "skills": 2.0, "tags": 1.5}
+DESCRIPTION_WEIGHT = 1.0
+STOPWORDS = {
+    "a", "an", "and", "any", "at", "find", "for", "in", "me", "near", "of", "on", "option",
+    "or", "place", "restaurant", "search", "some", "the", "to", "with",
+}  # fmt: skip
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-case words without stopwords, plurals folded ("options" -> "option")."""
+    words = (word.lower() for word in re.findall(r"[\w']+", text))
+    folded = (word[:-1] if len(word) > 3 and word.endswith("s") else word for word in words)
+    return [word for word in folded if word not in STOPWORDS]
+
+
+class AgentEndpoint(NamedTuple):
+    """A registered agent and the tags the registry file gives it."""
+
+    url: str
+    name: str = ""
+    cuisine: tuple[str, ...] = ()
+    location: tuple[str, ...] = ()
+    tags: tuple[str, ...] = ()
+    # Send the orchestrator's bearer token when fetching the card
+    auth: bool = False
+
+
+class AgentListing(NamedTuple):
+    """A discoverable agent: its endpoint and latest agent card (if fetched)."""
+
+    endpoint: AgentEndpoint
+    card: AgentCard | None
+
+    @property
+    def name(self) -> str:
+        return self.card.name if self.card else self.endpoint.name or self.endpoint.url
+
+
+def load_endpoints(
+    path: Path = REGISTRY_FILE, variables: dict[str, str] | None = None
+) -> list[AgentEndpoint]:
+    """Read the registry file.
+
+    Args:
+        path: JSON list of endpoints
+        variables: Values for ${NAME} in URLs, over the environment variables
+    """
+    if not path.exists():
+        logger.warning(f"Agent registry file {path} not found")
+        return []
+    endpoints = []
+    for entry in json.loads(path.read_text()):
+        url = Template(entry["url"]).safe_substitute({**os.environ, **(variables or {})})
+        endpoints.append(
+            AgentEndpoint(
+                url=url,
+                name=entry.get("name", ""),
+                cuisine=tuple(entry.get("cuisine", [])),
+                location=tuple(entry.get("location", [])),
+                tags=tuple(entry.get("tags", [])),
+                auth=entry.get("auth", False),
+            )
+        )
+    return endpoints
+
+
+class AgentCardCache:
+    """Agent card cached for a TTL, then revalidated with its ETag."""
+
+    def __init__(self, base_url: str, ttl: float = CARD_TTL_SECONDS):
+        self.url = f"{base_url.rstrip('/')}{AGENT_CARD_WELL_KNOWN_PATH}"
+        self.ttl = ttl
+        self.card: AgentCard | None = None
+        self.etag: str | None = None
+        self.expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    async def get(self, http_client: httpx.AsyncClient, headers: dict[str, str]) -> AgentCard:
+        """Return the cached card, fetching or revalidating it once the TTL is up."""
+        if self.card and not self.stale:
+            return self.card
+
+        # Concurrent calls wait for one fetch instead of each fetching
+        async with self._lock:
+            if self.card and not self.stale:
+                return self.card
+
+            request_headers = dict(headers)
+            if self.card and self.etag:
+                request_headers["If-None-Match"] = self.etag
+            response = await http_client.get(self.url, headers=request_headers)
+            if response.status_code == httpx.codes.NOT_MODIFIED and self.card:
+                self.expires_at = time.monotonic() + self.ttl
+                return self.card
+
+            response.raise_for_status()
+            self.card = AgentCard.model_validate(response.json())
+            self.etag = response.headers.get("ETag")
+            self.expires_at = time.monotonic() + self.ttl
+            return self.card
+
+
+class AgentIndex:
+    """Inverted index from search terms to weighted agent matches."""
+
+    def __init__(self, listings: list[AgentListing]):
+        self.listings = listings
+        self._postings: dict[str, dict[int, float]] = defaultdict(dict)
+        for number, listing in enumerate(listings):
+            for field, text in self._fields(listing):
+                weight = FIELD_WEIGHTS.get(field, DESCRIPTION_WEIGHT)
+                for term in set(tokenize(text)):
+                    postings = self._postings[term]
+                    postings[number] = postings.get(number, 0.0) + weight
+
+    @staticmethod
+    def _fields(listing: AgentListing) -> list[tuple[str, str]]:
+        endpoint, card = listing
+        fields = [
+            ("name", listing.name),
+            ("cuisine", " ".join(endpoint.cuisine)),
+            ("location", " ".join(endpoint.location)),
+            ("tags", " ".join(endpoint.tags)),
+        ]
+        if card:
+            fields.append(("description", card.description))
+            for skill in card.skills:
+                fields.append(("skills", " ".join([skill.name, *(skill.tags or [])])))
+                fields.append(("description", skill.description))
+        return fields
+
+    def search(self, query: str, limit: int = MAX_RESULTS) -> list[AgentListing]:
+        """Rank agents by the summed weight of the query terms they match."""
+        terms = tokenize(query)
+        if not terms:
+            return sorted(self.listings, key=lambda listing: listing.name)[:limit]
+
+        scores: dict[int, float] = defaultdict(float)
+        for term in terms:
+            for number, weight in self._postings.get(term, {}).items():
+                scores[number] += weight
+        ranked = sorted(scores, key=lambda n: (-scores[n], self.listings[n].name))
+        return [self.listings[number] for number in ranked[:limit]]
+
+
+class AgentRegistry:
+    """Crawled agent cards and the index over them, refreshed when stale."""
+
+    def __init__(
+        self,
+        endpoints: list[AgentEndpoint],
+        auth_headers: Callable[[], Awaitable[dict[str, str]]] | None = None,
+        http_client: httpx.AsyncClient | None = None,
+    ):
+        """Initialize the registry.
+
+        Args:
+            endpoints: Agents to crawl
+            auth_headers: Headers for endpoints registered with `auth` only
+                (the registry's own HTTP client carries no credentials)
+            http_client: HTTP client to fetch cards with (default: a pooled
+                HTTP/2 client created on first use)
+        """
+        self.endpoints = endpoints
+        self._http_client = http_client
+        self._auth_headers = auth_headers
+        self._cards = {endpoint.url: AgentCardCache(endpoint.url) for endpoint in endpoints}
+        self._semaphore = asyncio.Semaphore(CRAWL_CONCURRENCY)
+        self._index: AgentIndex | None = None
+        self._refresh: asyncio.Task | None = None
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """HTTP client for card fetches, created on first use inside the event loop."""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                http2=True, timeout=CRAWL_TIMEOUT_SECONDS, limits=HTTP_LIMITS
+            )
+        return self._http_client
+
+    def card_cache(self, url: str) -> AgentCardCache:
+        """The card cache of a registered agent, to share with its A2A connection."""
+        return self._cards.setdefault(url, AgentCardCache(url))
+
+    async def _fetch(self, endpoint: AgentEndpoint) -> AgentListing:
+        """Fetch one card; a failed fetch keeps the last card (or the file's tags)."""
+        cards = self._cards[endpoint.url]
+        try:
+            headers = await self._auth_headers() if endpoint.auth and self._auth_headers else {}
+            async with self._semaphore:
+                card = await asyncio.wait_for(
+                    cards.get(self.http_client, headers), CRAWL_TIMEOUT_SECONDS
+                )
+        except Exception as e:
+            logger.warning(f"Agent card fetch failed for {endpoint.url}: {e}")
+            cards.expires_at = time.monotonic() + CARD_RETRY_SECONDS
+            card = cards.card
+        return AgentListing(endpoint, card)
+
+    async def crawl(self) -> AgentIndex:
+        """Fetch every card concurrently and rebuild the index."""
+        started = time.perf_counter()
+        listings = await asyncio.gather(*(self._fetch(e) for e in self.endpoints))
+        self._index = AgentIndex(list(listings))
+        logger.info(
+            f"Indexed {len(listings)} agents in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return self._index
+
+    def _start_refresh(self) -> asyncio.Task:
+        """Start a crawl unless one is already running."""
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self.crawl())
+        return self._refresh
+
+    async def search(self, query: str, limit: int = MAX_RESULTS) -> list[AgentListing]:
+        """Answer from the current index, refreshing stale cards in the background."""
+        if self._index is None:
+            # Only the very first query waits for the crawl
+            index = await asyncio.shield(self._start_refresh())
+            return index.search(query, limit)
+        if any(cards.stale for cards in self._cards.values()):
+            self._start_refresh()
+        return self._index.search(query, limit)
+
+    async def aclose(self) -> None:
+        """Stop a running crawl and close the HTTP client."""
+        if self._refresh and not self._refresh.done():
+            self._refresh.cancel()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+
+def format_listings(query: str, listings: list[AgentListing]) -> str:
+    """Describe the matching agents for the MCP client."""
+    if not listings:
+        return f"No restaurants found for: {query}"
+
+    lines = [f"Found {len(listings)} restaurant(s) for: {query}"]
+    for listing in listings:
+        endpoint, card = listing
+        lines += ["", f"**{listing.name}**"]
+        if endpoint.cuisine:
+            lines.append(f"- Cuisine: {', '.join(endpoint.cuisine)}")
+        if endpoint.location:
+            lines.append(f"- Location: {', '.join(endpoint.location)}")
+        if endpoint.tags:
+            lines.append(f"- Features: {', '.join(endpoint.tags)}")
+        if card:
+            lines.append(f"- About: {card.description}")
+            if card.skills:
+                lines.append(f"- Skills: {', '.join(skill.name for skill in card.skills)}")
+    return "\n".join(lines)
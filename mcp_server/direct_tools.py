@@ -0,0 +1,234 @@
+"""
+Direct structured tools for the restaurant MCP server
+
+Availability, free slots, menu and opening hours lookups go straight to the
+calendar service and the restaurant data, one call each with no model
+inference. Arguments that are not structured enough to map onto an
+operation (e.g. "sometime next week") return None, and the request goes to
+the booking agent instead.
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, time, timedelta, timezone
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+import boto3
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = Path(os.getenv("RESTAURANT_DATA_DIR", PROJECT_ROOT / "data" / "restaurant"))
+# Calendar service Lambda (CalendarServiceStack); LOCAL_CALENDAR=true runs it in-process
+CALENDAR_FUNCTION_NAME = os.getenv("CALENDAR_FUNCTION_NAME", "")
+LOCAL_CALENDAR = os.getenv("LOCAL_CALENDAR", "").lower() == "true"
+CALENDAR_ID = os.getenv("GOOGLE_CALENDAR_ID", "primary")
+RESTAURANT_TZ = timezone(timedelta(hours=4))
+BOOKING_DURATION = timedelta(hours=2)
+
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+# 12-hour times, minutes optional; 24-hour times need minutes
+TIME_12H = re.compile(r"^(\d{1,2})(?:[:.](\d{2}))?\s*([ap])\.?\s*m\.?$", re.IGNORECASE)
+TIME_24H = re.compile(r"^(\d{1,2})[:.h](\d{2})$", re.IGNORECASE)
+MENU_STOPWORDS = {
+    "a", "and", "any", "do", "dish", "food", "for", "have", "menu", "of", "on", "option",
+    "or", "show", "some", "the", "what", "with", "you", "your",
+}  # fmt: skip
+
+
+def parse_date(text: str, today: date) -> date | None:
+    """Read an ISO date, "today"/"tonight"/"tomorrow" or a weekday (the next one)."""
+    text = text.strip().lower()
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        pass
+    if text in {"today", "tonight"}:
+        return today
+    if text == "tomorrow":
+        return today + timedelta(days=1)
+    day = text.removeprefix("this ").rstrip("s")
+    if day in DAYS:
+        return today + timedelta(days=(DAYS.index(day) - today.weekday()) % 7)
+    return None
+
+
+def parse_time(text: str) -> time | None:
+    """Read a clock time such as "19:30", "7pm" or "7:30 PM"."""
+    text = text.strip()
+    if match := TIME_12H.match(text):
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        if not 1 <= hour <= 12 or minute > 59:
+            return None
+        return time(hour % 12 + (12 if match.group(3).lower() == "p" else 0), minute)
+    if match := TIME_24H.match(text):
+        hour, minute = int(match.group(1)), int(match.group(2))
+        return time(hour, minute) if hour < 24 and minute < 60 else None
+    return None
+
+
+@cache
+def restaurant_data(name: str) -> dict[str, Any]:
+    """Read data/restaurant/<name>.json once."""
+    return json.loads((DATA_DIR / f"{name}.json").read_text())
+
+
+@cache
+def lambda_client():
+    """Shared Lambda client for the calendar service."""
+    return boto3.client("lambda", region_name=os.getenv("AWS_REGION", "us-east-1"))
+
+
+@cache
+def local_calendar():
+    """In-process calendar service, shared by every call."""
+    sys.path.insert(0, str(PROJECT_ROOT / "lambda" / "calendar_service"))
+    from local_service import LocalCalendarService  # noqa: PLC0415
+
+    return LocalCalendarService()
+
+
+def calendar_configured() -> bool:
+    """Whether availability can be looked up without the agent."""
+    return LOCAL_CALENDAR or bool(CALENDAR_FUNCTION_NAME)
+
+
+def invoke_calendar(operation: str, arguments: dict[str, Any]) -> dict[str, Any]:
+    """Run one calendar service operation and return its response body (blocking)."""
+    arguments = {"calendarId": CALENDAR_ID, **arguments}
+    if LOCAL_CALENDAR:
+        return local_calendar().invoke(operation, arguments)
+
+    response = lambda_client().invoke(
+        FunctionName=CALENDAR_FUNCTION_NAME,
+        InvocationType="RequestResponse",
+        Payload=json.dumps({"action": operation, **arguments}),
+    )
+    result = json.loads(response["Payload"].read())
+    body = result.get("body", result)
+    return json.loads(body) if isinstance(body, str) else body
+
+
+async def check_availability(arguments: dict) -> str | None:
+    """Check one time with checkAvailability."""
+    day = parse_date(str(arguments["date"]), datetime.now(RESTAURANT_TZ).date())
+    at = parse_time(str(arguments["time"]))
+    if not calendar_configured() or day is None or at is None:
+        return None
+
+    start = datetime.combine(day, at, tzinfo=RESTAURANT_TZ)
+    party_size = int(arguments["party_size"])
+    # checkAvailability only counts tables, so opening hours are checked here
+    hours = restaurant_data("hours")["opening_hours"][DAYS[day.weekday()]]
+    if hours.get("closed"):
+        return f"The restaurant is closed on {day:%A %d %B}."
+    opens = datetime.combine(day, time.fromisoformat(hours["open"]), tzinfo=RESTAURANT_TZ)
+    closes = datetime.combine(day, time.fromisoformat(hours["close"]), tzinfo=RESTAURANT_TZ)
+    if start < opens or start + BOOKING_DURATION > closes:
+        return (
+            f"{start:%H:%M} on {day:%A %d %B} is outside opening hours "
+            f"({hours['open']} - {hours['close']}, tables are booked for 2 hours)."
+        )
+
+    body = await asyncio.to_thread(
+        invoke_calendar,
+        "checkAvailability",
+        {
+            "start": start.isoformat(),
+            "end": (start + BOOKING_DURATION).isoformat(),
+            "partySize": party_size,
+        },
+    )
+    if not body.get("success"):
+        return f"Error: {body.get('error', 'Calendar service failed')}"
+
+    when = f"{start:%A %d %B} at {start:%H:%M}"
+    if body["available"]:
+        return f"A table for {party_size} is available on {when}."
+    return f"No table for {party_size} is available on {when}."
+
+
+async def available_slots(arguments: dict) -> str | None:
+    """List a day's free times with getAvailableSlots."""
+    day = parse_date(str(arguments["date"]), datetime.now(RESTAURANT_TZ).date())
+    if not calendar_configured() or day is None:
+        return None
+
+    party_size = int(arguments.get("party_size") or 2)
+    body = await asyncio.to_thread(
+        invoke_calendar,
+        "getAvailableSlots",
+        {"date": day.isoformat(), "partySize": party_size},
+    )
+    if not body.get("success"):
+        return f"Error: {body.get('error', 'Calendar service failed')}"
+
+    slots = body.get("availableSlots", [])
+    if not slots:
+        reason = body.get("message", "No free tables")
+        return f"{reason} on {day:%A %d %B} for {party_size}."
+    lines = [f"Free times on {day:%A %d %B} for {party_size}:"]
+    lines += [f"- {slot['startTime']} - {slot['endTime']}" for slot in slots]
+    return "\n".join(lines)
+
+
+def menu_terms(query: str) -> set[str]:
+    """Lower-case query words without filler, plurals folded."""
+    words = re.findall(r"\w+", query.lower())
+    folded = {word[:-1] if len(word) > 3 and word.endswith("s") else word for word in words}
+    return folded - MENU_STOPWORDS
+
+
+def dish_terms(item: dict) -> set[str]:
+    """Searchable words of a dish ("gluten-free" matches "gluten free")."""
+    text = " ".join([item["name"], item["category"], item["description"], *item["dietary"]])
+    return menu_terms(text.replace("-", " "))
+
+
+async def menu(arguments: dict) -> str | None:
+    """List the available dishes, or those matching every word of the query."""
+    data = restaurant_data("menu")
+    dishes = [item for item in data["menu"] if item.get("available", True)]
+    terms = menu_terms(arguments.get("query", ""))
+    if terms:
+        dishes = [item for item in dishes if terms <= dish_terms(item)]
+        if not dishes:
+            # Nothing matched literally: let the agent interpret the question
+            return None
+
+    lines = [
+        f"{data['restaurant']} menu:" if not terms else f"Dishes matching: {arguments['query']}"
+    ]
+    for item in dishes:
+        dietary = f" [{', '.join(item['dietary'])}]" if item["dietary"] else ""
+        lines.append(f"- {item['name']} ({item['category']}, {item['price']:.2f}){dietary}")
+    return "\n".join(lines)
+
+
+async def opening_hours(_arguments: dict) -> str | None:
+    """Weekly opening hours and notes from hours.json."""
+    data = restaurant_data("hours")
+    lines = [f"{data['restaurant']} opening hours:"]
+    for day in DAYS:
+        hours = data["opening_hours"][day]
+        times = "Closed" if hours.get("closed") else f"{hours['open']} - {hours['close']}"
+        lines.append(f"- {day.title()}: {times}")
+    lines += [
+        f"- {name.replace('_', ' ').title()}: {value}"
+        for name, value in data.get("special_hours", {}).items()
+    ]
+    lines += data.get("notes", [])
+    return "\n".join(lines)
+
+
+# MCP tools answered without the agent (None from a tool means: ask the agent)
+DIRECT_TOOLS: dict[str, Callable[[dict], Awaitable[str | None]]] = {
+    "check_availability": check_availability,
+    "get_available_slots": available_slots,
+    "get_menu": menu,
+    "get_opening_hours": opening_hours,
+}
@@ -2,12 +2,21 @@
 """
 MCP Server for Restaurant Booking Agent
 
-Exposes the A2A restaurant agent as tools for Claude Desktop.
+Exposes the A2A restaurant agent as tools for Claude Desktop. Structured
+lookups are answered directly from the calendar service and restaurant data
+(see direct_tools.py); only free-form requests go to the agent.
 """
 
 import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from uuid import uuid4
 
 import httpx
+from direct_tools import DIRECT_TOOLS
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import TextContent, Tool
@@ -15,6 +24,21 @@ from mcp.types import TextContent, Tool
 # Configuration
 AGENT_URL = "https://restaurant-booking-agent.teamwork-mu.net"
 TIMEOUT = 60
+# Kept-alive HTTP/2 connections to the agent, shared by every tool call
+HTTP_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=300)
+MAX_ATTEMPTS = 3
+BASE_DELAY_SECONDS = 0.5
+MAX_DELAY_SECONDS = 4.0
+RETRYABLE_STATUS = {429, 502, 503, 504}
+# Send a second copy of a read still running after the p95 latency (off by default,
+# since every copy costs an agent invocation)
+HEDGE_READS = os.getenv("RESTAURANT_AGENT_HEDGE", "false").lower() == "true"
+LATENCY_WINDOW = 100
+HEDGE_MIN_SAMPLES = 20
+# Tools that only read, so retrying or hedging them cannot book twice
+READ_TOOLS = {"check_availability", "get_available_slots", "get_menu", "get_opening_hours"}
+
+logger = logging.getLogger(__name__)
 
 # Create MCP server
 app = Server("restaurant-booking-agent")
@@ -40,6 +64,21 @@ async def list_tools() -> list[Tool]:
                 "required": ["date", "time", "party_size"],
             },
         ),
+        Tool(
+            name="get_available_slots",
+            description="List free booking times at La Bella Vita for a day",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "date": {
+                        "type": "string",
+                        "description": "Date (e.g., 'Friday', '2024-10-17')",
+                    },
+                    "party_size": {"type": "integer", "description": "Number of guests"},
+                },
+                "required": ["date"],
+            },
+        ),
         Tool(
             name="get_menu",
             description="Get restaurant menu and dish information",
@@ -73,44 +112,198 @@ async def list_tools() -> list[Tool]:
                 "required": ["date", "time", "party_size", "name", "phone"],
             },
         ),
+        Tool(
+            name="ask_restaurant",
+            description="Ask the restaurant agent anything else, in your own words",
+            inputSchema={
+                "type": "object",
+                "properties": {"request": {"type": "string", "description": "Question or request"}},
+                "required": ["request"],
+            },
+        ),
     ]
 
 
-async def call_agent(prompt: str) -> str:
-    """Call the A2A restaurant agent."""
-    async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-        # Simple HTTP call to agent (A2A protocol details abstracted)
-        response = await client.post(
-            f"{AGENT_URL}/a2a/v1/messages",
+class RetryableStatusError(Exception):
+    """An attempt got a throttle or gateway error back."""
+
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+def backoff_delay(attempt: int) -> float:
+    """Return a full-jitter delay before retry number `attempt` (1-based)."""
+    ceiling = min(MAX_DELAY_SECONDS, BASE_DELAY_SECONDS * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)  # noqa: S311
+
+
+class LatencyTracker:
+    """Latencies of recent successful calls."""
+
+    def __init__(self, window: int = LATENCY_WINDOW, min_samples: int = HEDGE_MIN_SAMPLES):
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def p95(self) -> float | None:
+        """The 95th percentile, once there are enough samples to trust it."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class AgentClient:
+    """Shared keep-alive HTTP/2 client for the restaurant agent.
+
+    Reads are retried with jittered backoff on connection errors and
+    throttle/gateway responses, and (with hedging on) a second copy is sent
+    when the first is slower than the recent p95. Other requests are only
+    retried when the connection failed before anything was sent.
+    """
+
+    def __init__(self, base_url: str = AGENT_URL, hedge: bool = HEDGE_READS):
+        self.url = f"{base_url}/a2a/v1/messages"
+        self.hedge = hedge
+        self.latencies = LatencyTracker()
+        self._http_client: httpx.AsyncClient | None = None
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Pooled HTTP/2 client, created on first use inside the running event loop."""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(http2=True, timeout=TIMEOUT, limits=HTTP_LIMITS)
+        return self._http_client
+
+    async def _attempt(self, prompt: str, message_id: str, attempt: str) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.http_client.post(
+            self.url,
             json={
                 "kind": "message",
                 "role": "user",
                 "parts": [{"kind": "text", "text": prompt}],
-                "message_id": "mcp-request",
+                "message_id": message_id,
             },
+            headers={"X-Request-Id": message_id, "X-Request-Attempt": attempt},
         )
+        if response.status_code in RETRYABLE_STATUS:
+            raise RetryableStatusError(response)
+        self.latencies.record(time.perf_counter() - started)
+        return response
+
+    async def _hedged(self, prompt: str, message_id: str, attempt: str) -> httpx.Response:
+        """Send once, and again if the first copy outlives the p95 latency."""
+        first = asyncio.create_task(self._attempt(prompt, message_id, attempt))
+        threshold = self.latencies.p95() if self.hedge else None
+        if threshold is None:
+            return await first
+
+        done, _ = await asyncio.wait({first}, timeout=threshold)
+        if done:
+            return first.result()
+        logger.info(f"Hedging request {message_id} after {threshold:.2f}s")
+        second = asyncio.create_task(self._attempt(prompt, message_id, f"{attempt}-hedge"))
+        pending = {first, second}
+        error: BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error  # type: ignore[misc]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def post(self, prompt: str, idempotent: bool = False) -> httpx.Response:
+        """Send a prompt to the agent.
 
-        if response.status_code == 200:
-            data = response.json()
-            # Extract text from response
-            if isinstance(data, dict) and "parts" in data:
-                text_parts = [p.get("text", "") for p in data["parts"] if p.get("kind") == "text"]
-                return " ".join(text_parts)
-            return str(data)
+        Args:
+            prompt: Message text
+            idempotent: The request only reads, so it may be retried and hedged
 
-        return f"Error: {response.status_code}"
+        Returns:
+            The agent's response (a throttle or gateway error once retries run out)
+
+        Raises:
+            httpx.HTTPError: If the agent could not be reached
+        """
+        # Retries and hedges resend the same message ID, so the agent can drop
+        # duplicates; the X-Request-Attempt header tells the copies apart
+        message_id = uuid4().hex
+        attempt = 1
+        while True:
+            try:
+                if idempotent:
+                    return await self._hedged(prompt, message_id, str(attempt))
+                return await self._attempt(prompt, message_id, str(attempt))
+            except (httpx.TransportError, RetryableStatusError) as e:
+                # A write is only safe to resend if it never left this machine
+                retryable = idempotent or isinstance(e, httpx.ConnectError)
+                if not retryable or attempt >= MAX_ATTEMPTS:
+                    if isinstance(e, RetryableStatusError):
+                        return e.response
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"Agent call failed ({e!r}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+
+agent = AgentClient()
+
+
+async def call_agent(prompt: str, idempotent: bool = False) -> str:
+    """Call the A2A restaurant agent."""
+    response = await agent.post(prompt, idempotent)
+
+    if response.status_code == 200:
+        data = response.json()
+        # Extract text from response
+        if isinstance(data, dict) and "parts" in data:
+            text_parts = [p.get("text", "") for p in data["parts"] if p.get("kind") == "text"]
+            return " ".join(text_parts)
+        return str(data)
+
+    return f"Error: {response.status_code}"
 
 
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     """Handle tool calls."""
 
+    # Structured lookups: one call to the calendar service or the data files
+    direct = DIRECT_TOOLS.get(name)
+    if direct:
+        result = await direct(arguments)
+        if result is not None:
+            return [TextContent(type="text", text=result)]
+
+    # Free-form requests (or arguments too loose to look up directly) go to the agent
     if name == "check_availability":
         prompt = (
             f"Is there a table available for {arguments['party_size']} people "
             f"on {arguments['date']} at {arguments['time']}?"
         )
 
+    elif name == "get_available_slots":
+        prompt = f"What times are free on {arguments['date']}"
+        if arguments.get("party_size"):
+            prompt += f" for {arguments['party_size']} people"
+        prompt += "?"
+
     elif name == "get_menu":
         query = arguments.get("query", "")
         prompt = f"What's on the menu? {query}" if query else "What's on the menu?"
@@ -125,19 +318,25 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             f"Name: {arguments['name']}, Phone: {arguments['phone']}"
         )
 
+    elif name == "ask_restaurant":
+        prompt = arguments["request"]
+
     else:
         return [TextContent(type="text", text=f"Unknown tool: {name}")]
 
     # Call the agent
-    result = await call_agent(prompt)
+    result = await call_agent(prompt, idempotent=name in READ_TOOLS)
 
     return [TextContent(type="text", text=result)]
 
 
 async def main():
     """Run the MCP server."""
-    async with stdio_server() as (read_stream, write_stream):
-        await app.run(read_stream, write_stream, app.create_initialization_options())
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await app.run(read_stream, write_stream, app.create_initialization_options())
+    finally:
+        await agent.aclose()
 
 
 if __name__ == "__main__":
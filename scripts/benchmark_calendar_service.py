@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Benchmark booking conversations against the local calendar service.
+
+Each simulated conversation checks availability for an evening, reserves a
+slot (falling back to a suggested alternative) and lists the customer's
+bookings. No Google Calendar or Gateway access is needed.
+
+Usage:
+    python scripts/benchmark_calendar_service.py --conversations 500 --concurrency 50
+    python scripts/benchmark_calendar_service.py --latency-ms 80 --error-rate 0.02
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "lambda" / "calendar_service"))
+
+from availability import DEFAULT_TZ, parse_datetime  # noqa: E402
+from capacity import allocate, event_booking, get_tables  # noqa: E402
+from local_service import LocalCalendarBackend, LocalCalendarService  # noqa: E402
+
+CALENDAR_ID = "benchmark"
+
+
+def book(service: LocalCalendarService, index: int, day: date) -> tuple[float, str]:
+    """Run one booking conversation and return its duration and outcome."""
+    phone = f"+2305{index:07d}"
+    evening = random.choice(["18:00", "18:30", "19:00", "19:30", "20:00"])  # noqa: S311
+    party_size = random.choice([2, 2, 2, 3, 4, 4, 5, 6, 8])  # noqa: S311
+    started = time.perf_counter()
+
+    batch = service.invoke(
+        "checkAvailabilityBatch",
+        {
+            "calendarId": CALENDAR_ID,
+            "timeMin": f"{day}T17:00:00+04:00",
+            "timeMax": f"{day}T23:00:00+04:00",
+            "dailyStart": "17:00",
+            "dailyEnd": "23:00",
+            "partySize": party_size,
+        },
+    )
+    if not batch.get("success"):
+        return time.perf_counter() - started, "error"
+
+    start = parse_datetime(f"{day}T{evening}:00+04:00")
+    request = {
+        "calendarId": CALENDAR_ID,
+        "summary": f"Restaurant Booking - guest {index}",
+        "start": start.isoformat(),
+        "end": (start + timedelta(hours=2)).isoformat(),
+        "customerPhone": phone,
+        "partySize": party_size,
+        "reservationKey": f"bench-{index}",
+    }
+    result = service.invoke("reserveSlot", request)
+    if result.get("success") and not result.get("reserved") and result.get("alternatives"):
+        result = service.invoke("reserveSlot", {**request, **result["alternatives"][0]})
+
+    service.invoke("listEvents", {"calendarId": CALENDAR_ID, "customerPhone": phone})
+    if not result.get("success"):
+        return time.perf_counter() - started, "error"
+    return time.perf_counter() - started, "reserved" if result["reserved"] else "full"
+
+
+def count_overbooked(backend: LocalCalendarBackend) -> int:
+    """Count bookings that cannot be given a table."""
+    items = backend.events().list(calendarId=CALENDAR_ID).execute()["items"]
+    bookings = [booking for booking in map(event_booking, items) if booking is not None]
+    return len(allocate(get_tables(), bookings)[1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--days", type=int, default=7, help="Spread bookings over N days")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    args = parser.parse_args()
+
+    backend = LocalCalendarBackend(latency_ms=args.latency_ms, error_rate=args.error_rate)
+    service = LocalCalendarService(backend)
+    first_day = datetime.now(DEFAULT_TZ).date() + timedelta(days=1)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(
+            pool.map(
+                lambda i: book(service, i, first_day + timedelta(days=i % args.days)),
+                range(args.conversations),
+            )
+        )
+    elapsed = time.perf_counter() - started
+
+    # Count with faults disabled so the check itself cannot fail
+    backend.latency_ms = backend.error_rate = 0
+    durations = sorted(duration * 1000 for duration, _ in results)
+    outcomes = [outcome for _, outcome in results]
+
+    print(f"Conversations: {args.conversations} (concurrency {args.concurrency})")
+    print(f"Throughput:    {args.conversations / elapsed:.1f} conversations/s")
+    print(f"Latency p50:   {statistics.median(durations):.1f} ms")
+    print(f"Latency p95:   {durations[int(len(durations) * 0.95) - 1]:.1f} ms")
+    for outcome in ("reserved", "full", "error"):
+        print(f"{outcome.capitalize() + ':':<15}{outcomes.count(outcome)}")
+    print(f"Overbooked:    {count_overbooked(backend)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Benchmark WhatsApp orchestrator cold starts.
+
+Each run starts a fresh interpreter, imports the orchestrator (init) and
+handles one WhatsApp message (first invoke). AWS calls are answered in
+process, so only the Lambda's own code, imports and client creation are
+timed. Pass a git revision to compare against the orchestrator as it was.
+
+Usage:
+    python scripts/benchmark_cold_start.py --runs 20
+    python scripts/benchmark_cold_start.py --baseline HEAD~1
+    python scripts/benchmark_cold_start.py --importtime
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+# Runs inside the fresh interpreter, with the Lambda directory on sys.path
+HARNESS = """
+import io, json, sys, time
+started = time.perf_counter()
+import whatsapp_orchestrator
+imported = time.perf_counter()
+
+from botocore.client import BaseClient
+from botocore.response import StreamingBody
+
+def answer(self, operation_name, api_params):
+    if operation_name == "InvokeAgentRuntime":
+        body = json.dumps({"result": "Your table for 2 is booked."}).encode()
+        stream = StreamingBody(io.BytesIO(body), len(body))
+        return {"contentType": "application/json", "response": stream}
+    return {"messageId": "wamid.reply", "Successful": [], "Failed": []}
+
+BaseClient._make_api_call = answer
+whatsapp_orchestrator.handler(json.loads(sys.argv[1]), None)
+finished = time.perf_counter()
+timings = {"init_ms": imported - started, "invoke_ms": finished - imported}
+print(json.dumps({key: seconds * 1000 for key, seconds in timings.items()}))
+"""
+
+EVENT = {
+    "Records": [
+        {
+            "Sns": {
+                "Message": json.dumps(
+                    {
+                        "whatsAppWebhookEntry": json.dumps(
+                            {
+                                "changes": [
+                                    {
+                                        "value": {
+                                            "contacts": [
+                                                {"wa_id": "2305000000", "profile": {"name": "A"}}
+                                            ],
+                                            "messages": [
+                                                {
+                                                    "from": "2305000000",
+                                                    "id": "wamid.benchmark",
+                                                    "timestamp": "1760000000",
+                                                    "type": "text",
+                                                    "text": {"body": "Table for 2 tonight?"},
+                                                }
+                                            ],
+                                        }
+                                    }
+                                ]
+                            }
+                        ),
+                        "context": {"MetaPhoneNumberIds": [{"arn": "arn:aws:phone/benchmark"}]},
+                    }
+                )
+            }
+        }
+    ]
+}
+
+ENV = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "benchmark",
+    "AWS_SECRET_ACCESS_KEY": "benchmark",
+    "AWS_EC2_METADATA_DISABLED": "true",
+    # No X-Ray daemon or Lambda segment outside Lambda
+    "AWS_XRAY_CONTEXT_MISSING": "IGNORE_ERROR",
+    "AGENTCORE_RUNTIME_ARN": "arn:aws:bedrock-agentcore:us-east-1:123456789012:runtime/bench",
+    "COALESCE_WINDOW_SECONDS": "0",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def export_lambda(revision: str, target: Path) -> Path:
+    """Extract the lambda/ directory of a git revision."""
+    archive = subprocess.run(  # noqa: S603
+        ["git", "archive", revision, "lambda"],  # noqa: S607
+        cwd=project_root,
+        check=True,
+        capture_output=True,
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(target, filter="data")
+    return target / "lambda"
+
+
+def run_once(lambda_dir: Path) -> dict[str, float]:
+    """Time init and first invoke in a fresh interpreter."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", HARNESS, json.dumps(EVENT)],
+        cwd=lambda_dir,
+        env={**os.environ, **ENV, "PYTHONPATH": str(lambda_dir)},
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(label: str, lambda_dir: Path, runs: int) -> None:
+    """Print median and worst init and first-invoke durations."""
+    samples = [run_once(lambda_dir) for _ in range(runs)]
+    for key, name in (("init_ms", "init"), ("invoke_ms", "first invoke")):
+        values = [sample[key] for sample in samples]
+        print(
+            f"{label:>10} {name:<13} median {statistics.median(values):7.1f} ms"
+            f"   max {max(values):7.1f} ms"
+        )
+
+
+def import_profile(lambda_dir: Path, top: int) -> None:
+    """Print the orchestrator's direct imports with the largest cumulative import time."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import whatsapp_orchestrator"],
+        cwd=lambda_dir,
+        env={**os.environ, **ENV, "PYTHONPATH": str(lambda_dir)},
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        # Nesting is shown as two spaces per level after the separator
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            modules.append((int(cumulative), name.strip()))
+    print(f"\nTop {top} imports by cumulative time:")
+    for cumulative, name in sorted(modules, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:7.1f} ms  {name}")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--baseline", help="git revision to compare against (e.g. HEAD~1)")
+    parser.add_argument("--importtime", action="store_true", help="show the import profile")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    current = project_root / "lambda"
+    print(f"Cold starts over {args.runs} fresh interpreters")
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = export_lambda(args.baseline, Path(tmp))
+            measure(args.baseline, baseline, args.runs)
+            if args.importtime:
+                import_profile(baseline, args.top)
+    measure("current", current, args.runs)
+    if args.importtime:
+        import_profile(current, args.top)
+
+
+if __name__ == "__main__":
+    main()
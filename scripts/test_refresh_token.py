@@ -4,14 +4,13 @@
 import sys
 from pathlib import Path
 
-# Add project root to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+# The MCP server imports its sibling modules directly
+sys.path.insert(0, str(Path(__file__).parent.parent / "mcp_server"))
 
-# Load .env
+from a2a_orchestrator_mcp import get_cognito_token
 from dotenv import load_dotenv
 
-from mcp_server.a2a_orchestrator_mcp import get_cognito_token
-
+# Load .env
 load_dotenv()
 
 try:
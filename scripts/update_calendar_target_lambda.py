@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-"""Update Gateway to use Calendar Lambda with checkAvailability tool."""
+"""Update Gateway to use Calendar Lambda with availability tools."""
 
 import json
 import logging
@@ -15,6 +15,136 @@ CONFIG_FILE = Path(__file__).parent.parent / "gateway_config.json"
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Tools exposed by the Calendar Lambda (mirrors config/google_calendar_openapi.json)
+CALENDAR_TOOL_SCHEMA = [
+    {
+        "name": "checkAvailability",
+        "description": "Check if a table is free for the party during a time slot",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "calendarId": {"type": "string", "description": "Calendar ID"},
+                "start": {"type": "string", "description": "Start time ISO 8601"},
+                "end": {"type": "string", "description": "End time ISO 8601"},
+                "partySize": {"type": "integer", "description": "Number of guests (default 2)"},
+            },
+            "required": ["calendarId", "start", "end"],
+        },
+    },
+    {
+        "name": "checkAvailabilityBatch",
+        "description": (
+            "Check many time windows in one call, either a list of windows or every "
+            "window in a date range (e.g. any evening next week)"
+        ),
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "calendarId": {"type": "string", "description": "Calendar ID"},
+                "windows": {
+                    "type": "array",
+                    "description": "Candidate windows [{start, end}] in ISO 8601",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "start": {"type": "string"},
+                            "end": {"type": "string"},
+                        },
+                        "required": ["start", "end"],
+                    },
+                },
+                "timeMin": {"type": "string", "description": "Range start ISO 8601"},
+                "timeMax": {"type": "string", "description": "Range end ISO 8601"},
+                "duration": {"type": "integer", "description": "Duration in minutes (default 120)"},
+                "step": {"type": "integer", "description": "Minutes between starts (default 30)"},
+                "dailyStart": {"type": "string", "description": "Earliest daily start HH:MM"},
+                "dailyEnd": {"type": "string", "description": "Latest daily end HH:MM"},
+                "partySize": {"type": "integer", "description": "Number of guests (default 2)"},
+            },
+            "required": ["calendarId"],
+        },
+    },
+    {
+        "name": "reserveSlot",
+        "description": (
+            "Check availability and create the booking in one atomic step. Returns eventId, "
+            "or the conflicting windows with suggested alternatives"
+        ),
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "calendarId": {"type": "string", "description": "Calendar ID"},
+                "summary": {"type": "string", "description": "Event title"},
+                "description": {"type": "string", "description": "Event description"},
+                "start": {"type": "string", "description": "Start time ISO 8601"},
+                "end": {"type": "string", "description": "End time ISO 8601"},
+                "customerPhone": {"type": "string", "description": "Customer phone number"},
+                "partySize": {"type": "integer", "description": "Number of guests (default 2)"},
+                "reservationKey": {
+                    "type": "string",
+                    "description": "Idempotency key; retries with the same key never double-book",
+                },
+            },
+            "required": ["calendarId", "summary", "start", "end"],
+        },
+    },
+    {
+        "name": "getAvailableSlots",
+        "description": "Get available time slots for a date",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "calendarId": {"type": "string", "description": "Calendar ID"},
+                "date": {"type": "string", "description": "Date YYYY-MM-DD"},
+                "duration": {"type": "integer", "description": "Duration in hours (default 2)"},
+                "maxResults": {"type": "integer", "description": "Maximum slots (default 5)"},
+                "partySize": {"type": "integer", "description": "Number of guests (default 2)"},
+            },
+            "required": ["calendarId", "date"],
+        },
+    },
+    {
+        "name": "createEvent",
+        "description": "Create a booking event in Google Calendar",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "calendarId": {"type": "string", "description": "Calendar ID"},
+                "summary": {"type": "string", "description": "Event title"},
+                "description": {"type": "string", "description": "Event description"},
+                "start": {"type": "string", "description": "Start time ISO 8601"},
+                "end": {"type": "string", "description": "End time ISO 8601"},
+            },
+            "required": ["calendarId", "summary", "start", "end"],
+        },
+    },
+    {
+        "name": "listEvents",
+        "description": "List calendar events, optionally for one customer phone or date",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "calendarId": {"type": "string"},
+                "timeMin": {"type": "string"},
+                "timeMax": {"type": "string"},
+                "maxResults": {"type": "integer"},
+                "customerPhone": {"type": "string", "description": "Customer phone number"},
+                "date": {"type": "string", "description": "Date YYYY-MM-DD"},
+            },
+            "required": ["calendarId"],
+        },
+    },
+    {
+        "name": "deleteEvent",
+        "description": "Delete a calendar event",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"calendarId": {"type": "string"}, "eventId": {"type": "string"}},
+            "required": ["calendarId", "eventId"],
+        },
+    },
+]
+
 
 def update_calendar_target():
     """Update Gateway target to use Lambda with new tools."""
@@ -44,12 +174,15 @@ def update_calendar_target():
 
     logger.info("\n🔧 Creating Lambda target...")
 
-    # Create Lambda target - toolkit will handle the schema correctly
+    # Create Lambda target with the calendar tool schema
     target = client.create_mcp_gateway_target(
         gateway=gateway,
         name="CalendarService",
         target_type="lambda",
-        target_payload={"lambdaArn": config["calendar_lambda_arn"]},
+        target_payload={
+            "lambdaArn": config["calendar_lambda_arn"],
+            "toolSchema": {"inlinePayload": CALENDAR_TOOL_SCHEMA},
+        },
     )
 
     # Update config
@@ -59,8 +192,7 @@ def update_calendar_target():
     logger.info("=" * 60)
     logger.info("✅ Calendar Lambda target updated!")
     logger.info(f"Target ID: {target['targetId']}")
-    logger.info("\nℹ️  Note: The Lambda handler already has checkAvailability")
-    logger.info("   and getAvailableSlots implemented.")
+    logger.info(f"Tools: {', '.join(tool['name'] for tool in CALENDAR_TOOL_SCHEMA)}")
     logger.info("\nRedeploy agent to use updated system prompt:")
     logger.info("  uv run agentcore launch")
     logger.info("=" * 60)
@@ -9,15 +9,21 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import httpx
 import uvicorn
+from a2a.server.apps import A2AFastAPIApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import BasePushNotificationSender
+from a2a.types import AgentCapabilities
 from bedrock_agentcore_starter_toolkit.operations.gateway.client import GatewayClient
 from fastapi import FastAPI
 from strands import Agent
 from strands.models import BedrockModel
 from strands.multiagent.a2a import A2AServer
 
+from agents.booking_tasks import BookingTaskExecutor, build_task_stores
 from agents.tools.payment_tool import approve_payment, check_payment_status, request_payment
-from config.runtime_config import get_calendar_id, get_model_id
+from config.runtime_config import get_calendar_id, get_model_id, get_task_table
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,6 +34,8 @@ GATEWAY_CONFIG_PATH = Path(__file__).parent.parent.parent / "gateway_config.json
 runtime_url = os.environ.get("AGENTCORE_RUNTIME_URL", "http://127.0.0.1:9000/")
 logger.info(f"Runtime URL: {runtime_url}")
 
+PUSH_TIMEOUT_SECONDS = 10
+
 
 def load_gateway_tools():
     """Load Gateway tools via MCP"""
@@ -61,23 +69,19 @@ gateway_tools, region = load_gateway_tools()
 calendar_id = get_calendar_id()
 model_id = get_model_id()
 
-strands_agent = Agent(
-    name="La Bella Vita Restaurant Agent",
-    description="Restaurant booking and information agent for La Bella Vita in Mauritius",
-    model=BedrockModel(model_id=model_id, region_name=region),
-    system_prompt=f"""You are La Bella Vita restaurant booking agent.
+SYSTEM_PROMPT = f"""You are La Bella Vita restaurant booking agent.
 
 BOOKING WORKFLOW (MANDATORY):
 When you receive a booking request, you MUST:
 1. Parse: date, time, party size, preferences from request
-2. Call checkAvailability with calendarId="{calendar_id}", start, end times
-3. If available=true: Call createEvent with same parameters
-4. Return ONLY the real eventId from createEvent response
-5. If available=false: Inform user of conflict
+2. Call reserveSlot with calendarId="{calendar_id}", summary, start, end times and partySize
+   (it checks availability and creates the event in one step)
+3. If reserved=true: Return ONLY the real eventId from reserveSlot response
+4. If reserved=false: Inform user of conflict and offer the returned alternatives
 
 PAYMENT WORKFLOW (AP2 Protocol - Human-in-the-Loop):
 For ALL bookings, you MUST request payment deposit:
-1. After successful createEvent, ALWAYS call request_payment
+1. After successful reserveSlot, ALWAYS call request_payment
 2. Amount: $5 USD per person (USDC stablecoin)
 3. Use eventId as booking_id
 4. Return payment details with booking_id to human
@@ -93,26 +97,37 @@ CALENDAR PARAMETERS:
 
 CRITICAL RULES:
 - NEVER fabricate event IDs or confirmations
-- NEVER say "booking confirmed" without calling createEvent
-- ALWAYS wait for createEvent response before confirming
-- If createEvent fails, inform user of the error
+- NEVER say "booking confirmed" without calling reserveSlot
+- ALWAYS wait for reserveSlot response before confirming
+- If reserveSlot fails, inform user of the error
 - Payment is via AP2 protocol (agent-to-agent, not human-to-agent)
 - WAIT for human approval before confirming payment
 
 Example booking flow with payment:
 Request: "Book for Friday 8pm, 6 people"
-1. checkAvailability(calendarId="{calendar_id}",
-   start="2025-10-17T20:00:00+04:00", end="2025-10-17T22:00:00+04:00")
-2. If available: createEvent(calendarId="{calendar_id}",
+1. reserveSlot(calendarId="{calendar_id}",
    summary="Reservation - 6 guests", start="2025-10-17T20:00:00+04:00",
-   end="2025-10-17T22:00:00+04:00")
+   end="2025-10-17T22:00:00+04:00", partySize=6)
+2. If reserved=false: offer the alternatives and stop
 3. request_payment(amount_usd=120.0, booking_id=eventId, description="Deposit for 6 guests")
 4. Return: "Booking created! Event ID: [real-id]
            Payment required: $120 USDC
            Booking ID: [real-id]
-           To complete, approve payment using: approve_payment(booking_id='[real-id]')" """,
-    tools=[*gateway_tools, request_payment, check_payment_status, approve_payment],
-)
+           To complete, approve payment using: approve_payment(booking_id='[real-id]')" """
+
+
+def create_agent() -> Agent:
+    """Create a booking agent; each A2A conversation gets its own."""
+    return Agent(
+        name="La Bella Vita Restaurant Agent",
+        description="Restaurant booking and information agent for La Bella Vita in Mauritius",
+        model=BedrockModel(model_id=model_id, region_name=region),
+        system_prompt=SYSTEM_PROMPT,
+        tools=[*gateway_tools, request_payment, check_payment_status, approve_payment],
+    )
+
+
+strands_agent = create_agent()
 
 host, port = "0.0.0.0", 9000  # noqa: S104 # Required for AgentCore container
 
@@ -123,6 +138,21 @@ a2a_server = A2AServer(
     serve_at_root=True,  # Serves locally at root (/) regardless of remote URL path
 )
 
+# Bookings run as A2A tasks: `blocking: false` returns the task ID at once and
+# each stage (created, payment pending, confirmed) is pushed to the caller's webhook
+task_store, push_config_store = build_task_stores(get_task_table())
+request_handler = DefaultRequestHandler(
+    agent_executor=BookingTaskExecutor(create_agent),
+    task_store=task_store,
+    push_config_store=push_config_store,
+    push_sender=BasePushNotificationSender(
+        httpx.AsyncClient(timeout=PUSH_TIMEOUT_SECONDS), push_config_store
+    ),
+)
+agent_card = a2a_server.public_agent_card.model_copy(
+    update={"capabilities": AgentCapabilities(streaming=True, push_notifications=True)}
+)
+
 # Create FastAPI app with health check
 app = FastAPI()
 
@@ -133,7 +163,7 @@ def ping():
 
 
 # Mount A2A server at root
-app.mount("/", a2a_server.to_fastapi_app())
+app.mount("/", A2AFastAPIApplication(agent_card=agent_card, http_handler=request_handler).build())
 
 if __name__ == "__main__":
     uvicorn.run(app, host=host, port=port)
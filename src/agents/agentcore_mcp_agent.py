@@ -6,7 +6,8 @@
 import json
 import logging
 import os
-import re
+import sys
+from collections.abc import AsyncIterator
 from pathlib import Path
 from typing import Any
 
@@ -25,6 +26,10 @@ from strands_tools import current_time
 from .hooks import LongTermMemoryHook, MemoryConfig
 from .tools import search_restaurant_info
 
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "lambda"))
+
+from thinking import split_thinking, strip_thinking  # noqa: E402
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -43,20 +48,22 @@ GOOGLE_CALENDAR_ID = os.getenv(
 
 # Gateway configuration
 GATEWAY_CONFIG_PATH = Path(__file__).parent.parent.parent / "gateway_config.json"
+# Serve calendar tools from the in-process stand-in (offline runs, load tests)
+LOCAL_CALENDAR = os.getenv("LOCAL_CALENDAR", "false").lower() == "true"
 
 # Create boto3 session with correct region
 boto_session = boto3.Session(region_name=AWS_REGION)
 
 
+# Streamed text from one agent cycle is held until it is this long (or the cycle
+# ends), so chatter before a tool call is not sent as part of the answer
+ANSWER_MIN_CHARS = 160
+
+
 def clean_response(text: str) -> str:
     """Remove <think> and <thinking> tags and internal reasoning from response."""
-    # Remove <think>...</think> and <thinking>...</thinking> blocks (including multiline)
-    cleaned = re.sub(
-        r"<think(?:ing)?>.*?</think(?:ing)?>", "", text, flags=re.DOTALL | re.IGNORECASE
-    )
-    # Remove extra whitespace/newlines left behind
-    cleaned = re.sub(r"\n\s*\n\s*\n", "\n\n", cleaned)
-    return cleaned.strip()
+    # Same stripping as the WhatsApp chunker (lambda/thinking.py)
+    return strip_thinking(text)
 
 
 def get_gateway_token() -> str | None:
@@ -77,6 +84,13 @@ def create_gateway_transport(gateway_url: str, token: str) -> Any:
 
 def get_gateway_tools() -> tuple[list, Any | None]:
     """Load tools from Gateway and return tools + MCP client."""
+    if LOCAL_CALENDAR:
+        # Imported lazily so Gateway deployments never load the stand-in
+        from .tools.local_calendar_tool import LOCAL_CALENDAR_TOOLS  # noqa: PLC0415
+
+        logger.info("Using local calendar service instead of Gateway tools")
+        return list(LOCAL_CALENDAR_TOOLS), None
+
     try:
         if not GATEWAY_CONFIG_PATH.exists():
             logger.warning("Gateway config not found, skipping Gateway tools")
@@ -121,10 +135,11 @@ BUSINESS HOURS:
 
 BOOKING MANAGEMENT:
 **CRITICAL BOOKING RULES - MUST FOLLOW**:
-1. ALWAYS use checkAvailability tool BEFORE createEvent - NO EXCEPTIONS
+1. ALWAYS book with the reserveSlot tool - it checks availability and creates the event
+   in one step - NO EXCEPTIONS
 2. NEVER use listEvents for availability checking - use checkAvailability instead
-3. If checkAvailability returns available=false, DO NOT create booking
-4. Only call createEvent after checkAvailability confirms available=true
+3. If reserveSlot returns reserved=false, no table fits the party - DO NOT retry the same time
+4. NEVER call createEvent directly for customer bookings
 5. ALWAYS use calendarId: {GOOGLE_CALENDAR_ID}
 6. NEVER use "primary" as calendar ID
 7. Default booking duration: 2 hours
@@ -136,20 +151,20 @@ BOOKING MANAGEMENT:
 **Booking Process (STRICT ORDER - NO SHORTCUTS ALLOWED)**:
 1. Collect: customer name, date, time, party size (phone is already known)
 2. Verify time is within business hours
-3. **MANDATORY STEP 1**: Call checkAvailability with calendarId, start, and end times
-4. **WAIT** for checkAvailability response
-5. If available=false: inform customer of conflict, suggest alternatives, **STOP - DO NOT PROCEED**
-6. If available=true: **MANDATORY STEP 2**: Call createEvent tool with exact same parameters
-7. **WAIT** for createEvent response containing eventId
-8. **ONLY AFTER** receiving real eventId from createEvent: confirm booking
-9. Confirmation format: "Booking confirmed! Event ID: [real-eventId-from-response]"
+3. **MANDATORY STEP**: Call reserveSlot with calendarId, summary, description, start, end,
+   customerPhone and partySize
+4. **WAIT** for reserveSlot response
+5. If reserved=false: inform customer of conflict, offer the returned alternatives,
+   **STOP - DO NOT PROCEED**
+6. If reserved=true: the booking exists - use the eventId from the response
+7. Confirmation format: "Booking confirmed! Event ID: [real-eventId-from-response]"
 
 **ABSOLUTE PROHIBITIONS**:
-- NEVER say "booking confirmed" without calling createEvent first
+- NEVER say "booking confirmed" without a reserveSlot response with reserved=true
 - NEVER fabricate event IDs (they look like: abc123xyz456)
-- NEVER skip the createEvent tool call
+- NEVER skip the reserveSlot tool call
 - NEVER assume booking succeeded without seeing the eventId response
-- If you don't have a real eventId from createEvent response, say
+- If you don't have a real eventId from reserveSlot response, say
   "I need to create the booking first"
 
 **Event Format**:
@@ -159,14 +174,20 @@ BOOKING MANAGEMENT:
 
 **Smart Availability Proposals**:
 - Use getAvailableSlots tool when customer asks for available times
+- ALWAYS pass partySize to getAvailableSlots, checkAvailability and checkAvailabilityBatch -
+  availability depends on free tables large enough for the party
 - Queries: "show me available times", "when are you free", "what times are open"
 - Provide 3-5 available time slots
 - Format: "Available times for [date]: 6:00 PM, 6:30 PM, 7:30 PM, 8:00 PM, 9:00 PM"
 - If customer's preferred time is unavailable, proactively suggest alternatives using this tool
+- For flexible requests across several days ("any evening next week for 6"), call
+  checkAvailabilityBatch ONCE with timeMin/timeMax and dailyStart/dailyEnd instead of
+  calling checkAvailability for each day
 
 **Listing Bookings**:
 - Use listEvents tool to show existing bookings
-- Filter by date range (default: upcoming bookings)
+- For "my bookings", filter with customerPhone set to the customer's WhatsApp number
+- Filter by date (YYYY-MM-DD) or date range (default: upcoming bookings)
 - Show: booking ID, customer name, date/time, party size
 - Format results clearly for customer
 
@@ -180,7 +201,7 @@ BOOKING MANAGEMENT:
 IMPORTANT RULES:
 1. ALWAYS use current_time tool first when user mentions relative dates (today, tomorrow, next week)
 2. ALWAYS use search_restaurant_info for restaurant questions
-3. ALWAYS check availability before booking
+3. ALWAYS book through reserveSlot so availability is checked atomically
 4. Reject bookings outside business hours
 5. Be helpful when conflicts occur - proactively suggest available times
 6. For cancellations, confirm which booking before deleting
@@ -214,9 +235,52 @@ RESPONSE FORMAT:
     )
 
 
+def visible_text(raw: str, final: bool = False) -> str:
+    """The part of streamed text that is surely outside <think> blocks."""
+    return split_thinking(raw, final)[0].lstrip()
+
+
+async def stream_reply(agent: Agent, user_message: str) -> AsyncIterator[str]:
+    """Yield the answer's text deltas as the agent generates them.
+
+    Like the non-streaming reply (the final message only), text a cycle writes
+    before calling a tool ("Let me check.") is left out: each cycle's text is
+    held until it is long enough to be the answer. If a tool call still follows
+    text already sent, a paragraph break separates it from the next cycle's.
+    <think> blocks are removed as `clean_response` does.
+    """
+    raw, sent, separate = "", 0, False
+    async for event in agent.stream_async(user_message):
+        if "data" in event:
+            raw += event["data"]
+            visible = visible_text(raw)
+            if sent or len(visible.strip()) >= ANSWER_MIN_CHARS:
+                if separate and not sent:
+                    yield "\n\n"
+                    separate = False
+                yield visible[sent:]
+                sent = len(visible)
+        elif "current_tool_use" in event and raw:
+            # This cycle calls a tool, so its text was not the answer
+            separate = separate or bool(sent)
+            raw, sent = "", 0
+
+    rest = visible_text(raw, final=True).rstrip()[sent:]
+    if rest.strip():
+        if separate and not sent:
+            yield "\n\n"
+        yield rest
+
+
 @app.entrypoint
-def invoke(payload: dict[str, Any], context: RequestContext | None = None) -> dict[str, Any]:
-    """AgentCore entrypoint with persistent memory and Gateway tools."""
+def invoke(
+    payload: dict[str, Any], context: RequestContext | None = None
+) -> dict[str, Any] | AsyncIterator[str]:
+    """AgentCore entrypoint with persistent memory and Gateway tools.
+
+    With `"stream": true` in the payload, the reply is streamed as server-sent
+    events of text deltas instead of returned whole.
+    """
     user_message = payload.get("prompt", "Hello")
     actor_id = payload.get("actor_id", "default-user")
     session_id = (
@@ -229,6 +293,8 @@ def invoke(payload: dict[str, Any], context: RequestContext | None = None) -> di
 
     try:
         agent = create_agent(actor_id, session_id)
+        if payload.get("stream"):
+            return stream_reply(agent, user_message)
         result = agent(user_message)
 
         if hasattr(result, "message") and hasattr(result.message, "content"):
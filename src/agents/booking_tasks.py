@@ -0,0 +1,232 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Async A2A task mode for bookings and payment approval.
+
+A booking request becomes an A2A task that moves from created (submitted)
+to payment pending (input-required) to confirmed (completed). Callers that
+send `blocking: false` with a push notification config get the task ID
+back straight away, while the booking runs in the background. Every status
+change is saved to the task store and POSTed to their webhook. The payment
+approval is sent as a follow-up message on the same task.
+
+Tasks and push configs live in the DynamoDB table from the a2a-task-table
+parameter, so they survive the runtime being recycled. Without it they are
+kept in memory (local development).
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+import boto3
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.context import ServerCallContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import (
+    InMemoryPushNotificationConfigStore,
+    InMemoryTaskStore,
+    PushNotificationConfigStore,
+    TaskStore,
+    TaskUpdater,
+)
+from a2a.types import Part, PushNotificationConfig, Task, TaskState, TextPart
+from boto3.dynamodb.conditions import Key
+
+logger = logging.getLogger(__name__)
+
+# Tasks (and their webhooks) are kept for a week after their last update
+TASK_TTL_SECONDS = 7 * 24 * 60 * 60
+TASK_ITEM = "task"
+PUSH_PREFIX = "push#"
+REPLY_ARTIFACT = "reply"
+# Conversations (agent and history) kept per A2A context, least recently used dropped
+MAX_CONVERSATIONS = 256
+
+# The agent's payment request ("Payment required: ... approve_payment(booking_id='...')")
+PAYMENT_PENDING = re.compile(r"Payment required|approve_payment\(booking_id=", re.IGNORECASE)
+BOOKING_ID_PATTERN = re.compile(r"Booking ID:\s*\**\s*([\w-]+)|booking_id='([\w-]+)'")
+# approve_payment's success ("Payment approved ...", "Payment already confirmed ...")
+PAYMENT_APPROVED = re.compile(
+    r"Payment (?:was |has been |is |already )?(?:approved|confirmed)", re.I
+)
+
+
+class DynamoDBTaskStore(TaskStore):
+    """A2A tasks in DynamoDB, one item per task (pk=task ID, sk="task")."""
+
+    def __init__(self, table: Any) -> None:
+        self.table = table
+
+    async def save(self, task: Task, _context: ServerCallContext | None = None) -> None:
+        item = {
+            "pk": task.id,
+            "sk": TASK_ITEM,
+            "task": task.model_dump_json(exclude_none=True),
+            "state": task.status.state.value,
+            "expires_at": int(time.time()) + TASK_TTL_SECONDS,
+        }
+        await asyncio.to_thread(self.table.put_item, Item=item)
+
+    async def get(self, task_id: str, _context: ServerCallContext | None = None) -> Task | None:
+        response = await asyncio.to_thread(
+            self.table.get_item, Key={"pk": task_id, "sk": TASK_ITEM}
+        )
+        item = response.get("Item")
+        return Task.model_validate_json(item["task"]) if item else None
+
+    async def delete(self, task_id: str, _context: ServerCallContext | None = None) -> None:
+        await asyncio.to_thread(self.table.delete_item, Key={"pk": task_id, "sk": TASK_ITEM})
+
+
+class DynamoDBPushConfigStore(PushNotificationConfigStore):
+    """Push webhooks in DynamoDB, next to their task (sk="push#<config ID>")."""
+
+    def __init__(self, table: Any) -> None:
+        self.table = table
+
+    async def set_info(self, task_id: str, notification_config: PushNotificationConfig) -> None:
+        # Configs without an ID are keyed by the task ID, as the in-memory store does
+        config_id = notification_config.id or task_id
+        config = notification_config.model_copy(update={"id": config_id})
+        item = {
+            "pk": task_id,
+            "sk": f"{PUSH_PREFIX}{config_id}",
+            "config": config.model_dump_json(exclude_none=True),
+            "expires_at": int(time.time()) + TASK_TTL_SECONDS,
+        }
+        await asyncio.to_thread(self.table.put_item, Item=item)
+
+    async def get_info(self, task_id: str) -> list[PushNotificationConfig]:
+        return [
+            PushNotificationConfig.model_validate_json(item["config"])
+            for item in await self._items(task_id)
+        ]
+
+    async def delete_info(self, task_id: str, config_id: str | None = None) -> None:
+        if config_id is not None:
+            keys = [f"{PUSH_PREFIX}{config_id}"]
+        else:
+            keys = [item["sk"] for item in await self._items(task_id)]
+        for sk in keys:
+            await asyncio.to_thread(self.table.delete_item, Key={"pk": task_id, "sk": sk})
+
+    async def _items(self, task_id: str) -> list[dict]:
+        response = await asyncio.to_thread(
+            self.table.query,
+            KeyConditionExpression=Key("pk").eq(task_id) & Key("sk").begins_with(PUSH_PREFIX),
+        )
+        return response.get("Items", [])
+
+
+def build_task_stores(table_name: str) -> tuple[TaskStore, PushNotificationConfigStore]:
+    """Task and push config stores: DynamoDB if a table is configured, else in memory."""
+    if not table_name:
+        logger.warning("No A2A task table configured, A2A tasks are kept in memory")
+        return InMemoryTaskStore(), InMemoryPushNotificationConfigStore()
+    table = boto3.resource("dynamodb").Table(table_name)
+    return DynamoDBTaskStore(table), DynamoDBPushConfigStore(table)
+
+
+class Conversation(NamedTuple):
+    """The agent holding one A2A context's history, and the lock its turns take."""
+
+    agent: Any
+    lock: asyncio.Lock
+
+
+class BookingTaskExecutor(AgentExecutor):
+    """Run the booking agent for an A2A task, reporting booking stages as task states.
+
+    - created: the task is submitted (a non-blocking caller gets it back now)
+    - payment_pending: the agent asked for a deposit; the task waits for input
+    - confirmed: the payment approval on the same task went through
+    - payment_failed: the approval did not go through; the task waits for another
+
+    The stage is in the status update metadata, next to the booking ID.
+    """
+
+    def __init__(
+        self, agent_factory: Callable[[], Any], max_conversations: int = MAX_CONVERSATIONS
+    ) -> None:
+        """Initialize the executor.
+
+        Args:
+            agent_factory: Creates a Strands agent (invoked with `invoke_async`)
+                for each A2A context
+            max_conversations: Contexts whose agent is kept
+        """
+        self.agent_factory = agent_factory
+        self.max_conversations = max_conversations
+        self._conversations: OrderedDict[str, Conversation] = OrderedDict()
+
+    def conversation(self, context_id: str) -> Conversation:
+        """Return the context's conversation, creating it on its first turn."""
+        conversation = self._conversations.get(context_id)
+        if conversation is None:
+            conversation = Conversation(self.agent_factory(), asyncio.Lock())
+            self._conversations[context_id] = conversation
+        self._conversations.move_to_end(context_id)
+        while len(self._conversations) > self.max_conversations:
+            self._conversations.popitem(last=False)
+        return conversation
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        task = context.current_task
+        awaiting_payment = task is not None and task.status.state == TaskState.input_required
+        if task is None:
+            await updater.update_status(TaskState.submitted, metadata={"stage": "created"})
+        await updater.start_work()
+
+        try:
+            # Turns of one conversation run one at a time; other contexts run alongside
+            conversation = self.conversation(context.context_id)
+            async with conversation.lock:
+                result = await conversation.agent.invoke_async(context.get_user_input())
+        except Exception as e:
+            logger.exception(f"Booking task {context.task_id} failed")
+            await updater.failed(updater.new_agent_message([Part(TextPart(text=f"Error: {e}"))]))
+            return
+
+        reply = str(result)
+        parts = [Part(TextPart(text=reply))]
+        metadata: dict[str, Any] = {}
+        match = BOOKING_ID_PATTERN.search(reply)
+        if match:
+            metadata["booking_id"] = match.group(1) or match.group(2)
+
+        # Clients read the reply from the artifacts; each turn replaces the last one
+        await updater.add_artifact(parts, artifact_id=REPLY_ARTIFACT, name="reply")
+        if awaiting_payment and not PAYMENT_APPROVED.search(reply):
+            # Not confirmed: the caller can approve again on the same task
+            await updater.update_status(
+                TaskState.input_required,
+                message=updater.new_agent_message(parts),
+                final=True,
+                metadata={**metadata, "stage": "payment_failed"},
+            )
+            return
+        if PAYMENT_PENDING.search(reply):
+            # The task stays open; approve_payment continues it
+            await updater.update_status(
+                TaskState.input_required,
+                message=updater.new_agent_message(parts),
+                final=True,
+                metadata={**metadata, "stage": "payment_pending"},
+            )
+            return
+
+        await updater.update_status(
+            TaskState.completed,
+            final=True,
+            metadata={**metadata, "stage": "confirmed" if awaiting_payment else "completed"},
+        )
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.cancel()
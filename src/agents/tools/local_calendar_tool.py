@@ -0,0 +1,237 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Calendar tools backed by the local stand-in calendar service.
+
+Set LOCAL_CALENDAR=true to give the agent these tools instead of the Gateway
+MCP tools. They use the same names and arguments as the OpenAPI operations.
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+from strands.tools import tool
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "lambda" / "calendar_service"))
+
+from local_service import LocalCalendarService  # noqa: E402
+
+_service: LocalCalendarService | None = None
+
+
+def get_local_calendar() -> LocalCalendarService:
+    """Return the local calendar shared by every agent in this process."""
+    global _service  # noqa: PLW0603
+    if _service is None:
+        _service = LocalCalendarService()
+    return _service
+
+
+def _invoke(operation: str, **arguments: Any) -> str:
+    """Run an operation and return its JSON body, dropping unset arguments."""
+    arguments = {key: value for key, value in arguments.items() if value is not None}
+    return json.dumps(get_local_calendar().invoke(operation, arguments))
+
+
+@tool
+def checkAvailability(  # noqa: N802
+    calendarId: str,  # noqa: N803
+    start: str,
+    end: str,
+    partySize: int | None = None,  # noqa: N803
+) -> str:
+    """Check if a table is free for the party during a time slot.
+
+    Args:
+        calendarId: Calendar ID
+        start: Start time in ISO 8601 format
+        end: End time in ISO 8601 format
+        partySize: Number of guests (default 2)
+    """
+    return _invoke(
+        "checkAvailability", calendarId=calendarId, start=start, end=end, partySize=partySize
+    )
+
+
+@tool
+def checkAvailabilityBatch(  # noqa: N802, PLR0913, PLR0917
+    calendarId: str,  # noqa: N803
+    windows: list[dict[str, str]] | None = None,
+    timeMin: str | None = None,  # noqa: N803
+    timeMax: str | None = None,  # noqa: N803
+    duration: int | None = None,
+    step: int | None = None,
+    dailyStart: str | None = None,  # noqa: N803
+    dailyEnd: str | None = None,  # noqa: N803
+    partySize: int | None = None,  # noqa: N803
+) -> str:
+    """Check availability of many candidate windows with one calendar query.
+
+    Args:
+        calendarId: Calendar ID
+        windows: Candidate windows to check, each {"start": ..., "end": ...} in ISO 8601
+            format (alternative to timeMin/timeMax)
+        timeMin: Start of the range in ISO 8601 format
+        timeMax: End of the range in ISO 8601 format
+        duration: Window length in minutes (default 120)
+        step: Minutes between window starts (default 30)
+        dailyStart: Earliest window start each day (HH:MM)
+        dailyEnd: Latest window end each day (HH:MM)
+        partySize: Number of guests (default 2)
+    """
+    return _invoke(
+        "checkAvailabilityBatch",
+        calendarId=calendarId,
+        windows=windows,
+        timeMin=timeMin,
+        timeMax=timeMax,
+        duration=duration,
+        step=step,
+        dailyStart=dailyStart,
+        dailyEnd=dailyEnd,
+        partySize=partySize,
+    )
+
+
+@tool
+def reserveSlot(  # noqa: N802, PLR0913, PLR0917
+    calendarId: str,  # noqa: N803
+    summary: str,
+    start: str,
+    end: str,
+    description: str | None = None,
+    customerPhone: str | None = None,  # noqa: N803
+    partySize: int | None = None,  # noqa: N803
+    reservationKey: str | None = None,  # noqa: N803
+) -> str:
+    """Atomically find a table for the party and create the booking.
+
+    Args:
+        calendarId: Calendar ID
+        summary: Booking title
+        start: Start time in ISO 8601 format
+        end: End time in ISO 8601 format
+        description: Booking details
+        customerPhone: Customer phone number
+        partySize: Number of guests (default 2)
+        reservationKey: Idempotency key; retries with the same key return the same booking
+    """
+    return _invoke(
+        "reserveSlot",
+        calendarId=calendarId,
+        summary=summary,
+        start=start,
+        end=end,
+        description=description,
+        customerPhone=customerPhone,
+        partySize=partySize,
+        reservationKey=reservationKey,
+    )
+
+
+@tool
+def getAvailableSlots(  # noqa: N802, PLR0913, PLR0917
+    calendarId: str,  # noqa: N803
+    date: str,
+    duration: int | None = None,
+    maxResults: int | None = None,  # noqa: N803
+    partySize: int | None = None,  # noqa: N803
+) -> str:
+    """Get free booking slots for a date within opening hours.
+
+    Args:
+        calendarId: Calendar ID
+        date: Date in YYYY-MM-DD format
+        duration: Slot length in hours (default 2)
+        maxResults: Maximum number of slots (default 5)
+        partySize: Number of guests (default 2)
+    """
+    return _invoke(
+        "getAvailableSlots",
+        calendarId=calendarId,
+        date=date,
+        duration=duration,
+        maxResults=maxResults,
+        partySize=partySize,
+    )
+
+
+@tool
+def createEvent(  # noqa: N802
+    calendarId: str,  # noqa: N803
+    summary: str,
+    start: str,
+    end: str,
+    description: str | None = None,
+) -> str:
+    """Create a calendar event.
+
+    Args:
+        calendarId: Calendar ID
+        summary: Event title
+        start: Start time in ISO 8601 format
+        end: End time in ISO 8601 format
+        description: Event description
+    """
+    return _invoke(
+        "createEvent",
+        calendarId=calendarId,
+        summary=summary,
+        start=start,
+        end=end,
+        description=description,
+    )
+
+
+@tool
+def listEvents(  # noqa: N802, PLR0913, PLR0917
+    calendarId: str,  # noqa: N803
+    customerPhone: str | None = None,  # noqa: N803
+    date: str | None = None,
+    timeMin: str | None = None,  # noqa: N803
+    timeMax: str | None = None,  # noqa: N803
+    maxResults: int | None = None,  # noqa: N803
+) -> str:
+    """List bookings, optionally filtered by customer phone or date.
+
+    Args:
+        calendarId: Calendar ID
+        customerPhone: Only bookings for this phone number
+        date: Only bookings on this date (YYYY-MM-DD)
+        timeMin: Lower bound for event start in ISO 8601 format
+        timeMax: Upper bound for event start in ISO 8601 format
+        maxResults: Maximum number of events (default 10)
+    """
+    return _invoke(
+        "listEvents",
+        calendarId=calendarId,
+        customerPhone=customerPhone,
+        date=date,
+        timeMin=timeMin,
+        timeMax=timeMax,
+        maxResults=maxResults,
+    )
+
+
+@tool
+def deleteEvent(calendarId: str, eventId: str) -> str:  # noqa: N802, N803
+    """Delete a calendar event.
+
+    Args:
+        calendarId: Calendar ID
+        eventId: Event ID to delete
+    """
+    return _invoke("deleteEvent", calendarId=calendarId, eventId=eventId)
+
+
+LOCAL_CALENDAR_TOOLS = [
+    checkAvailability,
+    checkAvailabilityBatch,
+    reserveSlot,
+    getAvailableSlots,
+    createEvent,
+    listEvents,
+    deleteEvent,
+]
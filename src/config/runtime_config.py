@@ -24,6 +24,7 @@ def get_runtime_config() -> dict[str, str]:
             "kb_id": os.getenv("RESTAURANT_KB_ID") or "",
             "cognito_client_id": os.getenv("COGNITO_CLIENT_ID") or "",
             "cognito_discovery_url": os.getenv("COGNITO_DISCOVERY_URL") or "",
+            "a2a_task_table": os.getenv("A2A_TASK_TABLE") or "",
         }
 
     ssm = boto3.client("ssm", region_name="us-east-1")
@@ -55,3 +56,8 @@ def get_model_id() -> str:
 def get_kb_id() -> str:
     """Get Knowledge Base ID."""
     return get_runtime_config().get("kb_id", "")
+
+
+def get_task_table() -> str:
+    """Get the DynamoDB table for A2A tasks ("" keeps them in memory)."""
+    return get_runtime_config().get("a2a_task_table", "")
@@ -0,0 +1,539 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for connection reuse in the A2A orchestrator MCP server."""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import AgentCapabilities, AgentCard
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp_server"))
+
+import a2a_orchestrator_mcp  # noqa: E402
+from a2a_orchestrator_mcp import (  # noqa: E402
+    BookingAgentConnection,
+    SessionMap,
+    TokenManager,
+    handle_tool,
+    stream_reply,
+)
+from agent_registry import AgentEndpoint, AgentRegistry  # noqa: E402
+
+from src.agents.booking_tasks import BookingTaskExecutor  # noqa: E402
+
+AGENT_URL = "https://agentcore.example/runtimes/booking/invocations/"
+AGENT_CARD = {
+    "name": "Booking Agent",
+    "description": "Books restaurant tables",
+    "url": AGENT_URL,
+    "version": "1.0.0",
+    "capabilities": {},
+    "defaultInputModes": ["text"],
+    "defaultOutputModes": ["text"],
+    "skills": [],
+}
+
+
+class FakeAgentCore:
+    """Serve the agent card (with ETag) and answer A2A messages."""
+
+    def __init__(self) -> None:
+        self.requests: list[httpx.Request] = []
+        self.reply = "Booked"
+        self.stream: list[dict] | None = None
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.method == "GET":
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, json=AGENT_CARD, headers={"ETag": '"v1"'})
+
+        rpc = json.loads(request.content)
+        if rpc["method"] == "message/stream":
+            events = [{"jsonrpc": "2.0", "id": rpc["id"], "result": e} for e in self.stream or []]
+            body = "".join(f"data: {json.dumps(event)}\n\n" for event in events)
+            return httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})
+
+        task = {
+            "kind": "task",
+            "id": "task-1",
+            "contextId": "context-1",
+            "status": {"state": "completed"},
+            "artifacts": [{"artifactId": "a1", "parts": [{"kind": "text", "text": self.reply}]}],
+        }
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": rpc["id"], "result": task})
+
+    def card_fetches(self) -> list[httpx.Request]:
+        return [request for request in self.requests if request.method == "GET"]
+
+    def messages(self) -> list[httpx.Request]:
+        return [request for request in self.requests if request.method == "POST"]
+
+    def sessions(self) -> list[str]:
+        return [m.headers["X-Amzn-Bedrock-AgentCore-Runtime-Session-Id"] for m in self.messages()]
+
+
+@pytest.fixture
+def agentcore():
+    """Route the orchestrator's booking agent connection to a fake AgentCore."""
+    fake = FakeAgentCore()
+    connection = BookingAgentConnection(AGENT_URL)
+    connection._http_client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+    with (
+        patch.object(a2a_orchestrator_mcp, "booking_agent", connection),
+        patch.object(a2a_orchestrator_mcp, "sessions", SessionMap()),
+        patch.object(a2a_orchestrator_mcp.tokens, "get", AsyncMock(return_value="token-1")),
+    ):
+        yield fake
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_reuse_connection_card_and_client(agentcore):
+    """Test the card is fetched once and the A2A client is shared across calls."""
+    first = await handle_tool("book_restaurant", {"request": "Table for 2 at 7pm"})
+    client = a2a_orchestrator_mcp.booking_agent._client
+    second = await handle_tool("book_restaurant", {"request": "Table for 4 at 8pm"})
+
+    assert first[0].text == second[0].text == "Booked"
+    assert len(agentcore.card_fetches()) == 1
+    assert a2a_orchestrator_mcp.booking_agent._client is client
+    messages = agentcore.messages()
+    assert [m.headers["Authorization"] for m in messages] == ["Bearer token-1"] * 2
+    assert len(set(agentcore.sessions())) == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_card_is_revalidated_with_etag(agentcore):
+    """Test an unchanged card is kept after a 304 and the client is not rebuilt."""
+    a2a_orchestrator_mcp.booking_agent.cards.ttl = 0
+
+    await handle_tool("book_restaurant", {"request": "Table for 2"})
+    client = a2a_orchestrator_mcp.booking_agent._client
+    await handle_tool("book_restaurant", {"request": "Table for 2"})
+
+    fetches = agentcore.card_fetches()
+    assert [fetch.headers.get("If-None-Match") for fetch in fetches] == [None, '"v1"']
+    assert a2a_orchestrator_mcp.booking_agent._client is client
+
+
+@pytest.mark.asyncio
+async def test_client_rebuilt_when_token_rotates(agentcore):
+    """Test a new bearer token gets a new A2A client on the same connection pool."""
+    await handle_tool("book_restaurant", {"request": "Table for 2"})
+    client = a2a_orchestrator_mcp.booking_agent._client
+
+    with patch.object(a2a_orchestrator_mcp.tokens, "get", AsyncMock(return_value="token-2")):
+        await handle_tool("book_restaurant", {"request": "Table for 2"})
+
+    assert a2a_orchestrator_mcp.booking_agent._client is not client
+    assert agentcore.messages()[-1].headers["Authorization"] == "Bearer token-2"
+    assert len(agentcore.card_fetches()) == 1
+
+
+@pytest.mark.asyncio
+async def test_conversation_reuses_runtime_session_until_ttl(agentcore):
+    """Test calls passing back a conversation ID share a session until it expires."""
+    result = await handle_tool("book_restaurant", {"request": "Table for 2"})
+    conversation_id = result[1].text.removeprefix("Conversation ID: ")
+    follow_up = {"request": "Make it 3 people", "conversation_id": conversation_id}
+    await handle_tool("book_restaurant", follow_up)
+    later = time.monotonic() + a2a_orchestrator_mcp.SESSION_TTL_SECONDS + 1
+    with patch.object(a2a_orchestrator_mcp.time, "monotonic", return_value=later):
+        await handle_tool("book_restaurant", follow_up)
+
+    first, second, third = agentcore.sessions()
+    assert first == second
+    assert third != first
+    assert len(first) >= 33
+
+
+@pytest.mark.asyncio
+async def test_payment_approval_reuses_booking_session(agentcore):
+    """Test approve_payment goes to the session that created the booking."""
+    agentcore.reply = "Booking created!\nBooking ID: evt_abc123\nApprove to complete."
+    await handle_tool("book_restaurant", {"request": "Table for 6 tomorrow 7pm"})
+
+    agentcore.reply = "Payment approved"
+    result = await handle_tool("approve_payment", {"booking_id": "evt_abc123"})
+
+    assert result[0].text == "Payment approved"
+    booking_session, approval_session = agentcore.sessions()
+    assert approval_session == booking_session
+
+
+class PaymentAgent:
+    """Ask for a deposit on the booking turn, confirm on the approval turn."""
+
+    def __init__(self) -> None:
+        self.prompts: list[str] = []
+
+    async def invoke_async(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if len(self.prompts) == 1:
+            return (
+                "Booking created!\nPayment required: $10 USDC\nBooking ID: evt-42\n"
+                "To complete, approve payment using: approve_payment(booking_id='evt-42')"
+            )
+        return "Payment approved. Booking evt-42 is confirmed."
+
+
+@pytest.mark.asyncio
+async def test_payment_reply_of_booking_task_reaches_the_orchestrator():
+    """Test the payment request of an input-required booking task is returned to the client."""
+    url = "http://booking-agent/"
+    card = AgentCard(
+        name="Booking Agent",
+        description="Books restaurant tables",
+        url=url,
+        version="1.0.0",
+        capabilities=AgentCapabilities(streaming=True),
+        default_input_modes=["text"],
+        default_output_modes=["text"],
+        skills=[],
+    )
+    agent = PaymentAgent()
+    handler = DefaultRequestHandler(BookingTaskExecutor(lambda: agent), InMemoryTaskStore())
+    server = A2AStarletteApplication(agent_card=card, http_handler=handler).build()
+    connection = BookingAgentConnection(url, auth=False)
+    connection._http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server))
+
+    with (
+        patch.object(a2a_orchestrator_mcp, "booking_agent", connection),
+        patch.object(a2a_orchestrator_mcp, "sessions", SessionMap()),
+        patch.object(a2a_orchestrator_mcp, "booking_agents", SessionMap()),
+    ):
+        booked = await handle_tool("book_restaurant", {"request": "Table for 2 on Friday 8pm"})
+        approved = await handle_tool("approve_payment", {"booking_id": "evt-42"})
+        booking_agent_url = a2a_orchestrator_mcp.booking_agents.find("evt-42")
+    await connection.aclose()
+
+    assert "Payment required: $10 USDC" in booked[0].text
+    assert "Booking ID: evt-42" in booked[0].text
+    assert booking_agent_url == url
+    assert approved[0].text == "Payment approved. Booking evt-42 is confirmed."
+    assert agent.prompts[1] == "Approve payment for booking evt-42"
+
+
+class FakeCognito:
+    """Hand out numbered tokens from a worker thread, slowly."""
+
+    def __init__(self, lifetime: timedelta) -> None:
+        self.lifetime = lifetime
+        self.calls = 0
+        self.threads: set[int] = set()
+
+    def __call__(self) -> tuple[str, datetime]:
+        self.calls += 1
+        self.threads.add(threading.get_ident())
+        time.sleep(0.05)
+        return f"token-{self.calls}", datetime.now(UTC) + self.lifetime
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_refresh_off_the_loop():
+    """Test concurrent first calls wait on one Cognito call in a worker thread."""
+    cognito = FakeCognito(timedelta(hours=1))
+    manager = TokenManager(cognito)
+
+    results = await asyncio.gather(*(manager.get() for _ in range(5)))
+    manager.close()
+
+    assert results == ["token-1"] * 5
+    assert cognito.calls == 1
+    assert threading.get_ident() not in cognito.threads
+
+
+@pytest.mark.asyncio
+async def test_token_is_refreshed_before_callers_need_to_wait():
+    """Test a token near expiry is still handed out while the refresh runs."""
+    cognito = FakeCognito(timedelta(hours=1))
+    manager = TokenManager(cognito)
+    manager.token = "token-0"  # noqa: S105
+    manager.expires_at = datetime.now(UTC) + timedelta(minutes=8)
+
+    assert await manager.get() == "token-0"
+    await asyncio.sleep(0.1)
+    assert await manager.get() == "token-1"
+    manager.close()
+
+    assert cognito.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_is_scheduled_ahead_of_expiry():
+    """Test an idle server refreshes on its own before the expiry buffer."""
+    cognito = FakeCognito(a2a_orchestrator_mcp.TOKEN_REFRESH_AHEAD + timedelta(seconds=0.1))
+    manager = TokenManager(cognito)
+
+    assert await manager.get() == "token-1"
+    await asyncio.sleep(0.3)
+
+    assert await manager.get() == "token-2"
+    manager.close()
+
+
+def status_update(state: str, text: str = "", final: bool = False) -> dict:
+    """Build an A2A task status update event."""
+    status: dict = {"state": state}
+    if text:
+        status["message"] = {
+            "kind": "message",
+            "role": "agent",
+            "messageId": f"status-{state}",
+            "parts": [{"kind": "text", "text": text}],
+        }
+    return {
+        "kind": "status-update",
+        "taskId": "task-1",
+        "contextId": "context-1",
+        "status": status,
+        "final": final,
+    }
+
+
+def artifact_update(text: str, append: bool) -> dict:
+    """Build an A2A artifact chunk event."""
+    return {
+        "kind": "artifact-update",
+        "taskId": "task-1",
+        "contextId": "context-1",
+        "append": append,
+        "artifact": {"artifactId": "reply", "parts": [{"kind": "text", "text": text}]},
+    }
+
+
+@pytest.mark.asyncio
+async def test_streamed_reply_is_assembled_and_reported_as_progress(agentcore):
+    """Test status updates and artifact chunks become progress notifications."""
+    agentcore.stream = [
+        {
+            "kind": "task",
+            "id": "task-1",
+            "contextId": "context-1",
+            "status": {"state": "submitted"},
+        },
+        status_update("working", "Checking availability"),
+        artifact_update("Table for 2 ", append=False),
+        artifact_update("booked at 7pm.", append=True),
+        status_update("completed", final=True),
+    ]
+    streaming_card = {**AGENT_CARD, "capabilities": {"streaming": True}}
+
+    with (
+        patch.dict(AGENT_CARD, streaming_card),
+        patch.object(a2a_orchestrator_mcp, "report_progress", AsyncMock()) as progress,
+    ):
+        result = await handle_tool("book_restaurant", {"request": "Table for 2 at 7pm"})
+
+    assert result[0].text == "Table for 2 booked at 7pm."
+    assert [c.args for c in progress.call_args_list] == [
+        (1, "Checking availability"),
+        (2, "Table for 2 "),
+        (3, "booked at 7pm."),
+        (4, "completed"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_call_cancels_agent_task():
+    """Test cancelling a hung tool call also cancels the remote A2A task."""
+    started = asyncio.Event()
+
+    class HungClient:
+        cancel_task = AsyncMock()
+
+        async def send_message(self, msg, context=None):
+            task = a2a_orchestrator_mcp.Task.model_validate(
+                {"id": "task-1", "contextId": "context-1", "status": {"state": "working"}}
+            )
+            yield task, None
+            started.set()
+            await asyncio.Event().wait()
+
+    client = HungClient()
+    call = asyncio.create_task(stream_reply(client, None, None))
+    await started.wait()
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+    assert client.cancel_task.await_args.args[0].id == "task-1"
+
+
+class FakeRestaurants:
+    """Restaurant agents at https://<name>.example answering after a delay."""
+
+    def __init__(self, replies: dict[str, tuple[str, float]]) -> None:
+        self.replies = replies
+        self.messages: list[tuple[str, str, str, str | None]] = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        name = request.url.host.removesuffix(".example")
+        if request.method == "GET":
+            card = {**AGENT_CARD, "name": name, "url": f"https://{request.url.host}/"}
+            return httpx.Response(200, json=card)
+
+        rpc = json.loads(request.content)
+        text = rpc["params"]["message"]["parts"][0]["text"]
+        session = request.headers["X-Amzn-Bedrock-AgentCore-Runtime-Session-Id"]
+        self.messages.append((name, text, session, request.headers.get("Authorization")))
+        reply, delay = self.replies[name]
+        if text.startswith("Please book it"):
+            reply, delay = f"Booked!\nBooking ID: evt_{name}", 0
+        elif text.startswith("Approve payment"):
+            reply, delay = "Payment approved", 0
+        await asyncio.sleep(delay)
+        task = {
+            "kind": "task",
+            "id": f"task-{name}",
+            "contextId": "context-1",
+            "status": {"state": "completed"},
+            "artifacts": [{"artifactId": "a1", "parts": [{"kind": "text", "text": reply}]}],
+        }
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": rpc["id"], "result": task})
+
+
+@pytest.fixture
+def restaurants():
+    """Register Italian restaurant agents that reply through FakeRestaurants."""
+    fake = FakeRestaurants({})
+    names = ["fast", "full", "slower", "hung"]
+    endpoints = [
+        AgentEndpoint(url=f"https://{name}.example", cuisine=("Italian",), auth=name != "slower")
+        for name in names
+    ]
+    registry = AgentRegistry(
+        endpoints, http_client=httpx.AsyncClient(transport=httpx.MockTransport(fake))
+    )
+    connections = {}
+    for endpoint in endpoints:
+        connection = BookingAgentConnection(
+            endpoint.url, registry.card_cache(endpoint.url), auth=endpoint.auth
+        )
+        connection._http_client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+        connections[endpoint.url] = connection
+    with (
+        patch.object(a2a_orchestrator_mcp, "registry", registry),
+        patch.object(a2a_orchestrator_mcp, "connections", connections),
+        patch.object(a2a_orchestrator_mcp, "sessions", SessionMap()),
+        patch.object(a2a_orchestrator_mcp, "booking_agents", SessionMap()),
+        patch.object(a2a_orchestrator_mcp.tokens, "get", AsyncMock(return_value="token-1")),
+    ):
+        yield fake
+
+
+@pytest.mark.asyncio
+async def test_fan_out_returns_fastest_tables_and_cancels_stragglers(restaurants):
+    """Test enough available answers end the fan-out without waiting for the slowest."""
+    restaurants.replies = {
+        "fast": ("AVAILABLE: a table for 4 at 8pm", 0.01),
+        "full": ("UNAVAILABLE - fully booked at 8pm", 0.02),
+        "slower": ("Available: **8pm** works", 0.05),
+        "hung": ("AVAILABLE", 30),
+    }
+
+    started = time.perf_counter()
+    options = await a2a_orchestrator_mcp.fan_out("Italian, 4 people at 8pm", wanted=2)
+    elapsed = time.perf_counter() - started
+
+    assert [(o.listing.name, o.available) for o in options] == [
+        ("fast", True),
+        ("slower", True),
+        ("full", False),
+    ]
+    assert options[0].reply == "a table for 4 at 8pm"
+    assert elapsed < 1
+    [straggler] = a2a_orchestrator_mcp._cancelling
+    await asyncio.gather(straggler, return_exceptions=True)
+    assert straggler.cancelled()
+    assert not a2a_orchestrator_mcp._cancelling
+    sent = {name: auth for name, _, _, auth in restaurants.messages}
+    # Only agents registered with auth get the orchestrator's token
+    assert sent["slower"] is None
+    assert sent["fast"] == "Bearer token-1"
+
+
+@pytest.mark.asyncio
+async def test_fan_out_leaves_out_agents_past_the_deadline(restaurants):
+    """Test a restaurant that misses the deadline is dropped from the options."""
+    restaurants.replies = {
+        "fast": ("AVAILABLE", 0.01),
+        "full": ("UNAVAILABLE", 0.01),
+        "slower": ("Let me check the calendar", 0.01),
+        "hung": ("AVAILABLE", 30),
+    }
+
+    with patch.object(a2a_orchestrator_mcp, "FANOUT_DEADLINE_SECONDS", 0.1):
+        result = await handle_tool("find_table", {"request": "Italian at 8pm"})
+
+    text = result[0].text
+    assert text.index("**fast** - Available") < text.index("**slower** - Unclear")
+    assert text.index("**slower** - Unclear") < text.index("**full** - Unavailable")
+    assert "hung" not in text
+
+
+@pytest.mark.asyncio
+async def test_find_table_books_only_the_chosen_restaurant(restaurants):
+    """Test booking goes to the best option's session and payment follows it."""
+    restaurants.replies = {
+        "fast": ("UNAVAILABLE", 0.01),
+        "full": ("UNAVAILABLE", 0.01),
+        "slower": ("AVAILABLE at 8pm", 0.02),
+        "hung": ("UNAVAILABLE", 0.03),
+    }
+
+    result = await handle_tool("find_table", {"request": "Italian at 8pm", "book": True})
+    await handle_tool("approve_payment", {"booking_id": "evt_slower"})
+
+    assert "Booking at slower:\nBooked!" in result[0].text
+    bookings = [m for m in restaurants.messages if not m[1].startswith("Only check")]
+    assert [(name, text.split(":")[0]) for name, text, _, _ in bookings] == [
+        ("slower", "Please book it"),
+        ("slower", "Approve payment for booking evt_slower"),
+    ]
+    checked = {name: session for name, text, session, _ in restaurants.messages[:4]}
+    assert {session for _, _, session, _ in bookings} == {checked["slower"]}
+
+
+@pytest.mark.asyncio
+async def test_unmatched_request_asks_every_registered_restaurant(restaurants):
+    """Test a request matching no index term still fans out to the agents with cards."""
+    restaurants.replies = {
+        "fast": ("AVAILABLE", 0.01),
+        "full": ("UNAVAILABLE", 0.01),
+        "slower": ("UNAVAILABLE", 0.01),
+        "hung": ("UNAVAILABLE", 0.01),
+    }
+
+    request = "somewhere for 4 tomorrow 8pm"
+    assert await a2a_orchestrator_mcp.registry.search(request) == []
+
+    result = await handle_tool("find_table", {"request": request})
+
+    assert {name for name, *_ in restaurants.messages} == {"fast", "full", "slower", "hung"}
+    assert "1. **fast** - Available" in result[0].text
+
+
+@pytest.mark.asyncio
+async def test_find_table_without_restaurants_says_so():
+    """Test no registered restaurant gets its own message instead of a timeout one."""
+    registry = AgentRegistry([], http_client=httpx.AsyncClient())
+    with patch.object(a2a_orchestrator_mcp, "registry", registry):
+        result = await handle_tool("find_table", {"request": "a table somewhere at 8pm"})
+
+    assert (
+        result[0].text == "No restaurant agents are available to ask for: a table somewhere at 8pm"
+    )
@@ -0,0 +1,173 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for A2A agent discovery through the agent registry."""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp_server"))
+
+import agent_registry  # noqa: E402
+from agent_registry import (  # noqa: E402
+    AgentEndpoint,
+    AgentRegistry,
+    format_listings,
+    load_endpoints,
+)
+
+CUISINES = ["Italian", "Indian", "Creole", "Chinese", "French"]
+TOWNS = ["Grand Baie", "Port Louis", "Flic en Flac", "Curepipe"]
+
+
+def agent_card(url: str, name: str, skills: list[dict] | None = None) -> dict:
+    """Build an A2A agent card."""
+    return {
+        "name": name,
+        "description": f"Booking agent for {name}",
+        "url": url,
+        "version": "1.0.0",
+        "capabilities": {},
+        "defaultInputModes": ["text"],
+        "defaultOutputModes": ["text"],
+        "skills": skills or [],
+    }
+
+
+class FakeAgents:
+    """Serve agent cards for https://agent-<n>.example with ETags."""
+
+    def __init__(self, names: dict[str, str]) -> None:
+        self.names = names
+        self.fetches: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.fetches.append(request)
+        url = f"https://{request.url.host}"
+        if url not in self.names:
+            return httpx.Response(503)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        card = agent_card(url, self.names[url])
+        return httpx.Response(200, json=card, headers={"ETag": '"v1"'})
+
+
+def restaurants(count: int) -> tuple[list[AgentEndpoint], FakeAgents]:
+    """Register `count` restaurants across cuisines and towns."""
+    endpoints = [
+        AgentEndpoint(
+            url=f"https://agent-{n}.example",
+            cuisine=(CUISINES[n % len(CUISINES)],),
+            location=(TOWNS[n % len(TOWNS)], "Mauritius"),
+            tags=("vegetarian",) if n % 3 == 0 else (),
+        )
+        for n in range(count)
+    ]
+    names = {endpoint.url: f"Restaurant {n}" for n, endpoint in enumerate(endpoints)}
+    return endpoints, FakeAgents(names)
+
+
+def registry_for(endpoints: list[AgentEndpoint], agents: FakeAgents) -> AgentRegistry:
+    """Create a registry that fetches cards from the fake agents."""
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(agents))
+    return AgentRegistry(endpoints, http_client=http_client)
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_hundreds_of_agents_from_the_index():
+    """Test one crawl fetches every card and queries are ranked by matched fields."""
+    endpoints, agents = restaurants(400)
+    registry = registry_for(endpoints, agents)
+
+    results = await registry.search("Italian restaurants with vegetarian options in Grand Baie")
+    started = time.perf_counter()
+    for _ in range(100):
+        await registry.search("creole port louis")
+    elapsed = time.perf_counter() - started
+
+    assert len(agents.fetches) == 400
+    assert len(results) == agent_registry.MAX_RESULTS
+    # Agent n is Italian when n % 5 == 0, in Grand Baie when n % 4 == 0, vegetarian when n % 3 == 0
+    assert all(int(r.name.split()[-1]) % 60 == 0 for r in results)
+    assert elapsed < 1
+    await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stale_cards_refresh_in_background_with_etag():
+    """Test a stale index keeps answering while cards are revalidated."""
+    endpoints, agents = restaurants(3)
+    registry = registry_for(endpoints, agents)
+    await registry.search("italian")
+
+    with patch.object(agent_registry.time, "monotonic", return_value=time.monotonic() + 3600):
+        results = await registry.search("italian")
+        assert len(agents.fetches) == 3
+        await registry._refresh
+
+    assert results[0].name == "Restaurant 0"
+    revalidations = agents.fetches[3:]
+    assert [fetch.headers.get("If-None-Match") for fetch in revalidations] == ['"v1"'] * 3
+    await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_agent_is_listed_from_registry_tags():
+    """Test an agent whose card cannot be fetched is still discoverable."""
+    endpoints = [
+        AgentEndpoint(
+            url="https://down.example",
+            name="La Bella Vita",
+            cuisine=("Italian",),
+            location=("Grand Baie", "Mauritius"),
+        )
+    ]
+    registry = registry_for(endpoints, FakeAgents({}))
+
+    results = await registry.search("italian grand baie")
+    text = format_listings("italian grand baie", results)
+
+    assert "**La Bella Vita**" in text
+    assert "- Location: Grand Baie, Mauritius" in text
+    await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_auth_headers_are_only_sent_to_auth_endpoints():
+    """Test the orchestrator's token never reaches third-party agents."""
+    endpoints = [
+        AgentEndpoint(url="https://agent-0.example", auth=True),
+        AgentEndpoint(url="https://agent-1.example"),
+    ]
+    agents = FakeAgents({e.url: e.url for e in endpoints})
+
+    async def auth_headers():
+        return {"Authorization": "Bearer token-1"}
+
+    registry = AgentRegistry(
+        endpoints,
+        auth_headers=auth_headers,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(agents)),
+    )
+    await asyncio.wait_for(registry.crawl(), 1)
+
+    sent = {fetch.url.host: fetch.headers.get("Authorization") for fetch in agents.fetches}
+    assert sent == {"agent-0.example": "Bearer token-1", "agent-1.example": None}
+    await registry.aclose()
+
+
+def test_registry_file_urls_are_expanded(tmp_path):
+    """Test ${NAME} in registry URLs is filled from the given variables."""
+    path = tmp_path / "agents.json"
+    path.write_text(json.dumps([{"url": "${A2A_AGENT_URL}", "cuisine": ["Italian"], "auth": True}]))
+
+    [endpoint] = load_endpoints(path, variables={"A2A_AGENT_URL": "https://booking.example"})
+
+    assert endpoint == AgentEndpoint(url="https://booking.example", cuisine=("Italian",), auth=True)
@@ -0,0 +1,294 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for the async A2A booking tasks and their push notifications."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import BasePushNotificationSender
+from a2a.types import (
+    Message,
+    MessageSendConfiguration,
+    MessageSendParams,
+    Part,
+    PushNotificationConfig,
+    Role,
+    Task,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+
+from src.agents.booking_tasks import (
+    BookingTaskExecutor,
+    DynamoDBPushConfigStore,
+    DynamoDBTaskStore,
+    build_task_stores,
+)
+
+WEBHOOK_URL = "https://client.example.com/a2a/webhook"
+WEBHOOK_TOKEN = "webhook-token"  # noqa: S105
+PAYMENT_REPLY = (
+    "Booking created! Event ID: evt-42\n"
+    "Payment required: $10 USDC\n"
+    "Booking ID: evt-42\n"
+    "To complete, approve payment using: approve_payment(booking_id='evt-42')"
+)
+
+
+class FakeBookingAgent:
+    """Ask for payment on the first turn (once released), confirm on the next."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.prompts: list[str] = []
+
+    async def invoke_async(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if len(self.prompts) == 1:
+            await self.release.wait()
+            return PAYMENT_REPLY
+        return "Payment approved. Booking evt-42 is confirmed."
+
+
+class Webhook:
+    """Record the tasks pushed to the client's webhook."""
+
+    def __init__(self):
+        self.tasks: list[dict] = []
+        self.tokens: list[str | None] = []
+        self.received = asyncio.Condition()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        async with self.received:
+            self.tasks.append(json.loads(request.content))
+            self.tokens.append(request.headers.get("X-A2A-Notification-Token"))
+            self.received.notify_all()
+        return httpx.Response(200)
+
+    async def wait_for(self, state: str) -> None:
+        async with self.received:
+            await asyncio.wait_for(
+                self.received.wait_for(
+                    lambda: any(task["status"]["state"] == state for task in self.tasks)
+                ),
+                timeout=5,
+            )
+
+    def stages(self) -> list[tuple[str, str | None]]:
+        return [
+            (task["status"]["state"], (task.get("metadata") or {}).get("stage"))
+            for task in self.tasks
+        ]
+
+
+def message(text: str, task_id: str | None = None, context_id: str | None = None) -> Message:
+    return Message(
+        role=Role.user,
+        parts=[Part(TextPart(text=text))],
+        message_id=f"msg-{text[:8]}",
+        task_id=task_id,
+        context_id=context_id,
+    )
+
+
+class FakeTable:
+    """DynamoDB table keyed by (pk, sk), enough for the task stores."""
+
+    def __init__(self):
+        self.items: dict[tuple[str, str], dict] = {}
+
+    def put_item(self, Item):  # noqa: N803
+        self.items[(Item["pk"], Item["sk"])] = Item
+
+    def get_item(self, Key):  # noqa: N803
+        item = self.items.get((Key["pk"], Key["sk"]))
+        return {"Item": item} if item else {}
+
+    def delete_item(self, Key):  # noqa: N803
+        self.items.pop((Key["pk"], Key["sk"]), None)
+
+    def query(self, KeyConditionExpression):  # noqa: N803
+        pk_condition, sk_condition = KeyConditionExpression.get_expression()["values"]
+        pk = pk_condition.get_expression()["values"][1]
+        prefix = sk_condition.get_expression()["values"][1]
+        items = [
+            item for (key, sk), item in self.items.items() if key == pk and sk.startswith(prefix)
+        ]
+        return {"Items": items}
+
+
+@pytest.mark.asyncio
+async def test_non_blocking_booking_pushes_each_stage():
+    """Test the task ID comes back at once and every booking stage reaches the webhook."""
+    agent = FakeBookingAgent()
+    webhook = Webhook()
+    task_store, push_config_store = build_task_stores("")
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(webhook))
+    handler = DefaultRequestHandler(
+        agent_executor=BookingTaskExecutor(lambda: agent),
+        task_store=task_store,
+        push_config_store=push_config_store,
+        push_sender=BasePushNotificationSender(http_client, push_config_store),
+    )
+
+    configuration = MessageSendConfiguration(
+        blocking=False,
+        push_notification_config=PushNotificationConfig(url=WEBHOOK_URL, token=WEBHOOK_TOKEN),
+    )
+    task = await handler.on_message_send(
+        MessageSendParams(
+            message=message("Book for Friday 8pm, 2 people"), configuration=configuration
+        )
+    )
+
+    # The agent is still working on the booking
+    assert isinstance(task, Task)
+    assert task.status.state == TaskState.submitted
+    assert task.metadata == {"stage": "created"}
+
+    agent.release.set()
+    await webhook.wait_for("input-required")
+    stored = await task_store.get(task.id)
+    assert stored.status.state == TaskState.input_required
+    assert stored.metadata == {"stage": "payment_pending", "booking_id": "evt-42"}
+    assert [a.parts[0].root.text for a in stored.artifacts] == [PAYMENT_REPLY]
+
+    # The payment approval continues the same task
+    approved = await handler.on_message_send(
+        MessageSendParams(
+            message=message("approve_payment(booking_id='evt-42')", task.id, task.context_id)
+        )
+    )
+    await webhook.wait_for("completed")
+    await http_client.aclose()
+
+    assert approved.id == task.id
+    assert approved.status.state == TaskState.completed
+    # The confirmation replaces the payment request as the task's reply
+    assert len(approved.artifacts) == 1
+    assert approved.artifacts[0].parts[0].root.text.startswith("Payment approved")
+    assert webhook.stages()[0] == ("submitted", "created")
+    assert ("input-required", "payment_pending") in webhook.stages()
+    assert webhook.stages()[-1] == ("completed", "confirmed")
+    assert set(webhook.tokens) == {WEBHOOK_TOKEN}
+    assert agent.prompts[1] == "approve_payment(booking_id='evt-42')"
+
+
+@pytest.mark.asyncio
+async def test_failed_booking_fails_the_task():
+    """Test an agent error ends the task as failed instead of leaving it working."""
+    agent = FakeBookingAgent()
+    agent.invoke_async = AsyncMock(side_effect=RuntimeError("Gateway unavailable"))
+    task_store, push_config_store = build_task_stores("")
+    handler = DefaultRequestHandler(
+        agent_executor=BookingTaskExecutor(lambda: agent),
+        task_store=task_store,
+        push_config_store=push_config_store,
+    )
+
+    task = await handler.on_message_send(
+        MessageSendParams(message=message("Book for Friday 8pm, 2 people"))
+    )
+
+    assert task.status.state == TaskState.failed
+    assert "Gateway unavailable" in task.status.message.parts[0].root.text
+
+
+@pytest.mark.asyncio
+async def test_failed_payment_is_not_confirmed():
+    """Test an approval the agent could not complete keeps the task waiting for payment."""
+    agent = FakeBookingAgent()
+    agent.release.set()
+    task_store, push_config_store = build_task_stores("")
+    handler = DefaultRequestHandler(
+        agent_executor=BookingTaskExecutor(lambda: agent),
+        task_store=task_store,
+        push_config_store=push_config_store,
+    )
+    task = await handler.on_message_send(
+        MessageSendParams(message=message("Book for Friday 8pm, 2 people"))
+    )
+
+    agent.invoke_async = AsyncMock(return_value="No payment request found for booking evt-42")
+    retried = await handler.on_message_send(
+        MessageSendParams(
+            message=message("approve_payment(booking_id='evt-42')", task.id, task.context_id)
+        )
+    )
+
+    assert retried.status.state == TaskState.input_required
+    assert retried.metadata["stage"] == "payment_failed"
+    assert retried.artifacts[0].parts[0].root.text.startswith("No payment request found")
+
+
+@pytest.mark.asyncio
+async def test_conversations_run_alongside_each_other():
+    """Test a slow turn in one context does not hold up another context's booking."""
+    agents: list[FakeBookingAgent] = []
+    started = asyncio.Event()
+
+    def new_agent() -> FakeBookingAgent:
+        agents.append(FakeBookingAgent())
+        if len(agents) > 1:
+            agents[-1].release.set()
+        started.set()
+        return agents[-1]
+
+    task_store, push_config_store = build_task_stores("")
+    handler = DefaultRequestHandler(
+        agent_executor=BookingTaskExecutor(new_agent),
+        task_store=task_store,
+        push_config_store=push_config_store,
+    )
+
+    slow = asyncio.create_task(
+        handler.on_message_send(MessageSendParams(message=message("Book for Friday 8pm")))
+    )
+    await asyncio.wait_for(started.wait(), 1)
+    # The first context is still waiting on its agent
+    other = await asyncio.wait_for(
+        handler.on_message_send(MessageSendParams(message=message("Another booking"))), 1
+    )
+    assert not slow.done()
+    assert other.status.state == TaskState.input_required
+    agents[0].release.set()
+    await slow
+    assert len(agents) == 2
+
+
+@pytest.mark.asyncio
+async def test_dynamodb_stores_round_trip():
+    """Test tasks and push configs are saved, read back and deleted per task."""
+    table = FakeTable()
+    task_store, push_config_store = DynamoDBTaskStore(table), DynamoDBPushConfigStore(table)
+    task = Task(
+        id="task-1",
+        context_id="ctx-1",
+        status=TaskStatus(state=TaskState.input_required),
+        metadata={"stage": "payment_pending", "booking_id": "evt-42"},
+    )
+
+    await task_store.save(task)
+    await push_config_store.set_info("task-1", PushNotificationConfig(url=WEBHOOK_URL))
+    await push_config_store.set_info(
+        "task-1", PushNotificationConfig(id="audit", url=f"{WEBHOOK_URL}/audit")
+    )
+    await push_config_store.set_info("task-2", PushNotificationConfig(url=WEBHOOK_URL))
+
+    assert await task_store.get("task-1") == task
+    assert await task_store.get("task-2") is None
+    assert table.items[("task-1", "task")]["expires_at"] > 0
+    configs = await push_config_store.get_info("task-1")
+    assert {config.id for config in configs} == {"task-1", "audit"}
+
+    await push_config_store.delete_info("task-1", "audit")
+    assert [config.id for config in await push_config_store.get_info("task-1")] == ["task-1"]
+    await push_config_store.delete_info("task-1")
+    await task_store.delete("task-1")
+    assert list(table.items) == [("task-2", "push#task-2")]
@@ -0,0 +1,63 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for candidate windows and the availability sweep."""
+
+import sys
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "lambda" / "calendar_service"))
+
+from availability import (  # noqa: E402
+    DEFAULT_TZ,
+    expand_date_range,
+    merge_intervals,
+    sweep_availability,
+)
+
+
+def at(day: int, hour: int, minute: int = 0) -> datetime:
+    """Build a restaurant-time datetime in October 2025."""
+    return datetime(2025, 10, day, hour, minute, tzinfo=DEFAULT_TZ)
+
+
+def test_merge_intervals_joins_overlaps():
+    """Test overlapping and touching intervals are merged."""
+    merged = merge_intervals(
+        [(at(17, 20), at(17, 22)), (at(17, 18), at(17, 20)), (at(17, 23), at(17, 23, 30))]
+    )
+    assert merged == [(at(17, 18), at(17, 22)), (at(17, 23), at(17, 23, 30))]
+
+
+def test_sweep_marks_conflicts_in_window_order():
+    """Test each window gets exactly the busy intervals it overlaps."""
+    windows = [
+        (at(17, 21), at(17, 23)),  # overlaps the 20-22 booking
+        (at(17, 18), at(17, 20)),  # ends as the booking starts
+        (at(17, 11), at(17, 13)),  # overlaps the lunch booking
+    ]
+    busy = [(at(17, 20), at(17, 22)), (at(17, 12), at(17, 13))]
+
+    conflicts = sweep_availability(windows, busy)
+
+    assert conflicts[0] == [(at(17, 20), at(17, 22))]
+    assert conflicts[1] == []
+    assert conflicts[2] == [(at(17, 12), at(17, 13))]
+
+
+def test_expand_date_range_with_daily_bounds():
+    """Test a week of evenings expands to the expected windows."""
+    windows = expand_date_range(
+        at(13, 0),
+        at(19, 23, 59),
+        duration=timedelta(hours=2),
+        step=timedelta(minutes=30),
+        daily_start=time(18, 0),
+        daily_end=time(22, 0),
+    )
+
+    # 18:00, 18:30, 19:00, 19:30, 20:00 on each of 7 days
+    assert len(windows) == 35
+    assert windows[0] == (at(13, 18), at(13, 20))
+    assert windows[-1] == (at(19, 20), at(19, 22))
@@ -0,0 +1,190 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for the table-inventory capacity engine."""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "lambda" / "calendar_service"))
+
+import capacity  # noqa: E402
+from availability import DEFAULT_TZ  # noqa: E402
+from capacity import (  # noqa: E402
+    Booking,
+    allocate,
+    check_availability,
+    check_availability_batch,
+    fits,
+    get_available_slots,
+    load_tables,
+    party_size,
+    slot_capacity,
+    window_capacity,
+)
+
+TABLES = [
+    {"id": "A", "seats": 2},
+    {"id": "B", "seats": 4},
+    {"id": "C", "seats": 6},
+]
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    """Build a restaurant-time datetime on 17 Oct 2025."""
+    return datetime(2025, 10, 17, hour, minute, tzinfo=DEFAULT_TZ)
+
+
+def event(start: datetime, end: datetime, guests: int) -> dict:
+    """Build a booking event as reserveSlot creates it."""
+    return {
+        "id": f"evt-{start:%H%M}-{guests}",
+        "summary": f"Restaurant Booking ({guests} guests)",
+        "start": {"dateTime": start.isoformat()},
+        "end": {"dateTime": end.isoformat()},
+    }
+
+
+def calendar_service(*events: dict) -> MagicMock:
+    """Mock service whose events().list() returns the given events."""
+    service = MagicMock()
+    service.events().list().execute.return_value = {"items": list(events)}
+    service.events().list.reset_mock()
+    return service
+
+
+@pytest.fixture(autouse=True)
+def tables():
+    """Use a three-table dining room."""
+    with patch.object(capacity, "_tables", TABLES):
+        yield TABLES
+
+
+def test_bundled_inventory_is_sorted_by_seats():
+    """Test the shipped tables.json loads smallest tables first."""
+    seats = [table["seats"] for table in load_tables()]
+    assert seats == sorted(seats)
+    assert seats[0] >= 1
+
+
+def test_party_size_prefers_extended_property():
+    """Test reserveSlot's partySize wins over the summary text."""
+    booked = event(at(19), at(21), 4)
+    assert party_size(booked) == 4
+
+    booked["extendedProperties"] = {"private": {"partySize": "5"}}
+    assert party_size(booked) == 5
+    assert party_size({"summary": "Team lunch"}) == 2
+
+
+def test_allocate_uses_best_fit_table():
+    """Test each party takes the smallest free table with enough seats."""
+    occupied, unplaced = allocate(
+        TABLES,
+        [Booking(at(19), at(21), 3), Booking(at(19), at(21), 2), Booking(at(21), at(23), 2)],
+    )
+
+    assert occupied["A"] == [(at(19), at(21)), (at(21), at(23))]
+    assert occupied["B"] == [(at(19), at(21))]
+    assert occupied["C"] == []
+    assert unplaced == []
+
+
+def test_fits_rejects_booking_that_unseats_a_party():
+    """Test a new party cannot take the only table a larger party needs."""
+    bookings = [Booking(at(19), at(21), 6)]
+
+    assert fits(TABLES, bookings, Booking(at(19), at(21), 4)) is True
+    assert fits(TABLES, bookings, Booking(at(20), at(22), 5)) is False
+    assert fits(TABLES, bookings, Booking(at(21), at(23), 5)) is True
+
+
+def test_slot_capacity_counts_free_tables_per_window():
+    """Test one pass counts free tables for every window of the day."""
+    bookings = [Booking(at(18), at(20), 2), Booking(at(19), at(21), 4)]
+    windows = [(at(17), at(19)), (at(19), at(21)), (at(21), at(23))]
+
+    assert slot_capacity(TABLES, bookings, windows, 2) == [2, 1, 3]
+    assert slot_capacity(TABLES, bookings, windows, 5) == [1, 1, 1]
+
+
+def test_capacity_agrees_with_admission():
+    """Test a window with a free table now is not offered if seating it unseats a later party."""
+    tables = [{"id": "A", "seats": 2}, {"id": "B", "seats": 4}]
+    bookings = [Booking(at(19), at(21), 2), Booking(at(20), at(22), 4)]
+    window = (at(17), at(19, 30))
+
+    # B is free until 20:00, but the new party would take A and push the four onto B
+    assert slot_capacity(tables, bookings, [window], 2) == [1]
+    assert fits(tables, bookings, Booking(*window, 2)) is False
+    assert window_capacity(tables, bookings, [window], 2) == [0]
+
+    service = calendar_service(event(at(19), at(21), 2), event(at(20), at(22), 4))
+    with patch.object(capacity, "_tables", tables):
+        result = check_availability(
+            service, "cal", {"start": at(17).isoformat(), "end": at(19, 30).isoformat()}
+        )
+    assert (result["available"], result["capacity"]) == (False, 0)
+
+
+def test_window_capacity_reports_the_real_count():
+    """Test a window with no free table is not offered, even if re-seating would fit it."""
+    tables = [{"id": "A", "seats": 2}, {"id": "B", "seats": 6}]
+    bookings = [Booking(at(17, 30), at(18), 2), Booking(at(18, 30), at(19), 4)]
+    window = (at(17), at(19))
+
+    # The twos would move to B before the four arrives, but no table is free now
+    assert slot_capacity(tables, bookings, [window], 2) == [0]
+    assert fits(tables, bookings, Booking(*window, 2)) is True
+    assert window_capacity(tables, bookings, [window], 2) == [0]
+    assert window_capacity(tables, bookings, [(at(19), at(21))], 2) == [2]
+
+
+def test_batch_uses_single_events_query():
+    """Test a date range is answered from one calendar query with capacity per window."""
+    service = calendar_service(event(at(19), at(21), 6))
+
+    result = check_availability_batch(
+        service,
+        "cal",
+        {
+            "timeMin": "2025-10-17T18:00:00+04:00",
+            "timeMax": "2025-10-17T22:00:00+04:00",
+            "partySize": 6,
+        },
+    )
+
+    assert result["success"] is True
+    assert service.events().list.call_count == 1
+    assert [w["available"] for w in result["windows"]] == [False, False, False, False, False]
+    assert result["windows"][0]["capacity"] == 0
+
+
+def test_batch_rejects_invalid_request():
+    """Test missing windows and date range returns an error body."""
+    service = MagicMock()
+
+    result = check_availability_batch(service, "cal", {})
+
+    assert result["success"] is False
+    assert "windows" in result["error"]
+    service.events.assert_not_called()
+
+
+def test_available_slots_report_capacity():
+    """Test getAvailableSlots keeps slots with a free table and reports how many."""
+    service = calendar_service(
+        event(at(11), at(13), 2),
+        event(at(11), at(13), 4),
+        event(at(11), at(13), 6),
+    )
+
+    result = get_available_slots(service, "cal", {"date": "2025-10-17", "partySize": 2})
+
+    first = result["availableSlots"][0]
+    assert (first["startTime"], first["capacity"]) == ("13:00", 3)
+    assert len(result["availableSlots"]) == 5
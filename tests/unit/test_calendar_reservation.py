@@ -0,0 +1,191 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for atomic table reservation in the calendar service."""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "lambda" / "calendar_service"))
+
+import capacity  # noqa: E402
+from reservation import reserve_slot  # noqa: E402
+
+BOOKING = {
+    "summary": "Restaurant Booking - Alice (4 guests)",
+    "start": "2025-10-17T20:00:00+04:00",
+    "end": "2025-10-17T22:00:00+04:00",
+}
+
+
+class FakeCalendar:
+    """Minimal Google Calendar service for events and freebusy calls."""
+
+    def __init__(self, events=None):
+        self.events_store = list(events or [])
+        self.counter = 0
+        self.after_insert = None  # hook to inject a rival booking mid-reservation
+
+    def _request(self, result):
+        request = MagicMock()
+        request.execute.side_effect = result
+        return request
+
+    def events(self):
+        resource = MagicMock()
+        resource.list.side_effect = lambda **kw: self._request(lambda: self._list(**kw))
+        resource.insert.side_effect = lambda **kw: self._request(lambda: self._insert(kw["body"]))
+        resource.delete.side_effect = lambda **kw: self._request(
+            lambda: self._delete(kw["eventId"])
+        )
+        return resource
+
+    def freebusy(self):
+        resource = MagicMock()
+        resource.query.side_effect = lambda body: self._request(lambda: self._freebusy(body))
+        return resource
+
+    def _insert(self, body):
+        self.counter += 1
+        event = {
+            **body,
+            "id": f"evt{self.counter}",
+            "created": f"2025-10-01T00:00:0{self.counter}Z",
+        }
+        self.events_store.append(event)
+        if self.after_insert:
+            hook, self.after_insert = self.after_insert, None
+            hook(self)
+        return event
+
+    def _delete(self, event_id):
+        self.events_store = [e for e in self.events_store if e["id"] != event_id]
+
+    def _list(self, **params):
+        if params.get("privateExtendedProperty"):
+            key, value = params["privateExtendedProperty"].split("=", 1)
+            items = [
+                e
+                for e in self.events_store
+                if e.get("extendedProperties", {}).get("private", {}).get(key) == value
+            ]
+            return {"items": items}
+        return {"items": list(self.events_store)}
+
+
+@pytest.fixture(autouse=True)
+def tables():
+    """Use a dining room with one four-seat table unless a test says otherwise."""
+    with patch.object(capacity, "_tables", [{"id": "T1", "seats": 4}]) as inventory:
+        yield inventory
+
+
+def test_reserve_free_slot_creates_event():
+    """Test a free slot is booked in one call."""
+    calendar = FakeCalendar()
+
+    result = reserve_slot(
+        calendar, "cal", {**BOOKING, "customerPhone": "+23057001234", "partySize": 4}
+    )
+
+    assert result["reserved"] is True
+    assert result["eventId"] == "evt1"
+    private = calendar.events_store[0]["extendedProperties"]["private"]
+    assert private["customerPhone"] == "+23057001234"
+    assert private["partySize"] == "4"
+    assert private["reservationKey"] == result["reservationKey"]
+
+
+def test_reserve_shares_time_across_tables():
+    """Test overlapping bookings succeed while tables remain."""
+    calendar = FakeCalendar()
+
+    with patch.object(capacity, "_tables", [{"id": "T1", "seats": 2}, {"id": "T2", "seats": 4}]):
+        first = reserve_slot(calendar, "cal", {**BOOKING, "partySize": 2})
+        second = reserve_slot(calendar, "cal", {**BOOKING, "partySize": 4})
+        third = reserve_slot(calendar, "cal", {**BOOKING, "partySize": 2})
+
+    assert [first["reserved"], second["reserved"], third["reserved"]] == [True, True, False]
+
+
+def test_reserve_rejects_party_larger_than_any_table():
+    """Test a party no table can seat is never booked."""
+    calendar = FakeCalendar()
+
+    result = reserve_slot(calendar, "cal", {**BOOKING, "partySize": 9})
+
+    assert result["reserved"] is False
+    assert result["alternatives"] == []
+    assert calendar.events_store == []
+
+
+def test_reserve_taken_slot_returns_alternatives():
+    """Test a slot with no free table returns conflicts and nearby free windows."""
+    calendar = FakeCalendar(
+        [
+            {
+                "id": "existing",
+                "start": {"dateTime": "2025-10-17T19:00:00+04:00"},
+                "end": {"dateTime": "2025-10-17T21:00:00+04:00"},
+            }
+        ]
+    )
+
+    result = reserve_slot(calendar, "cal", BOOKING)
+
+    assert result["reserved"] is False
+    assert result["conflicts"][0]["start"] == "2025-10-17T19:00:00+04:00"
+    assert result["alternatives"][0]["start"] == "2025-10-17T21:00:00+04:00"
+    assert len(calendar.events_store) == 1
+
+
+def test_reserve_is_idempotent_per_key():
+    """Test retrying with the same reservation key never double-books."""
+    calendar = FakeCalendar()
+
+    first = reserve_slot(calendar, "cal", {**BOOKING, "reservationKey": "turn-42"})
+    second = reserve_slot(calendar, "cal", {**BOOKING, "reservationKey": "turn-42"})
+
+    assert first["eventId"] == second["eventId"]
+    assert len(calendar.events_store) == 1
+
+
+def test_reserve_rolls_back_when_rival_created_first():
+    """Test the later of two racing reservations for the last table deletes its own event."""
+    calendar = FakeCalendar()
+
+    def rival_books_first(cal):
+        # Rival passed its check at the same time and was created earlier
+        cal.events_store.insert(
+            0,
+            {
+                "id": "rival",
+                "created": "2025-10-01T00:00:00Z",
+                "start": {"dateTime": BOOKING["start"]},
+                "end": {"dateTime": BOOKING["end"]},
+            },
+        )
+
+    calendar.after_insert = rival_books_first
+
+    result = reserve_slot(calendar, "cal", BOOKING)
+
+    assert result["reserved"] is False
+    assert [e["id"] for e in calendar.events_store] == ["rival"]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"start": BOOKING["start"], "end": BOOKING["end"]},
+        {**BOOKING, "end": BOOKING["start"]},
+    ],
+)
+def test_reserve_rejects_invalid_request(params):
+    """Test missing fields and empty windows return an error body."""
+    result = reserve_slot(FakeCalendar(), "cal", params)
+
+    assert result["success"] is False
@@ -0,0 +1,146 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for incremental calendar sync and the local booking store."""
+
+import sys
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "lambda" / "calendar_service"))
+
+import sync  # noqa: E402
+from sync import BookingStore, extract_phone, list_events, sync_calendar  # noqa: E402
+
+
+class SyncTokenExpiredError(Exception):
+    """Stand-in for googleapiclient HttpError with a 410 status."""
+
+    status_code = 410
+
+
+def booking(event_id: str, start: str, phone: str = "+230 5700 1234", **extra) -> dict:
+    """Build a Google Calendar booking event."""
+    return {
+        "id": event_id,
+        "summary": "Restaurant Booking",
+        "description": f"Phone: {phone}, party of 2",
+        "start": {"dateTime": start},
+        "end": {"dateTime": start.replace("T19", "T21")},
+        **extra,
+    }
+
+
+def calendar_service(*responses) -> MagicMock:
+    """Mock service whose events().list() returns or raises each response in turn."""
+    service = MagicMock()
+    service.events().list().execute.side_effect = list(responses)
+    service.events().list.reset_mock()
+    return service
+
+
+@pytest.fixture
+def store():
+    """In-memory booking store."""
+    return BookingStore(":memory:")
+
+
+def test_extract_phone_prefers_extended_property():
+    """Test reserveSlot's customerPhone property wins over the description."""
+    event = booking("a", "2025-10-17T19:00:00+04:00")
+    assert extract_phone(event) == "+23057001234"
+
+    event["extendedProperties"] = {"private": {"customerPhone": "23059998888"}}
+    assert extract_phone(event) == "+23059998888"
+
+
+def test_first_sync_is_full_then_incremental(store):
+    """Test the sync token from the full sync is sent on the next sync."""
+    service = calendar_service(
+        {"items": [booking("a", "2025-10-17T19:00:00+04:00")], "nextSyncToken": "t1"},
+        {
+            "items": [
+                {"id": "a", "status": "cancelled"},
+                booking("b", "2025-10-18T19:00:00+04:00"),
+            ],
+            "nextSyncToken": "t2",
+        },
+    )
+
+    assert sync_calendar(service, store, "cal") == {"full": True, "changes": 1}
+    assert sync_calendar(service, store, "cal") == {"full": False, "changes": 2}
+
+    second_call = service.events().list.call_args_list[1].kwargs
+    assert second_call["syncToken"] == "t1"
+    assert [e["id"] for e in store.query("cal")] == ["b"]
+    assert store.get_sync_token("cal") == "t2"
+
+
+def test_expired_token_triggers_full_resync(store):
+    """Test a 410 response clears the store and rebuilds it."""
+    store.apply("cal", [booking("stale", "2025-10-17T19:00:00+04:00")], "old-token")
+    service = calendar_service(
+        SyncTokenExpiredError("Sync token is no longer valid"),
+        {"items": [booking("fresh", "2025-10-18T19:00:00+04:00")], "nextSyncToken": "t3"},
+    )
+
+    assert sync_calendar(service, store, "cal")["full"] is True
+
+    assert "syncToken" not in service.events().list.call_args_list[1].kwargs
+    assert [e["id"] for e in store.query("cal")] == ["fresh"]
+    assert store.get_sync_token("cal") == "t3"
+
+
+def test_full_sync_follows_pages(store):
+    """Test every page is stored and only the last page's token is kept."""
+    service = calendar_service(
+        {"items": [booking("a", "2025-10-17T19:00:00+04:00")], "nextPageToken": "p2"},
+        {"items": [booking("b", "2025-10-18T19:00:00+04:00")], "nextSyncToken": "t1"},
+    )
+
+    sync_calendar(service, store, "cal")
+
+    assert service.events().list.call_args_list[1].kwargs["pageToken"] == "p2"
+    assert len(store.query("cal")) == 2
+
+
+def test_list_events_filters_by_phone_and_date(store):
+    """Test listEvents answers from the indexed local copy."""
+    service = calendar_service(
+        {
+            "items": [
+                booking("a", "2025-10-17T19:00:00+04:00", phone="+23057001234"),
+                booking("b", "2025-10-17T19:00:00+04:00", phone="+23059998888"),
+                booking("c", "2025-10-18T19:00:00+04:00", phone="+23057001234"),
+            ],
+            "nextSyncToken": "t1",
+        },
+        {"items": [], "nextSyncToken": "t1"},
+    )
+
+    with patch.object(sync, "_store", store):
+        by_phone = list_events(
+            service, "cal", {"customerPhone": "230 5700 1234", "timeMin": "2025-10-01T00:00:00Z"}
+        )
+        by_day = list_events(service, "cal", {"date": "2025-10-17"})
+
+    assert [e["id"] for e in by_phone["events"]] == ["a", "c"]
+    assert [e["id"] for e in by_day["events"]] == ["a", "b"]
+
+
+def test_list_events_defaults_to_upcoming(store):
+    """Test listEvents without timeMin or date skips bookings that already started."""
+    now = datetime.now(UTC)
+    past = (now - timedelta(days=30)).strftime("%Y-%m-%dT19:00:00+04:00")
+    upcoming = (now + timedelta(days=2)).strftime("%Y-%m-%dT19:00:00+04:00")
+    service = calendar_service(
+        {"items": [booking("old", past), booking("next", upcoming)], "nextSyncToken": "t1"}
+    )
+
+    with patch.object(sync, "_store", store):
+        result = list_events(service, "cal", {})
+
+    assert [e["id"] for e in result["events"]] == ["next"]
@@ -0,0 +1,78 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for splitting streamed agent replies into WhatsApp messages."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "lambda"))
+
+from chunking import MAX_MESSAGE_CHARS, ReplyChunker, split_message  # noqa: E402
+
+
+def stream(chunker: ReplyChunker, deltas: list[str]) -> list[list[str]]:
+    """Feed deltas one by one, recording what each releases, then flush."""
+    released = [chunker.feed(delta) for delta in deltas]
+    released.append(chunker.flush())
+    return released
+
+
+def test_short_paragraphs_arrive_as_one_message():
+    """Test finished paragraphs wait for the rest of the reply instead of going out alone."""
+    released = stream(ReplyChunker(), ["Sure! Let me", " check.", "\n\nWe have", " a table."])
+
+    assert released == [[], [], [], [], ["Sure! Let me check.\n\nWe have a table."]]
+
+
+def test_only_the_first_message_goes_out_early():
+    """Test text after the early first message waits until the reply ends."""
+    chunker = ReplyChunker()
+    sentence = "We have several tables free tomorrow evening for your party. "
+
+    assert chunker.feed(sentence * 3 + "\n\n") == [(sentence * 3).strip()]
+    assert chunker.feed("The terrace is open.\n\nShall I book one? ") == []
+    assert chunker.flush() == ["The terrace is open.\n\nShall I book one?"]
+
+
+def test_think_block_split_across_deltas_is_removed():
+    """Test think tags are stripped even when they arrive in pieces."""
+    released = stream(
+        ReplyChunker(), ["Hello <thi", "nking>party of 4, check", " 8pm</think", "ing>there!"]
+    )
+
+    assert [message for batch in released for message in batch] == ["Hello there!"]
+
+
+def test_unclosed_think_block_never_reaches_user():
+    """Test reasoning cut off by the end of the stream is dropped."""
+    assert stream(ReplyChunker(), ["Done.", "<think>still reason"]) == [[], [], ["Done."]]
+
+
+def test_long_first_paragraph_is_released_at_sentence_end():
+    """Test the first message does not wait for a long paragraph to finish."""
+    chunker = ReplyChunker()
+    sentence = "We have several tables free tomorrow evening for your party. "
+
+    released = chunker.feed(sentence * 3 + "Also")
+
+    assert released == [(sentence * 3).strip()]
+    assert chunker.flush() == ["Also"]
+
+
+def test_messages_never_exceed_whatsapp_limit():
+    """Test long replies are cut at sentence ends within the body limit."""
+    sentence = "Our menu features fresh seafood and homemade pasta every day. "
+    reply = sentence * 200
+
+    chunker = ReplyChunker()
+    messages = [
+        m
+        for batch in stream(chunker, [reply[i : i + 50] for i in range(0, len(reply), 50)])
+        for m in batch
+    ]
+
+    assert all(len(message) <= MAX_MESSAGE_CHARS for message in messages)
+    assert all(message.endswith(".") for message in messages)
+    assert " ".join(messages) == reply.strip()
+    assert split_message("word " * 2000, limit=100)[0] == ("word " * 20).strip()
@@ -0,0 +1,114 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for per-user WhatsApp message coalescing."""
+
+import json
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "lambda"))
+
+from coalescing import DynamoDBBuffer, MemoryBuffer, merge_messages, split_runs  # noqa: E402
+
+CONDITION_FAILED = ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "Update")
+
+
+def message(text: str, timestamp: int, message_id: str = "") -> dict:
+    """Build a parsed WhatsApp message."""
+    return {
+        "phone_number_id": "arn:phone",
+        "user_phone": "+111",
+        "sender_name": "User",
+        "message_id": message_id or f"wamid.{timestamp}",
+        "timestamp": timestamp,
+        "text": text,
+    }
+
+
+def test_merge_joins_texts_and_drops_redeliveries():
+    """Test a burst becomes one message in send order without duplicate copies."""
+    merged = merge_messages(
+        [message("tomorrow 8pm", 3), message("hi", 1), message("table for 4", 2), message("hi", 1)]
+    )
+
+    assert merged["text"] == "hi\ntable for 4\ntomorrow 8pm"
+    assert merged["message_id"] == "wamid.3"
+    assert merged["message_ids"] == ["wamid.1", "wamid.2", "wamid.3"]
+    assert merge_messages([message("hi", 1)]) == message("hi", 1)
+
+
+def test_split_runs_breaks_on_gaps():
+    """Test runs end where the gap between messages exceeds the window."""
+    messages = [message("a", 1), message("b", 3), message("c", 5), message("d", 20)]
+
+    assert split_runs(messages, window=3) == [[0, 1, 2], [3]]
+    assert split_runs(messages, window=0) == [[0], [1], [2], [3]]
+
+
+def test_memory_buffer_has_one_leader_per_burst():
+    """Test only the first append leads and the drain returns every message."""
+    buffer = MemoryBuffer()
+
+    assert buffer.append("+111", [message("hi", 1)]) is True
+    assert buffer.append("+111", [message("table for 4", 2)]) is False
+    assert [m["text"] for m in buffer.drain("+111")] == ["hi", "table for 4"]
+    assert buffer.append("+111", [message("thanks", 9)]) is True
+
+
+def test_memory_buffer_restored_burst_is_taken_over():
+    """Test messages put back after a failed turn go to the next leader with its own."""
+    buffer = MemoryBuffer()
+    buffer.append("+111", [message("hi", 1)])
+    burst = buffer.drain("+111")
+
+    buffer.restore("+111", burst)
+
+    assert buffer.append("+111", [message("table for 4", 2)]) is True
+    assert [m["text"] for m in buffer.drain("+111")] == ["hi", "table for 4"]
+
+
+def test_dynamodb_buffer_follower_appends():
+    """Test an open buffer makes the caller a follower that appends its messages."""
+    client = MagicMock()
+    client.update_item.side_effect = [CONDITION_FAILED, {}]
+
+    assert DynamoDBBuffer("table", client).append("+111", [message("hi", 1)]) is False
+    append = client.update_item.call_args.kwargs
+    assert "list_append" in append["UpdateExpression"]
+    assert append["Key"] == {"message_id": {"S": "coalesce#+111"}}
+
+
+def test_dynamodb_buffer_drained_between_calls_becomes_leader():
+    """Test a buffer drained before the append is reopened by the caller."""
+    client = MagicMock()
+    client.update_item.side_effect = [CONDITION_FAILED, CONDITION_FAILED, {}]
+
+    assert DynamoDBBuffer("table", client).append("+111", [message("hi", 1)]) is True
+    assert client.update_item.call_count == 3
+
+
+def test_dynamodb_buffer_drain_returns_messages():
+    """Test draining deletes the buffer and decodes its messages."""
+    client = MagicMock()
+    client.delete_item.return_value = {
+        "Attributes": {"messages": {"L": [{"S": json.dumps(message("hi", 1))}]}}
+    }
+
+    assert DynamoDBBuffer("table", client).drain("+111") == [message("hi", 1)]
+    assert client.delete_item.call_args.kwargs["ReturnValues"] == "ALL_OLD"
+
+
+def test_dynamodb_buffer_restore_prepends_and_expires():
+    """Test restored messages go first and leave a new buffer open for takeover."""
+    client = MagicMock()
+
+    DynamoDBBuffer("table", client).restore("+111", [message("hi", 1)])
+
+    update = client.update_item.call_args.kwargs
+    assert update["UpdateExpression"].startswith("SET messages = list_append(:items,")
+    assert "expires_at = if_not_exists(expires_at, :now)" in update["UpdateExpression"]
+    assert "ConditionExpression" not in update
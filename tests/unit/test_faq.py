@@ -0,0 +1,89 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for the WhatsApp FAQ fast path."""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "lambda"))
+
+from faq import RESTAURANT_TZ, answer, load_snapshot  # noqa: E402
+
+# A Friday
+NOW = datetime(2025, 10, 17, 12, 0, tzinfo=RESTAURANT_TZ)
+
+
+def test_snapshot_matches_restaurant_data():
+    """Test the fast path reads the same hours and menu the agent's knowledge base uses."""
+    snapshot = load_snapshot()
+
+    assert snapshot is not None
+    assert snapshot["hours"]["opening_hours"]["friday"]["close"] == "23:00"
+    assert snapshot["menu"]["menu"]
+
+
+def test_weekly_hours_merge_consecutive_days():
+    """Test a general hours question lists the week with identical days merged."""
+    result = answer("What are your opening hours?", NOW)
+
+    assert result.intent == "hours"
+    assert "Monday - Thursday: 11:00 - 22:00" in result.text
+    assert "Sunday: 10:00 - 21:00" in result.text
+
+
+def test_relative_day_uses_restaurant_time():
+    """Test "tomorrow" is resolved in Mauritius time."""
+    late_thursday_utc = datetime.fromisoformat("2025-10-16T21:30:00+00:00")
+
+    result = answer("Are you open tomorrow?", late_thursday_utc)
+
+    assert result.text.splitlines()[1] == "Saturday: 10:00 - 23:00"
+
+
+def test_menu_category_lists_its_dishes():
+    """Test a named category (singular or plural) lists that category only."""
+    result = answer("Do you have desserts?", NOW)
+
+    assert result.intent == "menu"
+    assert result.text.startswith("Desserts:")
+    assert "- Tiramisu (7.99)" in result.text
+    assert "Pizza" not in result.text
+
+
+def test_location_question():
+    """Test the location is answered from the menu description."""
+    assert answer("Where are you located?", NOW).text.endswith("Port Louis, Mauritius.")
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Book a table for 4 tomorrow at 8pm",
+        "Are you open on Sunday and where are you?",
+        "Do you have vegan desserts?",
+        "Are you open on 25 December?",
+        "Hi there",
+        "I would like to know about the menu because my family is visiting us soon",
+    ],
+)
+def test_ambiguous_messages_go_to_agent(text):
+    """Test bookings, dietary needs, dates, mixed or long questions are not answered."""
+    assert answer(text, NOW) is None
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "The food was cold",
+        "the pizza was cold!",
+        "Why was the risotto so bad?",
+        "You were closed when we came",
+    ],
+)
+def test_complaints_and_statements_go_to_agent(text):
+    """Test complaints and statements that name a menu item or topic get no canned reply."""
+    assert answer(text, NOW) is None
@@ -0,0 +1,84 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for the WhatsApp webhook idempotency cache."""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "lambda"))
+
+import idempotency  # noqa: E402
+from idempotency import DynamoDBStore, IdempotencyCache, MemoryStore  # noqa: E402
+
+
+def test_claim_skips_in_progress_and_completed():
+    """Test a second claim fails while in progress and after completion."""
+    cache = IdempotencyCache(MemoryStore())
+
+    assert cache.claim("wamid.1") is True
+    assert cache.claim("wamid.1") is False
+
+    cache.complete("wamid.1")
+    assert cache.claim("wamid.1") is False
+
+
+def test_release_lets_retry_claim_again():
+    """Test a failed turn's claim can be taken by the retry."""
+    cache = IdempotencyCache(MemoryStore())
+
+    cache.claim("wamid.1")
+    cache.release("wamid.1")
+
+    assert cache.claim("wamid.1") is True
+
+
+def test_expired_claim_can_be_taken_over():
+    """Test a crashed worker's claim stops blocking once its TTL passes."""
+    store = MemoryStore()
+    assert store.claim("wamid.1", ttl=60) is True
+
+    with patch.object(idempotency.time, "time", return_value=idempotency.time.time() + 61):
+        assert store.claim("wamid.1", ttl=60) is True
+
+
+def test_lru_answers_without_store_and_evicts_oldest():
+    """Test completed IDs are answered from the LRU, which keeps only the newest."""
+    store = MagicMock()
+    cache = IdempotencyCache(store, lru_size=2)
+    for key in ("a", "b", "c"):
+        cache.complete(key)
+
+    assert cache.claim("c") is False
+    store.claim.assert_not_called()
+
+    store.claim.return_value = True
+    assert cache.claim("a") is True
+    store.claim.assert_called_once()
+
+
+def test_store_outage_does_not_drop_messages():
+    """Test a failing store lets the message through."""
+    store = MagicMock()
+    store.claim.side_effect = ClientError({"Error": {"Code": "InternalError"}}, "PutItem")
+
+    assert IdempotencyCache(store).claim("wamid.1") is True
+
+
+def test_dynamodb_claim_uses_conditional_write():
+    """Test DynamoDB claims are conditional and a failed condition means duplicate."""
+    client = MagicMock()
+    store = DynamoDBStore("idempotency", client)
+
+    assert store.claim("wamid.1", ttl=60) is True
+    kwargs = client.put_item.call_args.kwargs
+    assert kwargs["Item"]["message_id"] == {"S": "wamid.1"}
+    assert "attribute_not_exists(message_id)" in kwargs["ConditionExpression"]
+
+    client.put_item.side_effect = ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException"}}, "PutItem"
+    )
+    assert store.claim("wamid.1", ttl=60) is False
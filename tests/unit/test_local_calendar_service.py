@@ -0,0 +1,123 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for the local stand-in calendar service."""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "lambda" / "calendar_service"))
+
+from capacity import get_tables  # noqa: E402
+from local_service import (  # noqa: E402
+    LocalCalendarBackend,
+    LocalCalendarError,
+    LocalCalendarService,
+)
+
+BOOKING = {
+    "calendarId": "cal",
+    "summary": "Restaurant Booking - Alice (4 guests)",
+    "start": "2025-10-17T19:00:00+04:00",
+    "end": "2025-10-17T21:00:00+04:00",
+}
+
+
+@pytest.fixture
+def service():
+    """Local calendar service without latency or errors."""
+    return LocalCalendarService(LocalCalendarBackend(latency_ms=0, error_rate=0))
+
+
+def test_create_then_check_availability(service):
+    """Test an event on the only eight-seat table leaves no room for another eight."""
+    service.invoke("createEvent", {**BOOKING, "summary": "Restaurant Booking - Bob (8 guests)"})
+    window = {
+        "calendarId": "cal",
+        "start": "2025-10-17T20:00:00+04:00",
+        "end": "2025-10-17T22:00:00+04:00",
+    }
+
+    large = service.invoke("checkAvailability", {**window, "partySize": 8})
+    small = service.invoke("checkAvailability", {**window, "partySize": 2})
+
+    assert (large["available"], large["capacity"]) == (False, 0)
+    assert small["available"] is True
+
+
+def test_available_slots_skip_booked_times(service):
+    """Test getAvailableSlots respects opening hours and booked tables."""
+    service.invoke(
+        "reserveSlot",
+        {
+            **BOOKING,
+            "start": "2025-10-17T11:00:00+04:00",
+            "end": "2025-10-17T13:00:00+04:00",
+            "partySize": 8,
+        },
+    )
+
+    result = service.invoke(
+        "getAvailableSlots", {"calendarId": "cal", "date": "2025-10-17", "partySize": 8}
+    )
+
+    assert [slot["startTime"] for slot in result["availableSlots"]][:2] == ["13:00", "13:30"]
+    assert len(result["availableSlots"]) == 5
+
+
+def test_list_events_sees_deletions_incrementally(service):
+    """Test listEvents picks up creates and deletes through the sync token."""
+    first = service.invoke("reserveSlot", {**BOOKING, "customerPhone": "+23057001234"})
+    by_phone = {"calendarId": "cal", "customerPhone": "+230 5700 1234", "date": "2025-10-17"}
+    assert service.invoke("listEvents", by_phone)["count"] == 1
+
+    service.invoke("deleteEvent", {"calendarId": "cal", "eventId": first["eventId"]})
+
+    assert service.invoke("listEvents", by_phone)["count"] == 0
+
+
+def test_concurrent_reservations_never_overbook(service):
+    """Test racing reserveSlot calls for one window book each table at most once."""
+    tables = len(get_tables())
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(
+            pool.map(
+                lambda _: service.invoke("reserveSlot", {**BOOKING, "partySize": 2}),
+                range(tables + 8),
+            )
+        )
+
+    reserved = sum(result["reserved"] for result in results)
+    assert 0 < reserved <= tables
+    assert (
+        service.invoke("listEvents", {"calendarId": "cal", "date": "2025-10-17", "maxResults": 50})[
+            "count"
+        ]
+        == reserved
+    )
+
+
+def test_error_injection_returns_error_body():
+    """Test injected backend failures surface as 503 error bodies."""
+    service = LocalCalendarService(LocalCalendarBackend(error_rate=1))
+
+    result = service.invoke("createEvent", BOOKING)
+
+    assert result == {
+        "success": False,
+        "error": "Injected calendar backend error",
+        "statusCode": 503,
+    }
+
+
+def test_delete_unknown_event_raises_not_found():
+    """Test the backend mirrors Google's 404 for unknown events."""
+    backend = LocalCalendarBackend(latency_ms=0, error_rate=0)
+
+    with pytest.raises(LocalCalendarError) as error:
+        backend.events().delete(calendarId="cal", eventId="missing").execute()
+
+    assert error.value.status_code == 404
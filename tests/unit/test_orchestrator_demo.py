@@ -0,0 +1,75 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for the dependency-graph plan runner in the A2A orchestrator demo."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "examples"))
+
+from a2a_orchestrator_demo import PlanStep, StepTiming, run_plan, waterfall  # noqa: E402
+
+STEP_SECONDS = 0.1
+
+
+async def slow_agent(query: str) -> str:
+    """Answer every query after the same delay."""
+    await asyncio.sleep(STEP_SECONDS)
+    return f"answer to {query}"
+
+
+def plan() -> list[PlanStep]:
+    """Three independent lookups and a booking that needs two of them."""
+    return [
+        PlanStep("availability", "free?"),
+        PlanStep("menu", "menu?"),
+        PlanStep("hours", "hours?"),
+        PlanStep(
+            "booking",
+            lambda results: f"book ({results['availability']})",
+            depends_on=("availability", "hours"),
+        ),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_independent_steps_run_concurrently():
+    """Test the plan takes two step-lengths in parallel and four sequentially."""
+    results, timings = await run_plan(plan(), slow_agent)
+    _, sequential = await run_plan(plan(), slow_agent, max_parallel=1)
+
+    assert results["booking"] == "answer to book (answer to free?)"
+    by_name = {timing.name: timing for timing in timings}
+    assert by_name["booking"].started >= by_name["availability"].finished
+    assert by_name["booking"].started >= by_name["hours"].finished
+    assert max(t.finished for t in timings) < 3 * STEP_SECONDS
+    assert max(t.finished for t in sequential) >= 4 * STEP_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_skipped_steps_and_unknown_dependencies():
+    """Test a step whose query is None is skipped and bad dependencies are rejected."""
+    steps = [
+        PlanStep("availability", "free?"),
+        PlanStep("booking", lambda _: None, ("availability",)),
+    ]
+    results, _ = await run_plan(steps, slow_agent)
+    assert list(results) == ["availability"]
+
+    with pytest.raises(ValueError, match="unknown or later steps"):
+        await run_plan([PlanStep("booking", "book", ("availability",))], slow_agent)
+
+
+def test_waterfall_places_bars_on_a_shared_axis():
+    """Test each bar starts and ends in proportion to the plan's wall time."""
+    timings = [StepTiming("menu", 0.0, 1.0), StepTiming("booking", 1.0, 2.0)]
+
+    header, menu, booking = waterfall(timings, width=10).splitlines()
+
+    assert header.endswith("2.00s")
+    assert menu == "menu     |█████     | 1.00s"
+    assert booking == "booking  |     █████| 1.00s"
@@ -0,0 +1,128 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for the outbound WhatsApp send scheduler."""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "lambda"))
+
+import outbound  # noqa: E402
+from outbound import OutboundScheduler, Priority, TokenBucket  # noqa: E402
+
+
+def wait_for_depth(scheduler: OutboundScheduler, depth: int) -> None:
+    """Wait until `depth` sends are queued for a token."""
+    deadline = time.monotonic() + 2
+    while scheduler.stats()["queue_depth"] < depth:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_token_bucket_refills_at_rate():
+    """Test a burst is allowed up to capacity and then paced at the rate."""
+    with patch.object(outbound.time, "monotonic", return_value=100.0) as clock:
+        bucket = TokenBucket(rate=2, capacity=2)
+        assert bucket.take() == 0
+        assert bucket.take() == 0
+        assert bucket.take() == 0.5
+
+        clock.return_value = 100.5
+        assert bucket.take() == 0
+
+
+def test_reply_overtakes_waiting_receipts_and_typing():
+    """Test a reply queued last is sent before earlier non-urgent sends."""
+    sent: list[str] = []
+    first_sent = threading.Event()
+    release = threading.Event()
+
+    def send(phone_number_id, payload):
+        sent.append(payload["kind"])
+        first_sent.set()
+        release.wait(timeout=2)
+        return {"messageId": payload["kind"]}
+
+    scheduler = OutboundScheduler(send, rate=20, burst=1)
+    threads = [
+        threading.Thread(target=scheduler.send, args=("phone", {"kind": "first"})),
+        threading.Thread(
+            target=scheduler.send, args=("phone", {"kind": "typing"}, Priority.TYPING)
+        ),
+        threading.Thread(
+            target=scheduler.send, args=("phone", {"kind": "receipt"}, Priority.RECEIPT)
+        ),
+        threading.Thread(target=scheduler.send, args=("phone", {"kind": "reply"})),
+    ]
+    threads[0].start()
+    first_sent.wait(timeout=2)
+    for depth, thread in enumerate(threads[1:], start=1):
+        thread.start()
+        wait_for_depth(scheduler, depth)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=2)
+
+    assert sent == ["first", "reply", "receipt", "typing"]
+    assert scheduler.stats()["queue_depth"] == 0
+
+
+def test_waiting_non_urgent_sends_are_coalesced():
+    """Test a newer typing indicator for the same user replaces the waiting one."""
+    sent: list[dict] = []
+    release = threading.Event()
+
+    def send(phone_number_id, payload):
+        sent.append(payload)
+        release.wait(timeout=2)
+        return {"messageId": str(len(sent))}
+
+    scheduler = OutboundScheduler(send, rate=20, burst=1)
+    results: list[dict] = []
+    first = threading.Thread(target=scheduler.send, args=("phone", {"n": 0}))
+    first.start()
+    typing = [
+        threading.Thread(
+            target=lambda n=n: results.append(
+                scheduler.send("phone", {"n": n}, Priority.TYPING, key="typing:+111")
+            )
+        )
+        for n in (1, 2)
+    ]
+    typing[0].start()
+    wait_for_depth(scheduler, 1)
+    typing[1].start()
+    deadline = time.monotonic() + 2
+    while scheduler.stats()["coalesced"] < 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    release.set()
+    for thread in [first, *typing]:
+        thread.join(timeout=2)
+
+    assert sent == [{"n": 0}, {"n": 2}]
+    assert results == [{"messageId": "2"}, {"messageId": "2"}]
+
+
+def test_stats_report_send_rate_and_errors_reach_caller():
+    """Test sends count towards the rate and a failed send raises for its caller."""
+
+    def send(phone_number_id, payload):
+        if payload.get("fail"):
+            raise RuntimeError("throttled")
+        return {"messageId": "wamid.1"}
+
+    scheduler = OutboundScheduler(send, rate=80)
+    assert scheduler.send("phone", {}) == {"messageId": "wamid.1"}
+    with pytest.raises(RuntimeError, match="throttled"):
+        scheduler.send("phone", {"fail": True})
+
+    stats = scheduler.stats()
+    assert stats["send_rate"] == round(2 / outbound.RATE_WINDOW_SECONDS, 2)
+    assert stats["queue_depth_by_priority"] == {"reply": 0, "receipt": 0, "typing": 0}
@@ -0,0 +1,105 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for retries and circuit breaking around AgentCore and WhatsApp calls."""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "lambda"))
+
+import resilience  # noqa: E402
+from resilience import CircuitBreaker, CircuitOpenError, call_with_retry  # noqa: E402
+
+
+def client_error(code: str, status: int = 400) -> ClientError:
+    """Build a botocore ClientError with an error code and HTTP status."""
+    response = {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}
+    return ClientError(response, "InvokeAgentRuntime")
+
+
+@pytest.fixture(autouse=True)
+def no_sleep():
+    """Skip backoff delays."""
+    with patch.object(resilience.time, "sleep") as sleep:
+        yield sleep
+
+
+def test_throttle_is_retried_with_backoff(no_sleep):
+    """Test a throttled call is retried after a jittered delay and then succeeds."""
+    func = MagicMock(side_effect=[client_error("ThrottlingException", 429), "ok"])
+
+    assert call_with_retry(CircuitBreaker("agentcore"), func, prompt="hi") == "ok"
+
+    assert func.call_count == 2
+    func.assert_called_with(prompt="hi")
+    delay = no_sleep.call_args.args[0]
+    assert 0 <= delay <= resilience.BASE_DELAY_SECONDS
+
+
+def test_client_error_is_not_retried_or_counted():
+    """Test a validation error is raised at once and leaves the breaker closed."""
+    breaker = CircuitBreaker("agentcore", failure_threshold=1)
+    func = MagicMock(side_effect=client_error("ValidationException"))
+
+    with pytest.raises(ClientError):
+        call_with_retry(breaker, func)
+
+    assert func.call_count == 1
+    assert breaker.is_open is False
+
+
+def test_read_timeout_is_not_retried_but_counts_as_failure():
+    """Test a timed-out call (which may still be running) is not repeated."""
+    breaker = CircuitBreaker("agentcore", failure_threshold=1)
+    func = MagicMock(side_effect=ReadTimeoutError(endpoint_url="https://agentcore"))
+
+    with pytest.raises(ReadTimeoutError):
+        call_with_retry(breaker, func)
+
+    assert func.call_count == 1
+    assert breaker.is_open is True
+
+
+def test_breaker_opens_and_fails_fast():
+    """Test repeated 5xx errors open the breaker so later calls never reach the service."""
+    breaker = CircuitBreaker("agentcore", failure_threshold=3)
+    func = MagicMock(side_effect=client_error("ServiceUnavailableException", 503))
+
+    with pytest.raises(ClientError):
+        call_with_retry(breaker, func)
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(breaker, func)
+
+    assert func.call_count == 3
+    assert breaker.is_open is True
+
+
+def test_breaker_probes_after_reset_timeout():
+    """Test one probe call goes through after the cool-down and its outcome decides."""
+    breaker = CircuitBreaker("whatsapp", failure_threshold=1, reset_timeout=30)
+    failing = MagicMock(side_effect=client_error("InternalServerException", 500))
+
+    now = [100.0]
+
+    with patch.object(resilience.time, "monotonic", side_effect=lambda: now[0]):
+        with pytest.raises(ClientError):
+            call_with_retry(breaker, failing, attempts=1)
+        now[0] = 129.0
+        with pytest.raises(CircuitOpenError):
+            call_with_retry(breaker, failing)
+
+        # A failed probe reopens the breaker for another cool-down
+        now[0] = 131.0
+        with pytest.raises(ClientError):
+            call_with_retry(breaker, failing, attempts=1)
+        with pytest.raises(CircuitOpenError):
+            call_with_retry(breaker, failing)
+
+        now[0] = 162.0
+        assert call_with_retry(breaker, MagicMock(return_value="sent")) == "sent"
+    assert breaker.is_open is False
@@ -3,18 +3,13 @@
 
 """Tests for response cleaning functionality."""
 
-import re
-
-
-def clean_response(text: str) -> str:
-    """Remove <think> and <thinking> tags and internal reasoning from response."""
-    # Remove <think>...</think> and <thinking>...</thinking> blocks (including multiline)
-    cleaned = re.sub(
-        r"<think(?:ing)?>.*?</think(?:ing)?>", "", text, flags=re.DOTALL | re.IGNORECASE
-    )
-    # Remove extra whitespace/newlines left behind
-    cleaned = re.sub(r"\n\s*\n\s*\n", "\n\n", cleaned)
-    return cleaned.strip()
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "lambda"))
+
+# The agent's clean_response delegates to this; importing the agent needs strands
+from thinking import strip_thinking as clean_response  # noqa: E402
 
 
 def test_clean_response_removes_think_tags():
@@ -0,0 +1,123 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for the restaurant MCP server's HTTP client to the agent."""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp_server"))
+
+import restaurant_agent_mcp  # noqa: E402
+from restaurant_agent_mcp import AgentClient  # noqa: E402
+
+
+class FakeAgent:
+    """Answer agent messages, failing or stalling the first ones if asked."""
+
+    def __init__(self, statuses: list[int] | None = None, delays: list[float] | None = None):
+        self.statuses = statuses or []
+        self.delays = delays or []
+        # Connections refused before any request gets through
+        self.refuse = 0
+        self.requests: list[httpx.Request] = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if self.refuse:
+            self.refuse -= 1
+            raise httpx.ConnectError("Connection refused")
+        number = len(self.requests)
+        self.requests.append(request)
+        if number < len(self.delays):
+            await asyncio.sleep(self.delays[number])
+        status = self.statuses[number] if number < len(self.statuses) else 200
+        reply = {"kind": "message", "parts": [{"kind": "text", "text": f"reply {number}"}]}
+        return httpx.Response(status, json=reply)
+
+    def message_ids(self) -> list[str]:
+        return [json.loads(request.content)["message_id"] for request in self.requests]
+
+    def attempts(self) -> list[str]:
+        return [request.headers["X-Request-Attempt"] for request in self.requests]
+
+
+@pytest.fixture
+def agent():
+    """Point the shared agent client at a fake agent, without backoff waits."""
+    fake = FakeAgent()
+    client = AgentClient("https://agent.example", hedge=False)
+    client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+    with (
+        patch.object(restaurant_agent_mcp, "agent", client),
+        patch.object(restaurant_agent_mcp, "backoff_delay", return_value=0),
+    ):
+        yield fake
+
+
+@pytest.mark.asyncio
+async def test_calls_share_the_client_with_unique_message_ids(agent):
+    """Test every call reuses the pooled client and sends its own message ID."""
+    http_client = restaurant_agent_mcp.agent.http_client
+
+    first = await restaurant_agent_mcp.call_agent("What's on the menu?")
+    second = await restaurant_agent_mcp.call_agent("What's on the menu?")
+
+    assert (first, second) == ("reply 0", "reply 1")
+    assert restaurant_agent_mcp.agent.http_client is http_client
+    first_id, second_id = agent.message_ids()
+    assert first_id != second_id
+    assert [r.headers["X-Request-Id"] for r in agent.requests] == [first_id, second_id]
+
+
+@pytest.mark.asyncio
+async def test_reads_are_retried_on_throttling(agent):
+    """Test a read retries 503/429 responses under the same message ID."""
+    agent.statuses = [503, 429]
+
+    result = await restaurant_agent_mcp.call_agent("Opening hours?", idempotent=True)
+
+    assert result == "reply 2"
+    request_id = agent.requests[0].headers["X-Request-Id"]
+    assert agent.message_ids() == [request_id] * 3
+    assert agent.attempts() == ["1", "2", "3"]
+
+
+@pytest.mark.asyncio
+async def test_writes_are_only_retried_when_nothing_was_sent(agent):
+    """Test a booking is not resent after a 503, but is after a connection failure."""
+    agent.statuses = [503]
+    result = await restaurant_agent_mcp.call_agent("Book a table for 2")
+    assert result == "Error: 503"
+    assert len(agent.requests) == 1
+
+    agent.refuse = 1
+    result = await restaurant_agent_mcp.call_agent("Book a table for 2")
+    assert result == "reply 1"
+    # The resent booking keeps its message ID, so the agent can deduplicate it
+    assert agent.attempts()[1] == "2"
+
+
+@pytest.mark.asyncio
+async def test_slow_read_is_hedged_after_p95(agent):
+    """Test a read slower than the recent p95 is raced against a second copy."""
+    client = restaurant_agent_mcp.agent
+    client.hedge = True
+    for _ in range(restaurant_agent_mcp.HEDGE_MIN_SAMPLES):
+        client.latencies.record(0.05)
+    agent.delays = [5]
+
+    started = time.perf_counter()
+    result = await restaurant_agent_mcp.call_agent("Menu?", idempotent=True)
+
+    assert result == "reply 1"
+    assert time.perf_counter() - started < 1
+    first_id, hedge_id = agent.message_ids()
+    assert hedge_id == first_id
+    assert agent.attempts() == ["1", "1-hedge"]
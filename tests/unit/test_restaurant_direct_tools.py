@@ -0,0 +1,169 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for the direct structured tools of the restaurant MCP server."""
+
+import io
+import json
+import sys
+from datetime import date, time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / "mcp_server"))
+sys.path.insert(0, str(ROOT / "lambda" / "calendar_service"))
+
+import direct_tools  # noqa: E402
+import restaurant_agent_mcp  # noqa: E402
+from direct_tools import parse_date, parse_time  # noqa: E402
+from local_service import LocalCalendarBackend, LocalCalendarService  # noqa: E402
+
+# A Friday
+FRIDAY = {"date": "2025-10-17", "time": "7:30 PM"}
+
+
+@pytest.fixture
+def calendar():
+    """Use a fresh in-process calendar and record what reaches the agent."""
+    service = LocalCalendarService(LocalCalendarBackend(latency_ms=0, error_rate=0))
+    with (
+        patch.object(direct_tools, "LOCAL_CALENDAR", True),
+        patch.object(direct_tools, "local_calendar", return_value=service),
+        patch.object(restaurant_agent_mcp, "call_agent", AsyncMock(return_value="From agent")),
+    ):
+        yield service
+
+
+@pytest.mark.asyncio
+async def test_availability_is_checked_without_the_agent(calendar):
+    """Test structured availability goes straight to the calendar's capacity check."""
+    calendar.invoke(
+        "createEvent",
+        {
+            "calendarId": "primary",
+            "summary": "Restaurant Booking - Bob (8 guests)",
+            "start": "2025-10-17T19:00:00+04:00",
+            "end": "2025-10-17T21:00:00+04:00",
+        },
+    )
+
+    large = await restaurant_agent_mcp.call_tool("check_availability", {**FRIDAY, "party_size": 8})
+    small = await restaurant_agent_mcp.call_tool("check_availability", {**FRIDAY, "party_size": 2})
+
+    assert large[0].text == "No table for 8 is available on Friday 17 October at 19:30."
+    assert small[0].text == "A table for 2 is available on Friday 17 October at 19:30."
+    restaurant_agent_mcp.call_agent.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_availability_outside_opening_hours_is_refused(calendar):
+    """Test times outside the day's opening hours are refused before the calendar is asked."""
+    calendar.invoke = MagicMock(wraps=calendar.invoke)
+    hours = {
+        day: {"open": "11:00", "close": "23:00", "closed": day == "sunday"}
+        for day in direct_tools.DAYS
+    }
+
+    with patch.object(direct_tools, "restaurant_data", return_value={"opening_hours": hours}):
+        night = await restaurant_agent_mcp.call_tool(
+            "check_availability", {**FRIDAY, "time": "03:00", "party_size": 2}
+        )
+        late = await restaurant_agent_mcp.call_tool(
+            "check_availability", {**FRIDAY, "time": "21:30", "party_size": 2}
+        )
+        sunday = await restaurant_agent_mcp.call_tool(
+            "check_availability", {"date": "2025-10-19", "time": "7pm", "party_size": 2}
+        )
+        last = await restaurant_agent_mcp.call_tool(
+            "check_availability", {**FRIDAY, "time": "21:00", "party_size": 2}
+        )
+
+    assert night[0].text == (
+        "03:00 on Friday 17 October is outside opening hours "
+        "(11:00 - 23:00, tables are booked for 2 hours)."
+    )
+    assert "outside opening hours" in late[0].text
+    assert sunday[0].text == "The restaurant is closed on Sunday 19 October."
+    assert last[0].text == "A table for 2 is available on Friday 17 October at 21:00."
+    calendar.invoke.assert_called_once()
+    restaurant_agent_mcp.call_agent.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_loose_arguments_and_free_form_requests_go_to_the_agent(calendar):
+    """Test arguments that do not map onto an operation fall back to the agent."""
+    loose = {"date": "sometime next week", "time": "evening", "party_size": 2}
+
+    result = await restaurant_agent_mcp.call_tool("check_availability", loose)
+    await restaurant_agent_mcp.call_tool("ask_restaurant", {"request": "Can I bring a cake?"})
+
+    assert result[0].text == "From agent"
+    prompts = [c.args[0] for c in restaurant_agent_mcp.call_agent.await_args_list]
+    assert prompts == [
+        "Is there a table available for 2 people on sometime next week at evening?",
+        "Can I bring a cake?",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_slots_use_one_calendar_lambda_call():
+    """Test free slots are one getAvailableSlots invocation of the calendar Lambda."""
+    body = {
+        "success": True,
+        "availableSlots": [{"startTime": "18:00", "endTime": "20:00", "capacity": 3}],
+    }
+    client = MagicMock()
+    client.invoke.return_value = {
+        "Payload": io.BytesIO(json.dumps({"statusCode": 200, "body": json.dumps(body)}).encode())
+    }
+
+    with (
+        patch.object(direct_tools, "CALENDAR_FUNCTION_NAME", "calendar-fn"),
+        patch.object(direct_tools, "lambda_client", return_value=client),
+    ):
+        result = await restaurant_agent_mcp.call_tool(
+            "get_available_slots", {"date": "2025-10-17", "party_size": 4}
+        )
+
+    assert result[0].text == "Free times on Friday 17 October for 4:\n- 18:00 - 20:00"
+    payload = json.loads(client.invoke.call_args.kwargs["Payload"])
+    assert payload == {
+        "action": "getAvailableSlots",
+        "calendarId": "primary",
+        "date": "2025-10-17",
+        "partySize": 4,
+    }
+
+
+@pytest.mark.asyncio
+async def test_menu_is_filtered_from_the_menu_data(calendar):
+    """Test menu questions are answered from menu.json, unknown ones by the agent."""
+    vegetarian = await restaurant_agent_mcp.call_tool("get_menu", {"query": "vegetarian options"})
+    unknown = await restaurant_agent_mcp.call_tool("get_menu", {"query": "kid-friendly"})
+
+    lines = vegetarian[0].text.splitlines()
+    assert lines[0] == "Dishes matching: vegetarian options"
+    assert "- Margherita Pizza (Pizza, 12.99) [vegetarian]" in lines
+    assert all("vegetarian" in line for line in lines[1:])
+    assert unknown[0].text == "From agent"
+
+
+def test_dates_and_times_are_parsed():
+    """Test the date and time formats the tools accept."""
+    friday = date(2025, 10, 17)
+
+    assert parse_date("2025-10-20", friday) == date(2025, 10, 20)
+    assert parse_date("Tomorrow", friday) == date(2025, 10, 18)
+    assert parse_date("friday", friday) == friday
+    assert parse_date("Monday", friday) == date(2025, 10, 20)
+    assert parse_date("next week", friday) is None
+    assert [parse_time(t) for t in ["7pm", "7:30 PM", "12 am", "19:30", "dinner"]] == [
+        time(19),
+        time(19, 30),
+        time(0),
+        time(19, 30),
+        None,
+    ]
@@ -0,0 +1,573 @@
+# Copyright (C) 2025 Teamwork Mauritius
+# AGPL-3.0 License
+
+"""Tests for WhatsApp webhook batch processing."""
+
+import io
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_XRAY_SDK_ENABLED", "false")
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "lambda"))
+
+import whatsapp_orchestrator  # noqa: E402
+from coalescing import MemoryBuffer  # noqa: E402
+from idempotency import IdempotencyCache, MemoryStore  # noqa: E402
+from resilience import CircuitBreaker, CircuitOpenError  # noqa: E402
+from whatsapp_orchestrator import extract_messages, handler, invoke_agentcore  # noqa: E402
+
+PHONE_ARN = "arn:aws:social-messaging:us-east-1:123456789012:phone-number-id/abc"
+QUEUE_ARN = "arn:aws:sqs:us-east-1:123456789012:WhatsAppMessages.fifo"
+# Long enough for the chunker to send it before the rest of the reply
+FIRST_PART = (
+    "Let me check that for you. We have several tables free tomorrow evening, "
+    "so I am looking up the quietest one for a party of four on the terrace, away from the kitchen."
+)
+
+
+def webhook_message(sender: str, text: str, timestamp: int, message_id: str = "") -> dict:
+    """Build a WhatsApp Cloud API text message."""
+    return {
+        "from": sender,
+        "id": message_id or f"wamid.{sender}.{timestamp}",
+        "timestamp": str(timestamp),
+        "type": "text",
+        "text": {"body": text},
+    }
+
+
+def sns_record(*changes: list[dict]) -> dict:
+    """Wrap webhook changes (one list of messages per change) in an SNS record."""
+    entry = {
+        "changes": [
+            {
+                "value": {
+                    "contacts": [
+                        {"wa_id": m["from"], "profile": {"name": f"User {m['from']}"}}
+                        for m in messages
+                    ],
+                    "messages": messages,
+                }
+            }
+            for messages in changes
+        ]
+    }
+    message = {
+        "whatsAppWebhookEntry": json.dumps(entry),
+        "context": {"MetaPhoneNumberIds": [{"arn": PHONE_ARN}]},
+    }
+    return {"Sns": {"Message": json.dumps(message)}}
+
+
+@pytest.fixture
+def whatsapp():
+    """Patch outbound WhatsApp calls, start from empty stores and turn coalescing off."""
+    with (
+        patch.object(whatsapp_orchestrator, "idempotency", IdempotencyCache(MemoryStore())),
+        patch.object(whatsapp_orchestrator, "agentcore_breaker", CircuitBreaker("agentcore")),
+        patch.object(whatsapp_orchestrator, "whatsapp_breaker", CircuitBreaker("whatsapp")),
+        patch.object(whatsapp_orchestrator, "coalescing_buffer", MemoryBuffer()),
+        patch.object(whatsapp_orchestrator, "COALESCE_WINDOW_SECONDS", 0),
+        patch.object(whatsapp_orchestrator, "mark_message_as_read"),
+        patch.object(whatsapp_orchestrator, "send_typing_indicator"),
+        patch.object(whatsapp_orchestrator, "send_whatsapp_reply") as reply,
+        patch.dict(os.environ, {"AGENTCORE_RUNTIME_ARN": "arn:runtime"}),
+    ):
+        yield reply
+
+
+def test_extract_messages_reads_every_change_and_record():
+    """Test messages beyond changes[0] and messages[0] are kept."""
+    event = {
+        "Records": [
+            sns_record(
+                [webhook_message("111", "hi", 1), webhook_message("111", "table for 2", 2)],
+                [webhook_message("222", "menu?", 1)],
+            ),
+            sns_record([webhook_message("333", "hello", 3), {"from": "333", "type": "image"}]),
+            {"Sns": {"Message": json.dumps({"other": "event"})}},
+        ]
+    }
+
+    messages = extract_messages(event)
+
+    assert [(m["user_phone"], m["text"]) for m in messages] == [
+        ("+111", "hi"),
+        ("+111", "table for 2"),
+        ("+222", "menu?"),
+        ("+333", "hello"),
+    ]
+    assert messages[2]["sender_name"] == "User 222"
+    assert messages[0]["phone_number_id"] == PHONE_ARN
+
+
+def test_handler_runs_users_concurrently_in_order(whatsapp):
+    """Test users are processed in parallel while each user's turns stay ordered."""
+    calls: list[tuple[str, str]] = []
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fake_invoke(runtime_arn, session_id, prompt, actor_id):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+            calls.append((actor_id, prompt))
+        return [f"reply to {prompt}"]
+
+    event = {
+        "Records": [
+            sns_record([webhook_message("111", "first", 2), webhook_message("222", "a", 1)]),
+            sns_record([webhook_message("111", "zeroth", 1), webhook_message("333", "b", 1)]),
+        ]
+    }
+
+    with patch.object(whatsapp_orchestrator, "invoke_agentcore", side_effect=fake_invoke):
+        result = handler(event, None)
+
+    assert result["statusCode"] == 200
+    assert peak == 3
+    assert [prompt for actor, prompt in calls if actor == "111"] == ["zeroth", "first"]
+    assert whatsapp.call_count == 4
+
+
+def test_failed_message_does_not_block_later_turns(whatsapp):
+    """Test an AgentCore error on one message still lets the next one run."""
+    event = {
+        "Records": [
+            sns_record([webhook_message("111", "boom", 1), webhook_message("111", "retry", 2)])
+        ]
+    }
+
+    with patch.object(
+        whatsapp_orchestrator,
+        "invoke_agentcore",
+        side_effect=[RuntimeError("throttled"), ["ok"]],
+    ):
+        handler(event, None)
+
+    whatsapp.assert_called_once_with(PHONE_ARN, "+111", "ok")
+
+
+def test_side_channel_calls_overlap_agent_invocation(whatsapp):
+    """Test AgentCore starts before the read receipt finishes and the handler drains it."""
+    agent_started = threading.Event()
+    receipt_overlapped = []
+
+    def slow_receipt(phone_number_id, message_id, user_phone=""):
+        receipt_overlapped.append(agent_started.wait(timeout=2))
+
+    def fake_invoke(runtime_arn, session_id, prompt, actor_id):
+        agent_started.set()
+        return ["ok"]
+
+    event = {"Records": [sns_record([webhook_message("111", "hi", 1)])]}
+
+    with (
+        patch.object(whatsapp_orchestrator, "mark_message_as_read", side_effect=slow_receipt),
+        patch.object(whatsapp_orchestrator, "invoke_agentcore", side_effect=fake_invoke),
+    ):
+        handler(event, None)
+
+    assert receipt_overlapped == [True]
+    assert whatsapp_orchestrator._pending == []
+    whatsapp.assert_called_once_with(PHONE_ARN, "+111", "ok")
+
+
+def sqs_record(message: dict, sqs_message_id: str) -> dict:
+    """Wrap a queued message as the worker receives it from the FIFO queue."""
+    return {
+        "eventSource": "aws:sqs",
+        "eventSourceARN": QUEUE_ARN,
+        "messageId": sqs_message_id,
+        "receiptHandle": f"receipt-{sqs_message_id}",
+        "body": json.dumps(message),
+        "attributes": {"MessageGroupId": message["user_phone"].lstrip("+")},
+    }
+
+
+def test_ingest_queues_messages_grouped_by_phone():
+    """Test the ingest function queues each message in its user's FIFO group."""
+    event = {
+        "Records": [
+            sns_record([webhook_message("111", "hi", 1), webhook_message("222", "menu?", 1)])
+        ]
+    }
+
+    with (
+        patch.object(whatsapp_orchestrator, "QUEUE_URL", "https://sqs/queue.fifo"),
+        patch.dict(whatsapp_orchestrator._clients, {"sqs": MagicMock()}),
+        patch.object(whatsapp_orchestrator, "invoke_agentcore") as invoke,
+    ):
+        sqs = whatsapp_orchestrator.get_client("sqs")
+        sqs.send_message_batch.return_value = {"Successful": [], "Failed": []}
+        handler(event, None)
+
+    entries = sqs.send_message_batch.call_args.kwargs["Entries"]
+    assert [entry["MessageGroupId"] for entry in entries] == ["111", "222"]
+    assert len({entry["MessageDeduplicationId"] for entry in entries}) == 2
+    assert json.loads(entries[0]["MessageBody"])["text"] == "hi"
+    invoke.assert_not_called()
+
+
+def test_worker_retries_failed_turn_and_later_turns_of_that_user(whatsapp):
+    """Test a failure is reported with every later message in its group only."""
+    messages = extract_messages(
+        {
+            "Records": [
+                sns_record(
+                    [
+                        webhook_message("111", "boom", 1),
+                        webhook_message("111", "later", 2),
+                        webhook_message("222", "fine", 1),
+                    ]
+                )
+            ]
+        }
+    )
+    event = {"Records": [sqs_record(m, f"sqs-{i}") for i, m in enumerate(messages)]}
+
+    def fake_invoke(runtime_arn, session_id, prompt, actor_id):
+        if prompt == "boom":
+            raise RuntimeError("agent timeout")
+        return ["ok"]
+
+    with patch.object(whatsapp_orchestrator, "invoke_agentcore", side_effect=fake_invoke):
+        result = handler(event, None)
+
+    assert result == {
+        "batchItemFailures": [{"itemIdentifier": "sqs-0"}, {"itemIdentifier": "sqs-1"}]
+    }
+    whatsapp.assert_called_once_with(PHONE_ARN, "+222", "ok")
+
+
+def test_redelivered_webhook_skips_agent_turn(whatsapp):
+    """Test a message ID already completed is not sent to AgentCore again."""
+    event = {"Records": [sns_record([webhook_message("111", "book for 2", 1)])]}
+
+    with patch.object(whatsapp_orchestrator, "invoke_agentcore", return_value=["ok"]) as invoke:
+        handler(event, None)
+        handler(event, None)
+
+    invoke.assert_called_once()
+    whatsapp.assert_called_once_with(PHONE_ARN, "+111", "ok")
+
+
+def test_direct_path_coalesces_burst_across_invocations(whatsapp):
+    """Test messages from separate SNS invocations within the window form one turn."""
+    events = [
+        {"Records": [sns_record([webhook_message("111", text, timestamp)])]}
+        for timestamp, text in enumerate(["hi", "table for 4", "tomorrow 8pm"], start=1)
+    ]
+
+    with (
+        patch.object(whatsapp_orchestrator, "COALESCE_WINDOW_SECONDS", 0.2),
+        patch.object(whatsapp_orchestrator, "invoke_agentcore", return_value=["ok"]) as invoke,
+    ):
+        threads = [threading.Thread(target=handler, args=(event, None)) for event in events]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        for thread in threads:
+            thread.join()
+
+    invoke.assert_called_once()
+    assert invoke.call_args.args[2] == "hi\ntable for 4\ntomorrow 8pm"
+    whatsapp.assert_called_once_with(PHONE_ARN, "+111", "ok")
+
+
+def test_direct_burst_survives_open_breaker(whatsapp):
+    """Test a coalesced burst hitting the open breaker is retried whole, other users unharmed."""
+    leader = {
+        "Records": [
+            sns_record([webhook_message("111", "hi", 1), webhook_message("222", "book", 1)])
+        ]
+    }
+    followers = [
+        {"Records": [sns_record([webhook_message("111", text, timestamp)])]}
+        for timestamp, text in [(2, "table for 4"), (3, "tomorrow 8pm")]
+    ]
+    agentcore_down = True
+    prompts = []
+    errors = []
+
+    def fake_invoke(runtime_arn, session_id, prompt, actor_id):
+        if agentcore_down and actor_id == "111":
+            raise CircuitOpenError("open")
+        prompts.append(prompt)
+        return ["ok"]
+
+    def run(event):
+        try:
+            handler(event, None)
+        except CircuitOpenError as e:
+            errors.append(e)
+
+    with (
+        patch.object(whatsapp_orchestrator, "COALESCE_WINDOW_SECONDS", 0.2),
+        patch.object(whatsapp_orchestrator, "invoke_agentcore", side_effect=fake_invoke),
+    ):
+        threads = [threading.Thread(target=run, args=(event,)) for event in [leader, *followers]]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        for thread in threads:
+            thread.join()
+
+        # Lambda retries the leader's event only
+        assert len(errors) == 1
+        assert prompts == ["book"]
+        agentcore_down = False
+        handler(leader, None)
+
+    assert prompts == ["book", "hi\ntable for 4\ntomorrow 8pm"]
+    whatsapp.assert_any_call(PHONE_ARN, "+222", "ok")
+    whatsapp.assert_called_with(PHONE_ARN, "+111", "ok")
+
+
+def test_worker_merges_burst_and_retries_it_whole(whatsapp):
+    """Test queued messages sent close together run as one turn and fail together."""
+    messages = extract_messages(
+        {
+            "Records": [
+                sns_record(
+                    [
+                        webhook_message("111", "hi", 1),
+                        webhook_message("111", "table for 4", 2),
+                        webhook_message("111", "thanks", 60),
+                    ]
+                )
+            ]
+        }
+    )
+    event = {"Records": [sqs_record(m, f"sqs-{i}") for i, m in enumerate(messages)]}
+
+    with (
+        patch.object(whatsapp_orchestrator, "COALESCE_WINDOW_SECONDS", 3),
+        patch.object(
+            whatsapp_orchestrator, "invoke_agentcore", side_effect=[RuntimeError("throttled")]
+        ) as invoke,
+    ):
+        result = handler(event, None)
+
+    assert invoke.call_args.args[2] == "hi\ntable for 4"
+    assert [f["itemIdentifier"] for f in result["batchItemFailures"]] == [
+        "sqs-0",
+        "sqs-1",
+        "sqs-2",
+    ]
+
+
+def sse_response(*events) -> dict:
+    """Build a streaming invoke_agent_runtime response from SSE payloads."""
+    body = "".join(f"data: {json.dumps(event)}\n\n" for event in events).encode()
+    return {
+        "contentType": "text/event-stream",
+        "response": StreamingBody(io.BytesIO(body), len(body)),
+    }
+
+
+def test_invoke_agentcore_streams_text_deltas():
+    """Test SSE text deltas are yielded in order and a stream error is raised."""
+    agentcore = MagicMock()
+    with patch.dict(whatsapp_orchestrator._clients, {"bedrock-agentcore": agentcore}):
+        agentcore.invoke_agent_runtime.return_value = sse_response("Hello", " there", {"x": 1})
+        deltas = list(invoke_agentcore("arn:runtime", "session", "hi", "111"))
+
+        agentcore.invoke_agent_runtime.return_value = sse_response("Hel", {"error": "boom"})
+        with pytest.raises(RuntimeError, match="boom"):
+            list(invoke_agentcore("arn:runtime", "session", "hi", "111"))
+
+    assert deltas == ["Hello", " there"]
+    payload = json.loads(agentcore.invoke_agent_runtime.call_args.kwargs["payload"])
+    assert payload["stream"] is True
+
+
+def test_first_reply_part_is_sent_before_stream_ends(whatsapp):
+    """Test a long enough first part reaches WhatsApp while the agent is still working."""
+    sent_before_end = []
+
+    def fake_invoke(runtime_arn, session_id, prompt, actor_id):
+        yield "<thinking>check tables</thinking>" + FIRST_PART
+        yield "\n\n"
+        sent_before_end.append(whatsapp.call_count)
+        yield "Booking confirmed! Event ID: abc123"
+
+    event = {"Records": [sns_record([webhook_message("111", "book", 1)])]}
+
+    with patch.object(whatsapp_orchestrator, "invoke_agentcore", side_effect=fake_invoke):
+        handler(event, None)
+
+    assert sent_before_end == [1]
+    assert [c.args[2] for c in whatsapp.call_args_list] == [
+        FIRST_PART,
+        "Booking confirmed! Event ID: abc123",
+    ]
+
+
+def test_stream_broken_after_first_part_is_not_retried(whatsapp):
+    """Test a stream that fails after a sent part is completed instead of re-run."""
+
+    def fake_invoke(runtime_arn, session_id, prompt, actor_id):
+        yield FIRST_PART + "\n\n"
+        raise RuntimeError("connection reset")
+
+    messages = extract_messages({"Records": [sns_record([webhook_message("111", "book", 1)])]})
+    event = {"Records": [sqs_record(messages[0], "sqs-0")]}
+
+    with patch.object(whatsapp_orchestrator, "invoke_agentcore", side_effect=fake_invoke):
+        assert handler(event, None) == {"batchItemFailures": []}
+        handler(event, None)
+
+    whatsapp.assert_called_once_with(PHONE_ARN, "+111", FIRST_PART)
+
+
+def test_clients_are_created_on_first_use():
+    """Test importing the orchestrator creates no AWS clients and each is made once."""
+    with (
+        patch.dict(whatsapp_orchestrator._clients, clear=True),
+        patch.object(whatsapp_orchestrator.boto3, "client") as create,
+    ):
+        whatsapp_orchestrator.get_client("sqs")
+        whatsapp_orchestrator.get_client("sqs")
+        whatsapp_orchestrator.get_client("bedrock-agentcore")
+
+    assert [c.args[0] for c in create.call_args_list] == ["sqs", "bedrock-agentcore"]
+    agent_config = create.call_args_list[1].kwargs["config"]
+    assert agent_config.read_timeout == whatsapp_orchestrator.AGENT_TIMEOUT_SECONDS
+
+
+def test_faq_answered_without_agent_and_audited(whatsapp, caplog):
+    """Test an opening-hours question is answered directly and logged for audit."""
+    event = {"Records": [sns_record([webhook_message("111", "What are your opening hours?", 1)])]}
+
+    with (
+        caplog.at_level("INFO"),
+        patch.object(whatsapp_orchestrator, "invoke_agentcore") as invoke,
+    ):
+        handler(event, None)
+
+    invoke.assert_not_called()
+    reply = whatsapp.call_args.args[2]
+    assert reply.startswith("Our opening hours:")
+    audit = next(r.getMessage() for r in caplog.records if "FAQ fast path" in r.getMessage())
+    assert '"intent": "hours"' in audit
+    assert '"message_ids": ["wamid.111.1"]' in audit
+
+
+def test_worker_holds_fresh_burst_once_then_runs_it(whatsapp):
+    """Test a just-sent message is handed back for the window, then runs on redelivery."""
+    messages = extract_messages({"Records": [sns_record([webhook_message("111", "hi", 1)])]})
+    record = sqs_record(messages[0], "sqs-0")
+    record["attributes"].update(
+        ApproximateReceiveCount="1", SentTimestamp=str(int(time.time() * 1000))
+    )
+    sqs = MagicMock()
+    sqs.change_message_visibility_batch.return_value = {"Successful": [], "Failed": []}
+
+    with (
+        patch.object(whatsapp_orchestrator, "COALESCE_WINDOW_SECONDS", 3),
+        patch.dict(whatsapp_orchestrator._clients, {"sqs": sqs}),
+        patch.object(whatsapp_orchestrator, "invoke_agentcore", return_value=["ok"]) as invoke,
+    ):
+        held = handler({"Records": [record]}, None)
+        record["attributes"]["ApproximateReceiveCount"] = "2"
+        redelivered = handler({"Records": [record]}, None)
+
+    assert held == {"batchItemFailures": [{"itemIdentifier": "sqs-0"}]}
+    entry = sqs.change_message_visibility_batch.call_args.kwargs["Entries"][0]
+    assert 1 <= entry["VisibilityTimeout"] <= 3
+    assert redelivered == {"batchItemFailures": []}
+    invoke.assert_called_once()
+    whatsapp.assert_called_once_with(PHONE_ARN, "+111", "ok")
+
+
+def test_open_breaker_sends_busy_reply_once_and_requeues_sooner(whatsapp):
+    """Test a turn hitting the open breaker tells the user once and is retried in 30s."""
+    messages = extract_messages(
+        {
+            "Records": [
+                sns_record([webhook_message("111", "book", 1), webhook_message("111", "8pm", 9)])
+            ]
+        }
+    )
+    event = {"Records": [sqs_record(m, f"sqs-{i}") for i, m in enumerate(messages)]}
+    sqs = MagicMock()
+    sqs.change_message_visibility_batch.return_value = {"Successful": [], "Failed": []}
+
+    with (
+        patch.dict(whatsapp_orchestrator._clients, {"sqs": sqs}),
+        patch.object(
+            whatsapp_orchestrator, "invoke_agentcore", side_effect=CircuitOpenError("open")
+        ),
+    ):
+        first = handler(event, None)
+        handler(event, None)
+
+    assert first == {
+        "batchItemFailures": [{"itemIdentifier": "sqs-0"}, {"itemIdentifier": "sqs-1"}]
+    }
+    whatsapp.assert_called_once_with(PHONE_ARN, "+111", whatsapp_orchestrator.BUSY_MESSAGE)
+    request = sqs.change_message_visibility_batch.call_args.kwargs
+    assert request["QueueUrl"] == (
+        "https://sqs.us-east-1.amazonaws.com/123456789012/WhatsAppMessages.fifo"
+    )
+    assert [entry["ReceiptHandle"] for entry in request["Entries"]] == [
+        "receipt-sqs-0",
+        "receipt-sqs-1",
+    ]
+    assert request["Entries"][0]["VisibilityTimeout"] == 30
+
+    # Once AgentCore is back, the retry runs the turn normally
+    with patch.object(whatsapp_orchestrator, "invoke_agentcore", return_value=["Booked!"]):
+        assert handler({"Records": event["Records"][:1]}, None) == {"batchItemFailures": []}
+    assert whatsapp.call_args.args[2] == "Booked!"
+
+
+def test_open_breaker_fails_direct_invocation_for_lambda_retry(whatsapp):
+    """Test the SNS path raises so Lambda's async retry re-runs the turn."""
+    event = {"Records": [sns_record([webhook_message("111", "book", 1)])]}
+
+    with (
+        patch.object(
+            whatsapp_orchestrator, "invoke_agentcore", side_effect=CircuitOpenError("open")
+        ),
+        pytest.raises(CircuitOpenError),
+    ):
+        handler(event, None)
+
+    whatsapp.assert_called_once_with(PHONE_ARN, "+111", whatsapp_orchestrator.BUSY_MESSAGE)
+
+
+def test_agentcore_throttle_is_retried():
+    """Test invoke_agentcore retries a throttled request before streaming."""
+    agentcore = MagicMock()
+    throttled = ClientError(
+        {"Error": {"Code": "ThrottlingException"}, "ResponseMetadata": {"HTTPStatusCode": 429}},
+        "InvokeAgentRuntime",
+    )
+    agentcore.invoke_agent_runtime.side_effect = [throttled, sse_response("Hello")]
+
+    with (
+        patch.dict(whatsapp_orchestrator._clients, {"bedrock-agentcore": agentcore}),
+        patch.object(whatsapp_orchestrator, "agentcore_breaker", CircuitBreaker("agentcore")),
+        patch("resilience.time.sleep"),
+    ):
+        deltas = list(invoke_agentcore("arn:runtime", "session", "hi", "111"))
+
+    assert deltas == ["Hello"]
+    assert agentcore.invoke_agent_runtime.call_count == 2